@@ -0,0 +1,83 @@
+"""
+Micro-benchmark for IOHandler.render over the templates of the example alerts.
+
+Compares rendering with the template caches cleared before every render (every render
+re-validates, re-tokenizes and re-parses its function calls, like before the cache existed)
+to rendering with warm caches.
+
+Usage:
+    python benchmarks/render_benchmark.py [iterations]
+"""
+import os
+import sys
+import timeit
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from keep.contextmanager.contextmanager import ContextManager  # noqa: E402
+from keep.iohandler.iohandler import (  # noqa: E402
+    IOHandler,
+    compile_function_call,
+    compile_template,
+)
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "examples", "alerts")
+
+
+def get_templates(value) -> list[str]:
+    """Collect all the templated strings of an alert yaml."""
+    if isinstance(value, str):
+        return [value] if "{{" in value or "keep." in value else []
+    if isinstance(value, dict):
+        return [t for v in value.values() for t in get_templates(v)]
+    if isinstance(value, list):
+        return [t for v in value for t in get_templates(v)]
+    return []
+
+
+def main(iterations: int = 1000):
+    templates = []
+    for file in sorted(os.listdir(EXAMPLES_DIR)):
+        with open(os.path.join(EXAMPLES_DIR, file)) as f:
+            templates.extend(get_templates(yaml.safe_load(f)))
+
+    context_manager = ContextManager.get_instance()
+    context_manager.set_step_context("this", results=[["2023-04-05 20:51:38", 1]])
+    context_manager.set_step_context("db-no-space", results="91%")
+    context_manager.set_step_context(
+        "get-max-datetime", results=[["2023-04-05 20:51:38", 1]]
+    )
+    context_manager.set_for_each_context(list(range(20)))
+    io_handler = IOHandler()
+
+    # skip templates that can't be rendered with the fake context
+    renderable_templates = []
+    for template in templates:
+        try:
+            io_handler.render(template)
+            renderable_templates.append(template)
+        except Exception:
+            pass
+
+    def render_all():
+        for template in renderable_templates:
+            io_handler.render(template)
+
+    def render_all_cold():
+        for template in renderable_templates:
+            compile_template.cache_clear()
+            compile_function_call.cache_clear()
+            io_handler.render(template)
+
+    cold = timeit.timeit(render_all_cold, number=iterations)
+    warm = timeit.timeit(render_all, number=iterations)
+    renders = iterations * len(renderable_templates)
+    print(f"templates: {len(renderable_templates)}, renders: {renders}")
+    print(f"no cache:   {renders / cold:,.0f} renders/sec")
+    print(f"with cache: {renders / warm:,.0f} renders/sec ({cold / warm:.2f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -1,5 +1,3 @@
-import asyncio
-import inspect
 import logging
 from dataclasses import field
 
@@ -25,15 +23,18 @@ class Action:
     def __post_init__(self):
         self.logger = logging.getLogger(__name__)
         self.io_handler = IOHandler()
-        self.context_manager = ContextManager.get_instance()
         self.conditions = self.config.get("condition", [])
 
-    def run(self):
+    @property
+    def context_manager(self) -> ContextManager:
+        return ContextManager.get_instance()
+
+    async def run(self):
         try:
             if self.config.get("foreach"):
-                did_action_run = self._run_foreach()
+                did_action_run = await self._run_foreach()
             else:
-                did_action_run = self._run_single()
+                did_action_run = await self._run_single()
             return did_action_run
         except Exception as e:
             raise ActionError(e)
@@ -50,22 +51,38 @@ class Action:
         alert_id = self.context_manager.get_alert_id()
         return throttle.check_throttling(action_name, alert_id)
 
-    def _run_foreach(self):
+    async def _run_foreach(self):
         """Evaluate the action for each item, when using the `foreach` attribute (see foreach.md)"""
         # the item holds the value we are going to iterate over
         items = self.io_handler.render(self.config.get("foreach"))
+        foreach_concurrency = int(self.config.get("foreach_concurrency") or 1)
+        if foreach_concurrency > 1:
+            return any(
+                await self.context_manager.run_foreach(
+                    items, self._run_single, foreach_concurrency
+                )
+            )
         any_action_run = False
         # apply ALL conditions (the decision whether to run or not is made in the end)
-        for item in items:
+        async for item in self.context_manager.iterate_foreach(items):
             self.context_manager.set_for_each_context(item)
-            did_action_run = self._run_single()
+            did_action_run = await self._run_single()
             # If at least one item triggered an action, return True
             # TODO - do it per item
             if did_action_run:
                 any_action_run = True
         return any_action_run
 
-    def _run_single(self):
+    async def _run_single(self):
+        # first, apply the conditions, then check the if statement and throttling
+        if not self._should_run():
+            return
+        # last, run the action (async providers are awaited, sync providers run in a thread)
+        rendered_value = self.io_handler.render_context(self.provider_context)
+        await self.provider.notify_async(**rendered_value)
+        return True
+
+    def _should_run(self) -> bool:
         # Initialize all conditions
         conditions = []
 
@@ -116,8 +133,9 @@ class Action:
         # Now check it
         if if_conf:
             if_met = self.io_handler.render(if_conf)
-            # Evaluate the condition string
-            if_met = eval(if_met)
+            # Evaluate the condition string (a single {{ alias }} is already rendered to its value)
+            if isinstance(if_met, str):
+                if_met = eval(if_met)
         else:
             if_met = True
 
@@ -127,7 +145,7 @@ class Action:
                 self.config.get("name"),
                 if_conf,
             )
-            return
+            return False
 
         self.logger.info("Action %s evaluated to run!", self.config.get("name"))
 
@@ -136,29 +154,5 @@ class Action:
         throttled = self._check_throttling(self.config.get("name"))
         if throttled:
             self.logger.info("Action %s is throttled", self.config.get("name"))
-            return
-
-        # Last, run the action
-        rendered_value = self.io_handler.render_context(self.provider_context)
-        # if the provider is async, run it in a new event loop
-        if inspect.iscoroutinefunction(self.provider.notify):
-            result = self._run_single_async()
-        # else, just run the provider
-        else:
-            self.provider.notify(**rendered_value)
-            return True
-
-    def _run_single_async(self):
-        """For async providers, run them in a new event loop
-
-        Raises:
-            ActionError: _description_
-        """
-        rendered_value = self.io_handler.render_context(self.provider_context)
-        # This is "magically solved" because of nest_asyncio but probably isn't best practice
-        loop = asyncio.new_event_loop()
-        task = loop.create_task(self.provider.notify(**rendered_value))
-        try:
-            loop.run_until_complete(task)
-        except Exception as e:
-            raise ActionError(e)
+            return False
+        return True
@@ -1,3 +1,5 @@
+import asyncio
+import datetime
 import enum
 import logging
 import typing
@@ -7,6 +9,8 @@ from pydantic.dataclasses import dataclass
 from keep.action.action import Action
 from keep.contextmanager.contextmanager import ContextManager
 from keep.iohandler.iohandler import IOHandler
+from keep.scheduler.scheduler import AlertSchedule
+from keep.statestore.statestore import StateRetention
 from keep.step.step import Step, StepError
 
 
@@ -24,12 +28,19 @@ class Alert:
     alert_steps: typing.List[Step]
     alert_actions: typing.List[Action]
     alert_file: str = None
+    alert_state_retention: StateRetention = None
+    alert_steps_concurrency: int = 1
+    alert_schedule: AlertSchedule = None
 
     def __post_init__(self):
         self.logger = logging.getLogger(__name__)
         self.alert_file = self.alert_source.split("/")[-1]
         self.io_nandler = IOHandler()
-        self.context_manager = ContextManager.get_instance()
+
+    @property
+    def context_manager(self) -> ContextManager:
+        # resolved on every access - alerts are parsed once but may run in different (per-alert) contexts
+        return ContextManager.get_instance()
 
     def _get_alert_context(self):
         return {
@@ -40,37 +51,117 @@ class Alert:
             "alert_actions_context": self.context_manager.actions_context,
         }
 
-    def run_step(self, step: Step):
+    async def run_step(self, step: Step):
         self.logger.info("Running step %s", step.step_id)
-        if step.foreach:
+        if step.foreach and step.foreach_concurrency > 1:
+            rendered_foreach = self.io_nandler.render(step.foreach)
+            self.logger.debug(
+                "Step is a concurrent foreach step",
+                extra={"foreach_concurrency": step.foreach_concurrency},
+            )
+            step_outputs = await self.context_manager.run_foreach(
+                rendered_foreach, step.run, step.foreach_concurrency
+            )
+            # the results are kept in the foreach items order
+            for step_output in step_outputs:
+                self.context_manager.set_step_context(
+                    step.step_id, results=step_output, foreach=True
+                )
+            step_output = step_outputs[-1] if step_outputs else None
+        elif step.foreach:
             rendered_foreach = self.io_nandler.render(step.foreach)
-            for f in rendered_foreach:
+            async for f in self.context_manager.iterate_foreach(rendered_foreach):
                 self.logger.debug("Step is a foreach step")
                 self.context_manager.set_for_each_context(f)
-                step_output = step.run()
+                step_output = await step.run()
                 self.context_manager.set_step_context(
                     step.step_id, results=step_output, foreach=True
                 )
         else:
-            step_output = step.run()
+            step_output = await step.run()
             self.context_manager.set_step_context(step.step_id, results=step_output)
         self.logger.info("Step %s ran successfully", step.step_id)
         return step_output
 
-    def run_steps(self):
+    async def submit_queries(self):
+        """
+        Start the queries of the steps that don't depend on other steps, for providers that run queries asynchronously,
+            so they all run at the same time (instead of one after the other).
+        """
+        steps = [
+            step
+            for step in self.alert_steps
+            if step.can_submit_query and not step.foreach and not step.dependencies
+        ]
+        # every submission is awaited, so none of the queries is submitted after a failure was handled
+        submissions = await asyncio.gather(
+            *(step.submit_query() for step in steps), return_exceptions=True
+        )
+        for step, submission in zip(steps, submissions):
+            if isinstance(submission, BaseException):
+                self.logger.error(f"Step {step.step_id} failed: {submission}")
+                raise submission
+
+    async def run_steps(self):
         self.logger.debug(f"Running steps for alert {self.alert_id}")
+        await self.submit_queries()
+        if self.alert_steps_concurrency > 1 and len(self.alert_steps) > 1:
+            await self._run_steps_concurrently()
+            self.logger.debug(f"Steps for alert {self.alert_id} ran successfully")
+            return
         for step in self.alert_steps:
             try:
-                self.run_step(step)
+                await self.run_step(step)
             except StepError as e:
                 self.logger.error(f"Step {step.step_id} failed: {e}")
                 raise
         self.logger.debug(f"Steps for alert {self.alert_id} ran successfully")
 
-    def run_action(self, action: Action):
+    async def _run_steps_concurrently(self):
+        """
+        Run the steps by their dependencies (see Parser._parse_step_dependencies),
+            up to alert_steps_concurrency independent steps at the same time.
+        """
+        pending_steps = list(self.alert_steps)
+        running_steps = {}
+        finished_step_ids = set()
+        try:
+            while pending_steps or running_steps:
+                for step in list(pending_steps):
+                    if len(running_steps) >= self.alert_steps_concurrency:
+                        break
+                    if all(
+                        step_id in finished_step_ids for step_id in step.dependencies
+                    ):
+                        pending_steps.remove(step)
+                        # every step runs in a task (a copy of the current context), so it uses the alert's context manager
+                        task = asyncio.ensure_future(self.run_step(step))
+                        running_steps[task] = step
+                finished, _ = await asyncio.wait(
+                    running_steps, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in finished:
+                    step = running_steps.pop(task)
+                    try:
+                        task.result()
+                    except StepError as e:
+                        self.logger.error(f"Step {step.step_id} failed: {e}")
+                        # don't schedule the pending steps
+                        raise
+                    finished_step_ids.add(step.step_id)
+        finally:
+            # a step failed, wait for the running steps
+            if running_steps:
+                await asyncio.gather(*running_steps, return_exceptions=True)
+        # {{ steps.this }} is the last step, as if the steps ran sequentially
+        steps_context = self.context_manager.steps_context
+        if self.alert_steps[-1].step_id in steps_context:
+            steps_context["this"] = steps_context[self.alert_steps[-1].step_id]
+
+    async def run_action(self, action: Action):
         self.logger.info("Running action %s", action.name)
         try:
-            action_status = action.run()
+            action_status = await action.run()
             action_error = None
             self.logger.info("Action %s ran successfully", action.name)
         except Exception as e:
@@ -79,23 +170,34 @@ class Alert:
             action_error = str(e)
         return action_status, action_error
 
-    def run_actions(self):
+    async def run_actions(self):
         self.logger.debug("Running actions")
         actions_firing = []
         actions_errors = []
         for action in self.alert_actions:
-            action_status, action_error = self.run_action(action)
+            action_status, action_error = await self.run_action(action)
             actions_firing.append(action_status)
             actions_errors.append(action_error)
         self.logger.debug("Actions run")
         return actions_firing, actions_errors
 
-    def run(self):
+    async def run(self):
         self.logger.debug(f"Running alert {self.alert_id}")
         # todo: check why is this needed?
         self.context_manager.set_alert_context(self._get_alert_context())
-        self.run_steps()
-        actions_firing, actions_errors = self.run_actions()
+        self.context_manager.run_started_at = datetime.datetime.now(
+            datetime.timezone.utc
+        )
+        try:
+            await self.run_steps()
+            actions_firing, actions_errors = await self.run_actions()
+            # the next run continues from this run's watermarks, unless an action failed (then it retries)
+            if not any(actions_errors):
+                self.context_manager.commit_run_state()
+        finally:
+            self.context_manager.discard_run_state()
+            self.context_manager.cancel_submitted_queries()
+            self.context_manager.close_results_streams()
 
         # Save the state
         #   alert is firing if one its actions is firing
@@ -108,17 +210,18 @@ class Alert:
             alert_id=self.alert_id,
             alert_context=self._get_alert_context(),
             alert_status=alert_status,
+            retention=self.alert_state_retention,
         )
         self.logger.debug(f"Finish to run alert {self.alert_id}")
         return actions_errors
 
-    def _handle_actions(self):
+    async def _handle_actions(self):
         self.logger.debug(f"Handling actions for alert {self.alert_id}")
         for action in self.alert_actions:
-            action.run()
+            await action.run()
         self.logger.debug(f"Actions handled for alert {self.alert_id}")
 
-    def run_missing_steps(self, end_step=None):
+    async def run_missing_steps(self, end_step=None):
         """Runs steps without context (when the alert is run by the API)"""
         self.logger.debug(f"Running missing steps for alert {self.alert_id}")
         steps_context = self.context_manager.get_full_context().get("steps")
@@ -129,7 +232,7 @@ class Alert:
             # If we don't have context for the step, run it
             if step.step_id not in steps_context:
                 try:
-                    self.run_step(step)
+                    await self.run_step(step)
                 except StepError as e:
                     self.logger.error(f"Step {step.step_id} failed: {e}")
                     raise
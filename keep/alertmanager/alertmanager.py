@@ -1,22 +1,45 @@
+import asyncio
+import hashlib
 import logging
 import os
 import time
 import typing
 
+import validators
+
 from keep.alert.alert import Alert
+from keep.contextmanager.contextmanager import ContextManager
+from keep.eventloop.eventloop import EventLoop
 from keep.parser.parser import Parser
+from keep.providers.base.http_client import HttpClient
+from keep.providers.base.query_coalescer import QueryCoalescer, query_coalescer_var
+from keep.providers.providers_registry import ProvidersRegistry
+from keep.scheduler.scheduler import AlertSchedule, AlertScheduler, ScheduledAlert
+from keep.statestore.statestore import StateRetention
 
 
 class AlertManager:
     def __init__(self):
         self.parser = Parser()
         self.logger = logging.getLogger(__name__)
+        # compiled alerts cache - alert source -> (fingerprint, content hash, alerts)
+        self.alerts_cache = {}
+        self.alerts_cache_hits = 0
+        self.alerts_cache_misses = 0
+        # set when running scheduled alerts (see _run_scheduled)
+        self.scheduler: AlertScheduler = None
+        # identical queries of the alerts that run together (a tick) run once, see QueryCoalescer
+        self.query_coalescing = os.environ.get(
+            "KEEP_QUERY_COALESCING", "true"
+        ).lower() in ("true", "1")
+        self.query_coalescing_stats = {"queries": 0, "saved_calls": 0}
 
     def run(
         self,
         alerts_path: str | list[str],
         providers_file: str = None,
         interval: int = 0,
+        workers: int = 1,
     ):
         """
         Run alerts from a file or directory.
@@ -24,22 +47,33 @@ class AlertManager:
         Args:
             alert (str): Either a an alert yaml or a directory containing alert yamls or a list of urls to get the alerts from.
             providers_file (str, optional): The path to the providers yaml. Defaults to None.
+            interval (int, optional): Run the alerts without a schedule every interval seconds. Defaults to 0 (once).
+            workers (int, optional): How many alerts to run concurrently. Defaults to 1.
         """
         self.logger.info(
-            f"Running alert(s) from {alerts_path}", extra={"interval": interval}
+            f"Running alert(s) from {alerts_path}",
+            extra={"interval": interval, "workers": workers},
         )
-        # If interval is set, run the alert every INTERVAL seconds until the user stops the process
-        if interval > 0:
-            self.logger.info(
-                "Running in interval mode. Press Ctrl+C to stop the process."
-            )
-            while True:
-                self._run(alerts_path, providers_file)
-                self.logger.info(f"Sleeping for {interval} seconds...")
-                time.sleep(interval)
-        # If interval is not set, run the alert once
-        else:
-            errors = self._run(alerts_path, providers_file)
+        try:
+            # If interval is set or alerts have a schedule, run the alerts on their schedules until the user stops the process
+            if interval > 0 or any(
+                alert.alert_schedule
+                for alert in self.get_alerts(alerts_path, providers_file)
+            ):
+                self.logger.info(
+                    "Running in scheduled mode. Press Ctrl+C to stop the process."
+                )
+                EventLoop.get_instance().run(
+                    self._run_scheduled(
+                        alerts_path, providers_file, interval, workers=workers
+                    )
+                )
+            # If interval is not set, run the alert once
+            else:
+                errors = self._run(alerts_path, providers_file, workers=workers)
+        finally:
+            # release the providers connections of the alerts
+            self.dispose()
         # TODO: errors should be part of the Alert/Action/Step class so it'll be distinguishable
         if any(errors):
             self.logger.error(
@@ -59,18 +93,228 @@ class AlertManager:
         alerts = []
         if isinstance(alert_path, tuple):
             for alert_url in alert_path:
-                alerts.extend(self.parser.parse(alert_url, providers_file))
+                alerts.extend(self._get_cached_alerts(alert_url, providers_file))
         elif os.path.isdir(alert_path):
             alerts.extend(self._get_alerts_from_directory(alert_path, providers_file))
         else:
-            alerts = self.parser.parse(alert_path, providers_file)
+            alerts = self._get_cached_alerts(alert_path, providers_file)
         return alerts
 
-    def _run(self, alert_path: str | tuple[str], providers_file: str = None):
+    def _get_alerts_fingerprint(
+        self, alert_source: str, providers_file: str = None
+    ) -> tuple:
+        """
+        A cheap fingerprint (mtime + size) of the alert file and the providers file.
+        """
+        alert_source_stat = os.stat(alert_source)
+        fingerprint = (alert_source_stat.st_mtime_ns, alert_source_stat.st_size)
+        if providers_file and os.path.exists(providers_file):
+            providers_file_stat = os.stat(providers_file)
+            fingerprint += (
+                providers_file_stat.st_mtime_ns,
+                providers_file_stat.st_size,
+            )
+        return fingerprint
+
+    def _get_alerts_content_hash(
+        self, alert_source: str, providers_file: str = None
+    ) -> str:
+        content_hash = hashlib.sha256()
+        with open(alert_source, "rb") as f:
+            content_hash.update(f.read())
+        if providers_file and os.path.exists(providers_file):
+            with open(providers_file, "rb") as f:
+                content_hash.update(f.read())
+        return content_hash.hexdigest()
+
+    def _get_cached_alerts(
+        self, alert_source: str, providers_file: str = None
+    ) -> list[Alert]:
+        """
+        Get the alerts of an alert file, parsing the file only if it changed since the last time it was parsed.
+
+        Args:
+            alert_source (str): The path to the alert yaml.
+            providers_file (str, optional): The path to the providers yaml. Defaults to None.
+
+        Returns:
+            list[Alert]: The (possibly cached) alerts.
+        """
+        # urls can't be fingerprinted without downloading them, they are re-parsed
+        if validators.url(alert_source) is True:
+            alerts = self.parser.parse(alert_source, providers_file)
+            cached = self.alerts_cache.get(alert_source)
+            # release the previous parse's providers (after the new parse acquired them)
+            if cached:
+                self._dispose_alerts(cached[2])
+            self.alerts_cache[alert_source] = (None, None, alerts)
+            return alerts
+
+        fingerprint = self._get_alerts_fingerprint(alert_source, providers_file)
+        cached = self.alerts_cache.get(alert_source)
+        if cached and cached[0] == fingerprint:
+            self.alerts_cache_hits += 1
+            return cached[2]
+
+        # the file was touched, check if its content actually changed
+        content_hash = self._get_alerts_content_hash(alert_source, providers_file)
+        if cached and cached[1] == content_hash:
+            self.alerts_cache_hits += 1
+            self.alerts_cache[alert_source] = (fingerprint, content_hash, cached[2])
+            return cached[2]
+
+        self.alerts_cache_misses += 1
+        alerts = self.parser.parse(alert_source, providers_file)
+        if cached:
+            self.logger.info(f"Alert file {alert_source} changed, re-parsed it")
+            self._dispose_alerts(cached[2])
+        self.alerts_cache[alert_source] = (fingerprint, content_hash, alerts)
+        return alerts
+
+    def _evict_alerts_cache(self, alert_sources: typing.Iterable[str]):
+        """
+        Remove alert files that no longer exist from the cache.
+        """
+        for alert_source in list(self.alerts_cache.keys()):
+            if alert_source not in alert_sources:
+                self.logger.info(f"Alert file {alert_source} removed")
+                _, _, alerts = self.alerts_cache.pop(alert_source)
+                self._dispose_alerts(alerts)
+
+    def _dispose_alerts(self, alerts: list[Alert]):
+        # providers are shared, they are disposed only when no other alert uses them
+        for alert in alerts:
+            for step in alert.alert_steps:
+                self.parser.providers_registry.release(step.provider)
+            for action in alert.alert_actions:
+                self.parser.providers_registry.release(action.provider)
+
+    def dispose(self):
+        """
+        Dispose the cached alerts, the providers (connections) they use are disposed if no one else uses them.
+        """
+        for _, _, alerts in self.alerts_cache.values():
+            self._dispose_alerts(alerts)
+        self.alerts_cache = {}
+
+    @staticmethod
+    def shutdown():
+        """
+        Dispose all the providers and close the shared HTTP client and event loop, when the process exits.
+        """
+        ProvidersRegistry.get_instance().dispose()
+        HttpClient.get_instance().close()
+        EventLoop.get_instance().close()
+
+    def _run(
+        self,
+        alert_path: str | tuple[str],
+        providers_file: str = None,
+        workers: int = 1,
+    ):
         alerts = self.get_alerts(alert_path, providers_file)
-        errors = self._run_alerts(alerts)
+        self._log_stats()
+        errors = self._run_alerts(alerts, workers=workers)
         return errors
 
+    def _log_stats(self):
+        self.logger.info(
+            "Alerts cache stats",
+            extra={
+                "alerts_cache_hits": self.alerts_cache_hits,
+                "alerts_cache_misses": self.alerts_cache_misses,
+            },
+        )
+        self.logger.info(
+            "Providers stats", extra=self.parser.providers_registry.get_stats()
+        )
+        self.logger.info("HTTP stats", extra=HttpClient.get_instance().get_stats())
+        self.logger.info("Query coalescing stats", extra=self.query_coalescing_stats)
+        if self.scheduler:
+            self.logger.info("Schedule stats", extra=self.scheduler.get_stats())
+
+    async def _run_scheduled(
+        self,
+        alerts_path: str | tuple[str],
+        providers_file: str = None,
+        interval: int = 0,
+        workers: int = 1,
+    ):
+        """
+        Run every alert on its own schedule (see AlertScheduler), until cancelled.
+
+        The alerts are reloaded every KEEP_ALERTS_RELOAD_INTERVAL seconds (new, changed and removed alert files).
+
+        Args:
+            alerts_path (str | tuple[str]): An alert yaml, a directory of alert yamls or alert urls.
+            providers_file (str, optional): The path to the providers yaml. Defaults to None.
+            interval (int, optional): The schedule of alerts without one (0 runs them once). Defaults to 0.
+            workers (int, optional): How many alerts to run concurrently. Defaults to 1.
+        """
+        default_schedule = None
+        if interval > 0:
+            default_schedule = AlertSchedule(
+                interval=interval,
+                jitter=StateRetention.convert_to_seconds(
+                    os.environ.get("KEEP_SCHEDULE_JITTER", 0)
+                ),
+            )
+        reload_interval = StateRetention.convert_to_seconds(
+            os.environ.get("KEEP_ALERTS_RELOAD_INTERVAL", 10)
+        )
+        self.scheduler = AlertScheduler(default_schedule)
+        main_context_manager = ContextManager.get_instance()
+        semaphore = asyncio.Semaphore(workers)
+        running_alerts = set()
+        reload_at = 0
+        try:
+            while True:
+                now = time.time()
+                if now >= reload_at:
+                    alerts = await asyncio.to_thread(
+                        self.get_alerts, alerts_path, providers_file
+                    )
+                    self.scheduler.update(alerts, now)
+                    self._log_stats()
+                    reload_at = now + reload_interval
+                # the alerts that are due together are a tick (the tasks copy the current context)
+                self._start_tick()
+                for scheduled_alert in self.scheduler.pop_due(now):
+                    task = asyncio.ensure_future(
+                        self._run_scheduled_alert(
+                            scheduled_alert, semaphore, main_context_manager
+                        )
+                    )
+                    running_alerts.add(task)
+                    task.add_done_callback(running_alerts.discard)
+                next_run_at = self.scheduler.get_next_run_at()
+                wake_at = min(next_run_at or reload_at, reload_at)
+                await asyncio.sleep(max(wake_at - time.time(), 0))
+        finally:
+            for task in running_alerts:
+                task.cancel()
+
+    async def _run_scheduled_alert(
+        self,
+        scheduled_alert: ScheduledAlert,
+        semaphore: asyncio.Semaphore,
+        main_context_manager: ContextManager,
+    ):
+        alert = scheduled_alert.alert
+        try:
+            async with semaphore:
+                lag = self.scheduler.started(scheduled_alert, time.time())
+                self.logger.info(
+                    f"Running scheduled alert {alert.alert_id}",
+                    extra={"schedule_lag": lag},
+                )
+                await self._run_alert_isolated(alert, main_context_manager)
+        except Exception:
+            # already logged, the other alerts keep running on their schedules
+            pass
+        finally:
+            self.scheduler.finished(scheduled_alert)
+
     def _get_alerts_from_directory(
         self, alerts_dir: str, providers_file: str = None
     ) -> list[Alert]:
@@ -82,47 +326,107 @@ class AlertManager:
             providers_file (str, optional): The path to the providers yaml. Defaults to None.
         """
         alerts = []
+        alert_sources = []
         for file in os.listdir(alerts_dir):
             if file.endswith(".yaml") or file.endswith(".yml"):
                 self.logger.info(f"Getting alerts from {file}")
+                alert_source = os.path.join(alerts_dir, file)
+                alert_sources.append(alert_source)
                 try:
-                    alerts.extend(
-                        self.parser.parse(
-                            os.path.join(alerts_dir, file), providers_file
-                        )
-                    )
+                    alerts.extend(self._get_cached_alerts(alert_source, providers_file))
                     self.logger.info(f"Alert from {file} fetched successfully")
                 except Exception as e:
                     self.logger.error(
                         f"Error parsing alert from {file}", extra={"exception": e}
                     )
+        self._evict_alerts_cache(alert_sources)
         return alerts
 
-    def _run_alerts(self, alerts: typing.List[Alert]):
+    def _run_alerts(self, alerts: typing.List[Alert], workers: int = 1):
+        # the alerts run on the (long-lived) event loop, shared by all the runs
+        return EventLoop.get_instance().run(self._run_alerts_async(alerts, workers))
+
+    def _start_tick(self):
+        """
+        Start coalescing the queries of the alerts that run from now on (in the current context).
+        """
+        if self.query_coalescing:
+            query_coalescer_var.set(QueryCoalescer(self.query_coalescing_stats))
+
+    async def _run_alerts_async(self, alerts: typing.List[Alert], workers: int = 1):
+        self._start_tick()
+        if workers > 1 and len(alerts) > 1:
+            return await self._run_alerts_concurrently(alerts, workers)
         alerts_errors = []
         for alert in alerts:
-            # otherwise any(errors) might throw an exception
-            errors = []
-            self.logger.info(f"Running alert {alert.alert_id}")
-            try:
-                errors = alert.run()
-            except Exception as e:
-                self.logger.error(
-                    f"Error running alert {alert.alert_id}", extra={"exception": e}
-                )
-                raise
-            if any(errors):
-                self.logger.info(msg=f"Alert {alert.alert_id} ran with errors")
-            else:
-                self.logger.info(f"Alert {alert.alert_id} ran successfully")
-            alerts_errors.extend(errors)
+            alerts_errors.extend(await self._run_alert(alert))
         return alerts_errors
 
+    async def _run_alerts_concurrently(self, alerts: typing.List[Alert], workers: int):
+        """
+        Run the alerts as event loop tasks, every alert with its own context manager.
+
+        Args:
+            alerts (typing.List[Alert]): The alerts to run.
+            workers (int): The maximum number of alerts running at the same time.
+
+        Returns:
+            list: The errors of all the alerts (in the alerts order).
+        """
+        self.logger.info(
+            f"Running {len(alerts)} alerts concurrently", extra={"workers": workers}
+        )
+        main_context_manager = ContextManager.get_instance()
+        semaphore = asyncio.Semaphore(workers)
+
+        async def run_alert(alert: Alert):
+            async with semaphore:
+                return await self._run_alert_isolated(alert, main_context_manager)
+
+        alerts_errors = []
+        # like a thread pool, all the alerts run even if one of them fails
+        results = await asyncio.gather(
+            *(run_alert(alert) for alert in alerts), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+            alerts_errors.extend(result)
+        return alerts_errors
+
+    async def _run_alert_isolated(
+        self, alert: Alert, main_context_manager: ContextManager
+    ):
+        # steps/actions/foreach/aliases are per alert, providers are shared by all the alerts
+        with ContextManager.use_instance(
+            f"alert:{alert.alert_source}:{alert.alert_id}"
+        ) as context_manager:
+            context_manager.providers_context = main_context_manager.providers_context
+            context_manager.click_context = main_context_manager.click_context
+            return await self._run_alert(alert)
+
+    async def _run_alert(self, alert: Alert) -> list:
+        # otherwise any(errors) might throw an exception
+        errors = []
+        self.logger.info(f"Running alert {alert.alert_id}")
+        try:
+            errors = await alert.run()
+        except Exception as e:
+            self.logger.error(
+                f"Error running alert {alert.alert_id}", extra={"exception": e}
+            )
+            raise
+        if any(errors):
+            self.logger.info(msg=f"Alert {alert.alert_id} ran with errors")
+        else:
+            self.logger.info(f"Alert {alert.alert_id} ran successfully")
+        return errors
+
     def run_step(self, alert_id: str, step: str):
         self.logger.info(f"Running step {step} of alert {alert.alert_id}")
         try:
             alert = self.get_alerts(alert_id)
-            alert.run_step(step)
+            EventLoop.get_instance().run(alert.run_step(step))
         except Exception as e:
             self.logger.error(
                 f"Error running step {step} of alert {alert.alert_id}",
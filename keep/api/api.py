@@ -76,11 +76,7 @@ def get_app(multi_tenant: bool = False) -> FastAPI:
 
 
 def run(app: FastAPI):
-    # https://stackoverflow.com/questions/46827007/runtimeerror-this-event-loop-is-already-running-in-python
-    # Shahar: I hate it but that's seem the only workaround..
-    import nest_asyncio
-
-    nest_asyncio.apply()
+    # alerts run on their own event loop (see EventLoop), so the server loop is never re-entered
     uvicorn.run(
         app,
         host="0.0.0.0",
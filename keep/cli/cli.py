@@ -10,7 +10,9 @@ from dotenv import find_dotenv, load_dotenv
 
 from keep.alertmanager.alertmanager import AlertManager
 from keep.cli.click_extensions import NotRequiredIf
+from keep.contextmanager.contextmanager import ContextManager
 from keep.providers.providers_factory import ProvidersFactory
+from keep.statestore.statestore import StateRetention
 
 load_dotenv(find_dotenv())
 logging_config = {
@@ -161,10 +163,18 @@ def api(
     "--interval",
     "-i",
     type=int,
-    help="When interval is set, Keep will run the alert every INTERVAL seconds",
+    help="When interval is set, Keep will run the alerts without a schedule every INTERVAL seconds",
     required=False,
     default=0,
 )
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    help="The number of alerts Keep will run concurrently",
+    required=False,
+    default=1,
+)
 @click.option(
     "--providers-file",
     "-p",
@@ -186,6 +196,7 @@ def run(
     alerts_directory: str,
     alert_url: list[str],
     interval: int,
+    workers: int,
     providers_file,
     api_key,
     api_url,
@@ -195,13 +206,19 @@ def run(
     alert_manager = AlertManager()
     try:
         alert_manager.run(
-            alerts_directory or alert_url, providers_file, interval=interval
+            alerts_directory or alert_url,
+            providers_file,
+            interval=interval,
+            workers=workers,
         )
     except Exception as e:
         logger.error(f"Error running alert {alerts_directory or alert_url}: {e}")
         if info.verbose:
             raise e
         sys.exit(1)
+    finally:
+        # close the providers connections on shutdown
+        AlertManager.shutdown()
     logger.debug(f"Alert in {alerts_directory or alert_url} ran successfully")
 
 
@@ -292,5 +309,66 @@ def provider(info: Info, provider_type, provider_id, provider_config_file):
     click.echo(click.style(f"Config file created at {provider_config_file}", bold=True))
 
 
+@cli.group()
+def state():
+    """Manage keep's state."""
+    pass
+
+
+@state.command()
+@click.option(
+    "--max-runs",
+    type=int,
+    help="Keep only the last MAX_RUNS runs of every alert",
+    required=False,
+)
+@click.option(
+    "--max-age",
+    help="Keep only runs newer than MAX_AGE (e.g. 3600, 12h, 7d)",
+    required=False,
+)
+@click.option(
+    "--max-context-runs",
+    type=int,
+    help="Drop the steps/actions context of all but the last MAX_CONTEXT_RUNS runs of every alert",
+    required=False,
+)
+@click.option(
+    "--alert-id",
+    "-a",
+    help="Compact only the given alert(s)",
+    multiple=True,
+    required=False,
+)
+@pass_info
+def compact(
+    info: Info,
+    max_runs: int,
+    max_age: str,
+    max_context_runs: int,
+    alert_id: list[str],
+):
+    """Apply retention on the state (defaults to KEEP_STATE_MAX_RUNS, KEEP_STATE_MAX_AGE and KEEP_STATE_MAX_CONTEXT_RUNS)."""
+    retention = StateRetention.from_env().merge(
+        StateRetention.from_config(
+            {
+                "max_runs": max_runs,
+                "max_age": max_age,
+                "max_context_runs": max_context_runs,
+            }
+        )
+    )
+    if retention.is_empty():
+        raise click.UsageError(
+            "At least one of --max-runs, --max-age or --max-context-runs is required"
+        )
+    state_store = ContextManager.get_instance().state
+    if alert_id:
+        compacted = sum(state_store.compact(_id, retention) for _id in alert_id)
+    else:
+        compacted = state_store.compact_all(retention)
+    click.echo(click.style(f"Compacted {compacted} alert runs", bold=True))
+
+
 if __name__ == "__main__":
     cli(auto_envvar_prefix="KEEP")
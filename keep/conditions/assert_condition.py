@@ -21,6 +21,9 @@ class AssertCondition(BaseCondition):
             compare_value (_type_): the actual value
 
         """
+        # a single {{ expression }} is rendered to its native value (e.g. a bool), assert its string as before
+        if not isinstance(compare_value, str):
+            compare_value = str(compare_value)
         try:
             self.logger.debug(f"Asserting {compare_value}")
             # we need to encode/decode the string to make sure eval
@@ -44,5 +47,5 @@ class AssertCondition(BaseCondition):
             _type_: _description_
         """
         compare_value = self.condition_config.get("assert")
-        compare_value = self.io_handler.render(compare_value)
+        compare_value = self.render(compare_value)
         return compare_value
@@ -6,6 +6,7 @@ import logging
 
 from keep.contextmanager.contextmanager import ContextManager
 from keep.iohandler.iohandler import IOHandler
+from keep.providers.base.results_stream import ResultsStream
 
 
 class BaseCondition(metaclass=abc.ABCMeta):
@@ -47,7 +48,7 @@ class BaseCondition(metaclass=abc.ABCMeta):
             _type_: _description_
         """
         compare_to = self.condition_config.get("compare_to")
-        compare_to = self.io_handler.render(compare_to)
+        compare_to = self.render(compare_to)
         return compare_to
 
     def get_compare_value(self):
@@ -60,5 +61,19 @@ class BaseCondition(metaclass=abc.ABCMeta):
             _type_: _description_
         """
         compare_value = self.condition_config.get("value")
-        compare_value = self.io_handler.render(compare_value)
+        compare_value = self.render(compare_value)
         return compare_value
+
+    def render(self, template):
+        """Render a condition value.
+
+        Raises:
+            ValueError: If the value is streamed results, which would be compared as an object rather than by its rows.
+        """
+        value = self.io_handler.render(template)
+        if isinstance(value, ResultsStream):
+            raise ValueError(
+                f"Condition {self.condition_name} can't compare streamed results (stream: true), "
+                "remove stream from the step or iterate over its results with foreach"
+            )
+        return value
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 import chevron
 
 from keep.conditions.base_condition import BaseCondition
@@ -64,6 +66,9 @@ class ThresholdCondition(BaseCondition):
             compare_value (_type_): the actual value
 
         """
+        # native numbers (e.g. rendered from a single {{ expression }}) don't need to be parsed
+        if self._is_number(compare_to) and self._is_number(compare_value):
+            return float(compare_to), float(compare_value)
         # check if compare_to is a number (supports also float, hence the . replace)
         if (
             str(compare_to).replace(".", "", 1).isdigit()
@@ -104,6 +109,9 @@ class ThresholdCondition(BaseCondition):
 
         return self._apply_threshold(compare_value, compare_to)
 
+    def _is_number(self, a):
+        return isinstance(a, (int, float, Decimal)) and not isinstance(a, bool)
+
     def _is_percentage(self, a):
         if isinstance(a, int) or isinstance(a, float):
             return False
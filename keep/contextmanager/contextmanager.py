@@ -1,12 +1,40 @@
-import json
+import asyncio
+import collections
+import contextlib
+import contextvars
+import datetime
 import logging
 import os
+import threading
+import typing
 
 import click
 from starlette_context import context
 
+from keep.providers.base.results_stream import ResultsStream
+from keep.statestore.statestore import BaseStateStore, StateRetention
+from keep.statestore.statestorefactory import StateStoreFactory
+
+# selects the context manager of the current execution context (e.g. a context manager per alert when alerts run concurrently)
+context_manager_id_var: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "context_manager_id", default=None
+)
+
+# the foreach context and the conditions aliases of the current foreach item (when foreach items run concurrently)
+foreach_scope_var: contextvars.ContextVar[dict] = contextvars.ContextVar(
+    "foreach_scope", default=None
+)
+
+# {{ watermark }} of the step whose parameters are rendered (see Step._render_provider_parameters)
+watermark_var: contextvars.ContextVar = contextvars.ContextVar(
+    "watermark", default=None
+)
+
 
 def get_context_manager_id():
+    context_manager_id = context_manager_id_var.get()
+    if context_manager_id:
+        return context_manager_id
     try:
         # If we are running as part of FastAPI, we need context_manager per request
         request_id = context.data["X-Request-ID"]
@@ -18,36 +46,74 @@ def get_context_manager_id():
 class ContextManager:
     STATE_FILE = "keepstate.json"
     __instances = {}
+    __instances_lock = threading.RLock()
+    # state stores are shared by all the context managers (e.g. API requests) of the process
+    __state_stores = {}
+    __state_stores_lock = threading.Lock()
 
     # https://stackoverflow.com/questions/36286894/name-not-defined-in-type-annotation
     @staticmethod
     def get_instance() -> "ContextManager":
         context_manager_id = get_context_manager_id()
-        if context_manager_id not in ContextManager.__instances:
-            ContextManager.__instances[context_manager_id] = ContextManager()
-        return ContextManager.__instances[context_manager_id]
+        with ContextManager.__instances_lock:
+            if context_manager_id not in ContextManager.__instances:
+                ContextManager.__instances[context_manager_id] = ContextManager()
+            return ContextManager.__instances[context_manager_id]
 
     @staticmethod
     def delete_instance():
         context_manager_id = get_context_manager_id()
-        if context_manager_id in ContextManager.__instances:
-            del ContextManager.__instances[context_manager_id]
+        with ContextManager.__instances_lock:
+            if context_manager_id in ContextManager.__instances:
+                del ContextManager.__instances[context_manager_id]
+
+    @staticmethod
+    @contextlib.contextmanager
+    def use_instance(context_manager_id: str):
+        """
+        Use the context manager with the given id (created if needed) for everything that runs within the block (in the current thread/task).
+
+        Args:
+            context_manager_id (str): The context manager id (e.g. an alert id).
+
+        Yields:
+            ContextManager: The selected context manager.
+        """
+        token = context_manager_id_var.set(context_manager_id)
+        try:
+            yield ContextManager.get_instance()
+        finally:
+            context_manager_id_var.reset(token)
 
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         context_manager_id = get_context_manager_id()
-        if context_manager_id in ContextManager.__instances:
-            raise Exception(
-                "Singleton class is a singleton class and cannot be instantiated more than once."
-            )
-        else:
-            ContextManager.__instances[context_manager_id] = self
+        with ContextManager.__instances_lock:
+            if context_manager_id in ContextManager.__instances:
+                raise Exception(
+                    "Singleton class is a singleton class and cannot be instantiated more than once."
+                )
+            else:
+                ContextManager.__instances[context_manager_id] = self
 
         self.state_file = os.environ.get("KEEP_STATE_FILE") or self.STATE_FILE
         self.steps_context = {}
         self.actions_context = {}
         self.providers_context = {}
         self.alert_context = {}
+        # guards the steps/actions context when steps or foreach items run concurrently
+        self._lock = threading.RLock()
+        # streamed step results, closed (releasing their connections) when the alert finishes
+        self.results_streams = []
+        # step id -> the results (future) of a query started before the step ran (see Alert.submit_queries)
+        #             and the rendered parameters it was started with
+        self.submitted_queries = {}
+        # step id -> the watermark of the step's results, kept if the alert run succeeds (see commit_run_state)
+        self.pending_watermarks = {}
+        # state key -> value set by providers (e.g. read offsets), kept if the alert run succeeds as well
+        self.pending_state_values = {}
+        # when the current alert run started (UTC), see Alert.run
+        self.run_started_at: datetime.datetime = None
         self.foreach_context = {
             "value": None,
         }
@@ -56,14 +122,117 @@ class ContextManager:
         except RuntimeError:
             self.click_context = {}
         self.aliases = {}
-        self.state = {}
         # dependencies are used so iohandler will be able to use the output class of the providers
         # e.g. let's say bigquery_provider results are google.cloud.bigquery.Row
         #     and we want to use it in iohandler, we need to import it before the eval
         self.dependencies = set()
-        self.__load_state()
+        self.state = self.__get_state_store(self.state_file)
+
+    @staticmethod
+    def __get_state_store(state_file: str) -> BaseStateStore:
+        with ContextManager.__state_stores_lock:
+            if state_file not in ContextManager.__state_stores:
+                ContextManager.__state_stores[
+                    state_file
+                ] = StateStoreFactory.get_state_store(state_file)
+            return ContextManager.__state_stores[state_file]
+
+    @property
+    def foreach_context(self) -> dict:
+        foreach_scope = foreach_scope_var.get()
+        if foreach_scope is not None:
+            return foreach_scope["foreach"]
+        return self._foreach_context
+
+    @foreach_context.setter
+    def foreach_context(self, foreach_context: dict):
+        self._foreach_context = foreach_context
+
+    @property
+    def aliases(self) -> dict:
+        foreach_scope = foreach_scope_var.get()
+        if foreach_scope is not None:
+            return foreach_scope["aliases"]
+        return self._aliases
+
+    @aliases.setter
+    def aliases(self, aliases: dict):
+        self._aliases = aliases
+
+    @contextlib.contextmanager
+    def foreach_scope(self):
+        """
+        Give everything that runs within the block (in the current thread/task) its own foreach context and aliases.
+        """
+        token = foreach_scope_var.set(
+            {"foreach": {"value": None}, "aliases": dict(self.aliases)}
+        )
+        try:
+            yield
+        finally:
+            foreach_scope_var.reset(token)
+
+    async def run_foreach(
+        self,
+        items: typing.Iterable,
+        func: typing.Callable[[], typing.Awaitable],
+        concurrency: int,
+    ) -> list:
+        """
+        Run func for every foreach item, up to concurrency items at the same time.
+
+        Args:
+            items (typing.Iterable): The foreach items ({{ foreach.value }} when func runs).
+            func (typing.Callable[[], typing.Awaitable]): The coroutine function to run for every item.
+            concurrency (int): The maximum number of items running at the same time.
+
+        Returns:
+            list: The results of func, in the items order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_item(item):
+            async with semaphore:
+                with self.foreach_scope():
+                    self.set_for_each_context(item)
+                    return await func()
+
+        results = []
+        tasks = collections.deque()
+        try:
+            async for item in self.iterate_foreach(items):
+                # items are taken only as they are processed, so streamed results aren't read ahead
+                if len(tasks) >= concurrency * 2:
+                    results.append(await tasks.popleft())
+                # every item runs in a task (a copy of the current context), so it uses this context manager
+                tasks.append(asyncio.ensure_future(run_item(item)))
+            while tasks:
+                results.append(await tasks.popleft())
+        finally:
+            # an item failed, wait for the running items
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        return results
+
+    @staticmethod
+    async def iterate_foreach(items: typing.Iterable) -> typing.AsyncIterator:
+        """
+        Iterate over foreach items on the event loop.
+
+        Streamed results fetch their chunks from the provider (blocking), so the chunks are fetched in a thread.
+        """
+        if not isinstance(items, ResultsStream):
+            for item in items:
+                yield item
+            return
+        chunks = iter(items).chunks()
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            for item in chunk:
+                yield item
 
-    # TODO - If we want to support multiple alerts at once we need to change this
     def set_alert_context(self, alert_context):
         self.alert_context = alert_context
 
@@ -96,6 +265,7 @@ class ContextManager:
             "steps": self.steps_context,
             "actions": self.actions_context,
             "foreach": self.foreach_context,
+            "watermark": watermark_var.get(),
             "env": os.environ,
         }
 
@@ -131,24 +301,25 @@ class ContextManager:
             condition_alias (_type_, optional): _description_. Defaults to None.
             value (_type_): the raw value which the condition was compared to. this is relevant only for foreach conditions
         """
-        if action_id not in self.actions_context:
-            self.actions_context[action_id] = {"conditions": {}, "results": {}}
-        if "conditions" not in self.actions_context[action_id]:
-            self.actions_context[action_id]["conditions"] = {condition_name: []}
-        if condition_name not in self.actions_context[action_id]["conditions"]:
-            self.actions_context[action_id]["conditions"][condition_name] = []
+        with self._lock:
+            if action_id not in self.actions_context:
+                self.actions_context[action_id] = {"conditions": {}, "results": {}}
+            if "conditions" not in self.actions_context[action_id]:
+                self.actions_context[action_id]["conditions"] = {condition_name: []}
+            if condition_name not in self.actions_context[action_id]["conditions"]:
+                self.actions_context[action_id]["conditions"][condition_name] = []
 
-        self.actions_context[action_id]["conditions"][condition_name].append(
-            {
-                "value": value,
-                "compare_value": compare_value,
-                "compare_to": compare_to,
-                "result": result,
-                "type": condition_type,
-                "alias": condition_alias,
-                **kwargs,
-            }
-        )
+            self.actions_context[action_id]["conditions"][condition_name].append(
+                {
+                    "value": value,
+                    "compare_value": compare_value,
+                    "compare_to": compare_to,
+                    "result": result,
+                    "type": condition_type,
+                    "alias": condition_alias,
+                    **kwargs,
+                }
+            )
         # update the current for each context
         self.foreach_context.update(
             {"compare_value": compare_value, "compare_to": compare_to, **kwargs}
@@ -157,49 +328,129 @@ class ContextManager:
             self.aliases[condition_alias] = result
 
     def set_step_provider_paremeters(self, step_id, provider_parameters):
-        if step_id not in self.steps_context:
-            self.steps_context[step_id] = {"provider_parameters": {}, "results": []}
-        self.steps_context[step_id]["provider_parameters"] = provider_parameters
+        with self._lock:
+            if step_id not in self.steps_context:
+                self.steps_context[step_id] = {"provider_parameters": {}, "results": []}
+            self.steps_context[step_id]["provider_parameters"] = provider_parameters
 
     def set_step_context(self, step_id, results, foreach=False):
-        if step_id not in self.steps_context:
-            self.steps_context[step_id] = {"provider_parameters": {}, "results": []}
-
-        # If this is a foreach step, we need to append the results to the list
-        # so we can iterate over them
-        if foreach:
-            self.steps_context[step_id]["results"].append(results)
-        else:
-            self.steps_context[step_id]["results"] = results
-        # this is an alias to the current step output
-        self.steps_context["this"] = self.steps_context[step_id]
-
-    def __load_state(self):
-        if self.state_file:
-            # TODO - SQLite
-            try:
-                with open(self.state_file, "r") as f:
-                    self.state = json.load(f)
-            except Exception:
-                self.logger.warning("Failed to load state file, using empty state")
-                self.state = {}
+        with self._lock:
+            if step_id not in self.steps_context:
+                self.steps_context[step_id] = {"provider_parameters": {}, "results": []}
+
+            if isinstance(results, ResultsStream):
+                self.results_streams.append(results)
+            # If this is a foreach step, we need to append the results to the list
+            # so we can iterate over them
+            if foreach:
+                self.steps_context[step_id]["results"].append(results)
+            else:
+                self.steps_context[step_id]["results"] = results
+            # this is an alias to the current step output
+            self.steps_context["this"] = self.steps_context[step_id]
+
+    def close_results_streams(self):
+        """
+        Close the streamed step results that weren't fully consumed.
+        """
+        with self._lock:
+            results_streams, self.results_streams = self.results_streams, []
+        for results_stream in results_streams:
+            results_stream.close()
+
+    def set_submitted_query(self, step_id, submitted_query, provider_parameters: dict):
+        with self._lock:
+            self.submitted_queries[step_id] = (submitted_query, provider_parameters)
+
+    def pop_submitted_query(self, step_id) -> tuple:
+        """
+        Returns:
+            tuple: The submitted query and its rendered parameters, (None, None) if no query was submitted.
+        """
+        with self._lock:
+            return self.submitted_queries.pop(step_id, (None, None))
+
+    def cancel_submitted_queries(self):
+        """
+        Cancel the submitted queries whose steps didn't run (e.g. a previous step failed).
+        """
+        with self._lock:
+            submitted_queries, self.submitted_queries = self.submitted_queries, {}
+        for submitted_query, _ in submitted_queries.values():
+            submitted_query.cancel()
+
+    @contextlib.contextmanager
+    def watermark_scope(self, watermark):
+        """
+        Set {{ watermark }} for everything that's rendered within the block (in the current thread/task).
+        """
+        token = watermark_var.set(watermark)
+        try:
+            yield
+        finally:
+            watermark_var.reset(token)
+
+    def get_watermark(self, step_id):
+        return self.state.get_value(self.get_alert_id(), f"watermark:{step_id}")
+
+    def set_pending_watermark(self, step_id, watermark):
+        with self._lock:
+            previous_watermark = self.pending_watermarks.get(step_id)
+            # e.g. a foreach step, keep the highest watermark of its runs
+            if previous_watermark is not None:
+                try:
+                    watermark = max(previous_watermark, watermark)
+                except TypeError:
+                    pass
+            self.pending_watermarks[step_id] = watermark
+
+    def get_state_value(self, key, default=None):
+        """
+        Get a value the current alert kept in the state store (see set_pending_state_value).
+        """
+        return self.state.get_value(self.get_alert_id(), key, default)
+
+    def set_pending_state_value(self, key, value):
+        """
+        Set a value of the current alert, kept in the state store if the alert run succeeds.
+        """
+        with self._lock:
+            self.pending_state_values[key] = value
+
+    def commit_run_state(self):
+        """
+        Keep the watermarks of the steps (and the pending state values) after a successful run,
+            so the next run continues from them.
+        """
+        with self._lock:
+            pending_watermarks, self.pending_watermarks = self.pending_watermarks, {}
+            pending_state_values, self.pending_state_values = (
+                self.pending_state_values,
+                {},
+            )
+        for step_id, watermark in pending_watermarks.items():
+            self.state.set_value(self.get_alert_id(), f"watermark:{step_id}", watermark)
+        for key, value in pending_state_values.items():
+            self.state.set_value(self.get_alert_id(), key, value)
+
+    def discard_run_state(self):
+        with self._lock:
+            self.pending_watermarks = {}
+            self.pending_state_values = {}
 
     def get_last_alert_run(self, alert_id):
-        if alert_id in self.state:
-            return self.state[alert_id][-1]
-        # no previous runs
-        else:
-            return {}
-
-    def set_last_alert_run(self, alert_id, alert_context, alert_status):
-        # TODO - SQLite
-        if alert_id not in self.state:
-            self.state[alert_id] = []
-        self.state[alert_id].append(
+        return self.state.get_last_alert_run(alert_id)
+
+    def set_last_alert_run(
+        self, alert_id, alert_context, alert_status, retention: StateRetention = None
+    ):
+        # the alert's retention overrides the global (KEEP_STATE_*) retention
+        retention = StateRetention.from_env().merge(retention)
+        self.state.set_last_alert_run(
+            alert_id,
             {
                 "alert_status": alert_status,
                 "alert_context": alert_context,
-            }
+            },
+            retention=retention if not retention.is_empty() else None,
         )
-        with open(self.state_file, "w") as f:
-            json.dump(self.state, f, default=str)
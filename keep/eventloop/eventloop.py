@@ -0,0 +1,102 @@
+"""
+The event loop alerts, steps and actions run on.
+"""
+import asyncio
+import logging
+import os
+import threading
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+T = typing.TypeVar("T")
+
+
+class EventLoop:
+    """
+    A single long-lived asyncio event loop, running in a background thread.
+
+    Alerts run as tasks on the loop, so many I/O-bound checks are multiplexed without a thread per alert.
+        Providers that implement async _query/notify are awaited on the loop, sync providers run in
+        the loop's thread pool (KEEP_SYNC_WORKERS threads, see BaseProvider.query_async).
+
+    Sync code (the CLI, the API, tests) runs coroutines on the loop with run().
+    """
+
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    @staticmethod
+    def get_instance() -> "EventLoop":
+        with EventLoop.__instance_lock:
+            if EventLoop.__instance is None or EventLoop.__instance.closed:
+                EventLoop.__instance = EventLoop(
+                    sync_workers=int(os.environ.get("KEEP_SYNC_WORKERS", 32))
+                )
+            return EventLoop.__instance
+
+    def __init__(self, sync_workers: int = 32):
+        """
+        Args:
+            sync_workers (int, optional): The number of threads sync providers run in.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.closed = False
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(
+            max_workers=sync_workers, thread_name_prefix="keep-sync"
+        )
+        # used by asyncio.to_thread (and run_in_executor(None, ...))
+        self.loop.set_default_executor(self.executor)
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="keep-event-loop", daemon=True
+        )
+        self._thread.start()
+
+    def run(self, coroutine: typing.Awaitable[T], timeout: float = None) -> T:
+        """
+        Run a coroutine on the loop and wait for its result.
+
+        The coroutine runs in a copy of the caller's context (e.g. the selected context manager).
+
+        Args:
+            coroutine (Awaitable): The coroutine to run.
+            timeout (float, optional): Seconds to wait for the result.
+
+        Returns:
+            The coroutine result (or raises its exception).
+        """
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError(
+                "EventLoop.run() can't be called from the event loop, await the coroutine instead"
+            )
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # e.g. KeyboardInterrupt or a timeout, don't leave the coroutine running
+            future.cancel()
+            raise
+
+    def close(self):
+        """
+        Cancel the running tasks (e.g. scheduled alerts), then stop the loop and its thread pool.
+        """
+        with EventLoop.__instance_lock:
+            if self.closed:
+                return
+            self.closed = True
+        asyncio.run_coroutine_threadsafe(self.__cancel_tasks(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __cancel_tasks(self):
+        tasks = [
+            task for task in asyncio.all_tasks() if task is not asyncio.current_task()
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.loop.shutdown_asyncgens()
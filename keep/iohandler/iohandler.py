@@ -1,10 +1,13 @@
 import ast
 import copy
+import dataclasses
 
 # TODO: fix this! It screws up the eval statement if these are not imported
 import datetime
+import functools
 import json
 import logging
+import os
 import re
 from decimal import Decimal
 
@@ -15,15 +18,86 @@ import requests
 import keep.functions as keep_functions
 from keep.contextmanager.contextmanager import ContextManager
 
+# the number of compiled templates (and function calls) to keep in memory
+TEMPLATE_CACHE_SIZE = int(os.environ.get("KEEP_TEMPLATE_CACHE_SIZE", 4096))
+
+# e.g. keep.len(...), supports up to 4 levels of nested parentheses
+FUNCTION_PATTERN = re.compile(
+    r"\bkeep\.\w+\((?:[^()]*|\((?:[^()]*|\((?:[^()]*|\([^()]*\))*\))*\))*\)"
+)
+# a template which is exactly one variable, e.g. {{ steps.this.results.0.0 }} (after [] were changed to .)
+SINGLE_VARIABLE_PATTERN = re.compile(r"^\s*\{\{\s*([^\s{}#^/&!>=.][^\s{}]*)\s*\}\}\s*$")
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledTemplate:
+    """
+    A template that was already validated and tokenized, so rendering it doesn't need to re-parse it.
+
+    Args:
+        template (str): the original template
+        tokens (tuple): chevron tokens (literal segments, variables and sections)
+        literal (str | None): the rendered template, when the template has no {{ expressions }} at all
+        path (tuple | None): the keys to look up in the context, when the template is exactly one {{ expression }}
+        error (str | None): why the template is invalid (raised by IOHandler.render)
+    """
+
+    template: str
+    tokens: tuple
+    literal: str | None = None
+    path: tuple | None = None
+    error: str | None = None
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(template: str) -> CompiledTemplate:
+    error = None
+    # check if inside the mustache is object in the context
+    if template.count("}}") != template.count("{{"):
+        error = f"Invalid template - number of }} and {{ does not match {template}"
+    # TODO - better validate functions
+    elif template.count("(") != template.count(")"):
+        error = f"Invalid template - number of ( and ) does not match {template}"
+    if error:
+        return CompiledTemplate(template=template, tokens=(), error=error)
+
+    # change [] to . for the key because thats what chevron uses
+    _key = template.replace("[", ".").replace("]", "")
+    if "{{" not in _key:
+        return CompiledTemplate(template=template, tokens=(), literal=_key)
+    tokens = tuple(chevron.tokenizer.tokenize(_key, "{{", "}}"))
+    single_variable = SINGLE_VARIABLE_PATTERN.match(_key)
+    path = tuple(single_variable.group(1).split(".")) if single_variable else None
+    return CompiledTemplate(template=template, tokens=tokens, path=path)
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_function_call(token: str) -> ast.Module:
+    """
+    Parse a function call token (e.g. keep.len([1, 2])) to its AST.
+    """
+    try:
+        return ast.parse(token)
+    except SyntaxError as e:
+        if "unterminated string literal" in str(e):
+            # try to HTML escape the string
+            # this is happens when libraries such as datadog api client
+            # HTML escapes the string and then ast.parse fails ()
+            # https://github.com/keephq/keep/issues/137
+            import html
+
+            return ast.parse(html.unescape(token))
+        else:
+            # for strings such as "45%\n", we need to escape
+            return ast.parse(token.encode("unicode_escape"))
+
 
 class IOHandler:
     def __init__(self):
-        self.context_manager = ContextManager.get_instance()
         self.logger = logging.getLogger(self.__class__.__name__)
         # whether Keep should shorten urls in the message or not
         # todo: have a specific parameter for this?
         self.shorten_urls = False
-        self.context_manager = ContextManager.get_instance()
         if (
             self.context_manager.click_context
             and self.context_manager.click_context.params.get("api_key")
@@ -31,23 +105,61 @@ class IOHandler:
         ):
             self.shorten_urls = True
 
+    @property
+    def context_manager(self) -> ContextManager:
+        # resolved on every access - the same handler may render in different (per-alert) contexts
+        return ContextManager.get_instance()
+
     def render(self, template):
+        """Render a template with the alert context.
+
+        A template which is exactly one variable (e.g. "{{ steps.this.results }}") is resolved to the object itself,
+            not HTML escaped by chevron, while "text {{ x }}" is rendered (and escaped) by chevron.
+            Callers that need a string (e.g. render_context) get str() of the object, which isn't escaped.
+
+        Args:
+            template (str): template to render, other types are returned as is
+
+        Returns:
+            any: the rendered template (a str, or the object of a single variable)
+        """
         # rendering is only support for strings
         if not isinstance(template, str):
             return template
-        # check if inside the mustache is object in the context
-        if template.count("}}") != template.count("{{"):
-            raise Exception(
-                f"Invalid template - number of }} and {{ does not match {template}"
-            )
-        # TODO - better validate functions
-        if template.count("(") != template.count(")"):
-            raise Exception(
-                f"Invalid template - number of ( and ) does not match {template}"
-            )
+        compiled_template = compile_template(template)
+        if compiled_template.error:
+            raise Exception(compiled_template.error)
+        # fast path - {{ steps.this.results }} is resolved to the object itself (not its string representation)
+        if compiled_template.path is not None:
+            return self._resolve(compiled_template.path)
         val = self.parse(template)
         return val
 
+    def _resolve(self, path: tuple):
+        """Resolve a variable from the context, the same way chevron resolves it.
+
+        Args:
+            path (tuple): the keys of the variable (e.g. ("steps", "this", "results", "0"))
+
+        Returns:
+            any: the variable value, or an empty string if it doesn't exist (or is None)
+        """
+        scope = self.context_manager.get_full_context()
+        try:
+            for child in path:
+                try:
+                    # Try subscripting (Normal dictionaries)
+                    scope = scope[child]
+                except (TypeError, AttributeError):
+                    try:
+                        scope = getattr(scope, child)
+                    except (TypeError, AttributeError):
+                        # Try as a list
+                        scope = scope[int(child)]
+        except (AttributeError, KeyError, IndexError, ValueError):
+            return ""
+        return "" if scope is None else scope
+
     def parse(self, string):
         """Use AST module to parse 'call stack'-like string and return the result
 
@@ -76,11 +188,10 @@ class IOHandler:
         string = self._render(string)
 
         # Now, extract the token if exists -
-        pattern = (
-            r"\bkeep\.\w+\((?:[^()]*|\((?:[^()]*|\((?:[^()]*|\([^()]*\))*\))*\))*\)"
-        )
         parsed_string = copy.copy(string)
-        matches = re.findall(pattern, parsed_string)
+        if "keep." not in parsed_string:
+            return parsed_string
+        matches = FUNCTION_PATTERN.findall(parsed_string)
         tokens = list(matches)
 
         if len(tokens) == 0:
@@ -145,34 +256,25 @@ class IOHandler:
                 val = getattr(keep_functions, func.attr)(*_args)
                 return val
 
-        try:
-            tree = ast.parse(token)
-        except SyntaxError as e:
-            if "unterminated string literal" in str(e):
-                # try to HTML escape the string
-                # this is happens when libraries such as datadog api client
-                # HTML escapes the string and then ast.parse fails ()
-                # https://github.com/keephq/keep/issues/137
-                import html
-
-                tree = ast.parse(html.unescape(token))
-            else:
-                # for strings such as "45%\n", we need to escape
-                tree = ast.parse(token.encode("unicode_escape"))
+        tree = compile_function_call(token)
         return _parse(self, tree)
 
     def _render(self, key):
-        # change [] to . for the key because thats what chevron uses
-        _key = key.replace("[", ".").replace("]", "")
+        compiled_template = compile_template(key)
+        # nothing to render
+        if compiled_template.literal is not None:
+            return compiled_template.literal
 
         context = self.context_manager.get_full_context()
-        rendered = chevron.render(_key, context)
+        rendered = chevron.render(compiled_template.tokens, context)
 
         return rendered
 
     def render_context(self, context_to_render: dict):
         """
         Iterates the provider context and renders it using the alert context.
+
+        Values are rendered to strings, a single variable value is str() of the object (see render).
         """
         # Don't modify the original context
         context_to_render = copy.deepcopy(context_to_render)
@@ -211,6 +313,9 @@ class IOHandler:
             str: rendered template
         """
         rendered_template = self.render(template)
+        # the provider context is always rendered to strings
+        if not isinstance(rendered_template, str):
+            rendered_template = str(rendered_template)
 
         # shorten urls if enabled
         if self.shorten_urls:
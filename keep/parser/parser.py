@@ -2,6 +2,7 @@ import io
 import json
 import logging
 import os
+import re
 import typing
 
 import requests
@@ -13,14 +14,20 @@ from keep.alert.alert import Alert
 from keep.contextmanager.contextmanager import ContextManager
 from keep.iohandler.iohandler import IOHandler
 from keep.providers.base.base_provider import BaseProvider
-from keep.providers.providers_factory import ProvidersFactory
+from keep.providers.providers_registry import ProvidersRegistry
+from keep.scheduler.scheduler import AlertSchedule
+from keep.statestore.statestore import StateRetention
 from keep.step.step import Step
 
+# e.g. {{ steps.db-no-space.results }} or keep.len({{ steps.this.results }})
+STEP_REFERENCE_PATTERN = re.compile(r"\bsteps\.([\w-]+)")
+
 
 class Parser:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.context_manager = ContextManager.get_instance()
+        self.providers_registry = ProvidersRegistry.get_instance()
         self.io_handler = IOHandler()
 
     def parse(
@@ -99,7 +106,10 @@ class Parser:
         alert_owners = self._parse_owners(alert)
         alert_tags = self._parse_tags(alert)
         alert_steps = self._parse_steps(alert)
+        alert_steps_concurrency = self._parse_steps_concurrency(alert, alert_steps)
         alert_actions = self._parse_actions(alert)
+        alert_state_retention = self._parse_state_retention(alert)
+        alert_schedule = self._parse_schedule(alert)
         alert = Alert(
             alert_id=alert_id,
             alert_source=alert_source,
@@ -107,6 +117,9 @@ class Parser:
             alert_tags=alert_tags,
             alert_steps=alert_steps,
             alert_actions=alert_actions,
+            alert_state_retention=alert_state_retention,
+            alert_steps_concurrency=alert_steps_concurrency,
+            alert_schedule=alert_schedule,
         )
         self.logger.debug("Alert parsed successfully")
         return alert
@@ -196,6 +209,23 @@ class Parser:
         alert_tags = alert.get("tags", [])
         return alert_tags
 
+    def _parse_state_retention(self, alert) -> StateRetention | None:
+        retention_config = alert.get("state", {}).get("retention")
+        if not retention_config:
+            return None
+        return StateRetention.from_config(retention_config)
+
+    def _parse_schedule(self, alert) -> AlertSchedule | None:
+        schedule_config = alert.get("schedule")
+        if not schedule_config:
+            return None
+        return AlertSchedule.from_config(
+            schedule_config,
+            default_jitter=StateRetention.convert_to_seconds(
+                os.environ.get("KEEP_SCHEDULE_JITTER", 0)
+            ),
+        )
+
     def _parse_steps(self, alert) -> typing.List[Step]:
         self.logger.debug("Parsing steps")
         alert_steps = alert.get("steps", [])
@@ -209,11 +239,85 @@ class Parser:
                 step_config=_step,
                 provider=provider,
                 provider_parameters=provider_parameters,
+                dependencies=self._parse_step_dependencies(_step, alerts_steps_parsed),
             )
             alerts_steps_parsed.append(step)
         self.logger.debug("Steps parsed successfully")
         return alerts_steps_parsed
 
+    def _parse_steps_concurrency(self, alert, alert_steps: typing.List[Step]) -> int:
+        """
+        Get how many independent steps of the alert can run at the same time (defaults to 1, i.e. sequential).
+
+        Args:
+            alert (dict): The alert config.
+            alert_steps (typing.List[Step]): The parsed steps.
+
+        Returns:
+            int: The steps concurrency.
+        """
+        steps_concurrency = max(
+            int(
+                alert.get("steps_concurrency")
+                or os.environ.get("KEEP_STEPS_CONCURRENCY", 1)
+            ),
+            1,
+        )
+        # {{ steps.this }} is whatever step finished last, which is well defined only when running sequentially
+        if steps_concurrency > 1 and any(
+            "this" in self._get_step_references(step.step_config)
+            for step in alert_steps
+        ):
+            self.logger.debug(
+                "Alert steps reference steps.this, running them sequentially",
+                extra={"alert_id": alert.get("id")},
+            )
+            return 1
+        return steps_concurrency
+
+    def _get_step_references(self, _step: dict) -> typing.List[str]:
+        # only the templates that are rendered when the step runs (its parameters and foreach)
+        step_templates = json.dumps(
+            [_step.get("provider", {}).get("with"), _step.get("foreach")], default=str
+        )
+        return STEP_REFERENCE_PATTERN.findall(step_templates)
+
+    def _parse_step_dependencies(
+        self, _step: dict, previous_steps: typing.List[Step]
+    ) -> typing.List[str]:
+        """
+        Get the previous steps a step depends on, i.e. the steps it references (e.g. {{ steps.<step_id>.results }}).
+            {{ steps.this }} is the last step that ran, so a step referencing it depends on the step declared before it
+                (and the alert runs its steps sequentially, see _parse_steps_concurrency).
+            foreach steps share the foreach context, so a foreach step depends on the foreach step declared before it.
+
+        Args:
+            _step (dict): The step config.
+            previous_steps (typing.List[Step]): The steps declared before the step.
+
+        Returns:
+            typing.List[str]: The ids of the steps the step depends on.
+        """
+        if not previous_steps:
+            return []
+        previous_step_ids = [step.step_id for step in previous_steps]
+        dependencies = set()
+        for referenced_step_id in self._get_step_references(_step):
+            if referenced_step_id == "this":
+                dependencies.add(previous_step_ids[-1])
+            elif referenced_step_id in previous_step_ids:
+                dependencies.add(referenced_step_id)
+        if _step.get("foreach"):
+            previous_foreach_steps = [step for step in previous_steps if step.foreach]
+            if previous_foreach_steps:
+                dependencies.add(previous_foreach_steps[-1].step_id)
+        # keep the declaration order
+        return [
+            step_id
+            for step_id in dict.fromkeys(previous_step_ids)
+            if step_id in dependencies
+        ]
+
     def _get_step_provider(self, _step: dict) -> dict:
         step_provider = _step.get("provider")
         step_provider_type = step_provider.pop("type")
@@ -224,7 +328,7 @@ class Parser:
         provider_id, provider_config = self._parse_provider_config(
             step_provider_type, step_provider_config
         )
-        provider = ProvidersFactory.get_provider(
+        provider = self.providers_registry.acquire(
             provider_id, step_provider_type, provider_config
         )
         return provider
@@ -241,8 +345,8 @@ class Parser:
             provider_id, provider_config = self._parse_provider_config(
                 provider_type, provider_config
             )
-            provider = ProvidersFactory.get_provider(
-                provider_id, provider_type, provider_config, **provider_context
+            provider = self.providers_registry.acquire(
+                provider_id, provider_type, provider_config
             )
             action = Action(
                 name=name,
@@ -6,7 +6,6 @@ import datetime
 from typing import Optional
 
 import pydantic
-import requests
 
 from keep.providers.base.base_provider import BaseProvider
 from keep.providers.models.provider_config import ProviderConfig
@@ -80,7 +79,7 @@ class AxiomProvider(BaseProvider):
         body = {"startTime": startTime, "endTime": endTime}
 
         # Todo: add support for body parameters (https://axiom.co/docs/restapi/query#request-example)
-        response = requests.post(
+        response = self.http_client.post(
             f"{datasets_api_url}/{dataset}/query?nocache={nocache}?format=tabular",
             headers=headers,
             json=body,
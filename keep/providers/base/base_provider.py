@@ -2,19 +2,34 @@
 Base class for all providers.
 """
 import abc
+import asyncio
+import contextvars
+import inspect
 import logging
+from concurrent.futures import Future
 from typing import Optional
 
 from pydantic.dataclasses import dataclass
 
 from keep.contextmanager.contextmanager import ContextManager
+from keep.eventloop.eventloop import EventLoop
+from keep.providers.base.http_client import HttpClient
+from keep.providers.base.query_coalescer import query_coalescer_var
+from keep.providers.base.results_stream import ResultsStream
 from keep.providers.models.provider_config import ProviderConfig
 
+# the parameters exposed by the current query (see BaseProvider.expose), providers are shared by concurrent queries
+exposed_parameters_var: contextvars.ContextVar[dict] = contextvars.ContextVar(
+    "exposed_parameters", default=None
+)
+
 
 @dataclass
 class BaseProvider(metaclass=abc.ABCMeta):
     provider_id: str
     config: ProviderConfig
+    # whether identical queries in the same tick run once (see QueryCoalescer), disable for queries with side effects
+    COALESCE_QUERIES = True
 
     def __post_init__(self):
         """
@@ -26,12 +41,20 @@ class BaseProvider(metaclass=abc.ABCMeta):
         """
         # Initalize logger for every provider
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.context_manager = ContextManager.get_instance()
         self.validate_config()
         self.logger.debug(
             "Base provider initalized", extra={"provider": self.__class__.__name__}
         )
 
+    @property
+    def context_manager(self) -> ContextManager:
+        return ContextManager.get_instance()
+
+    @property
+    def http_client(self) -> HttpClient:
+        # shared by all the providers, so connections to the same host are kept alive and reused
+        return HttpClient.get_instance()
+
     @abc.abstractmethod
     def dispose(self):
         """
@@ -50,15 +73,27 @@ class BaseProvider(metaclass=abc.ABCMeta):
         """
         Output alert message.
 
+        Providers with an async client can implement it as async def notify.
+
         Args:
             **kwargs (dict): The provider context (with statement)
         """
         raise NotImplementedError("notify() method not implemented")
 
+    async def notify_async(self, **kwargs):
+        """
+        Notify on the event loop: async notify is awaited, sync notify runs in the event loop's thread pool.
+        """
+        if inspect.iscoroutinefunction(self.notify):
+            return await self.notify(**kwargs)
+        return await asyncio.to_thread(self.notify, **kwargs)
+
     def _query(self, **kwargs: dict):
         """
         Query the provider using the given query
 
+        Providers with an async client can implement it as async def _query.
+
         Args:
             kwargs (dict): The provider context (with statement)
 
@@ -68,10 +103,76 @@ class BaseProvider(metaclass=abc.ABCMeta):
         raise NotImplementedError("query() method not implemented")
 
     def query(self, **kwargs: dict):
-        # just run the query
-        results = self._query(**kwargs)
+        # the event loop and the thread pool run the query in a copy of the context, with the same dict
+        exposed_parameters_var.set({})
+        if inspect.iscoroutinefunction(self._query):
+            results = EventLoop.get_instance().run(self._query(**kwargs))
+        else:
+            results = self._query(**kwargs)
+        return self.__track_results(results)
+
+    async def query_async(self, **kwargs: dict):
+        """
+        Query on the event loop: async _query is awaited, sync _query runs in the event loop's thread pool.
+
+        Identical queries issued in the same tick run once (see QueryCoalescer), except for streamed results.
+        """
+        query_coalescer = query_coalescer_var.get()
+        if query_coalescer and self.COALESCE_QUERIES and not kwargs.get("stream"):
+            results, exposed_parameters = await query_coalescer.query(
+                self, kwargs, lambda: self.__query_async(**kwargs)
+            )
+        else:
+            results, exposed_parameters = await self.__query_async(**kwargs)
+        # coalesced queries expose the parameters of the query that ran
+        exposed_parameters_var.set(exposed_parameters)
+        return self.__track_results(results)
+
+    async def __query_async(self, **kwargs: dict) -> tuple:
+        exposed_parameters = {}
+        exposed_parameters_var.set(exposed_parameters)
+        if inspect.iscoroutinefunction(self._query):
+            results = await self._query(**kwargs)
+        else:
+            results = await asyncio.to_thread(self._query, **kwargs)
+        return results, exposed_parameters
+
+    def submit_query(self, **kwargs: dict) -> Optional[Future]:
+        """
+        Start the query without waiting for its results (see Alert.submit_queries).
+
+        Providers whose queries run asynchronously (e.g. CloudWatch Logs Insights) override it,
+            so the queries of several steps run at the same time.
+
+        Args:
+            **kwargs (dict): The provider context (with statement)
+
+        Returns:
+            Optional[Future]: The query results (see get_query_results), None if the provider doesn't support it.
+        """
+        return None
+
+    def get_query_results(self, submitted_query: Future):
+        """
+        Wait for the results of a query started with submit_query.
+        """
+        exposed_parameters_var.set({})
+        return self.__track_results(submitted_query.result())
+
+    async def get_query_results_async(self, submitted_query: Future):
+        """
+        Await the results of a query started with submit_query.
+        """
+        exposed_parameters_var.set({})
+        return self.__track_results(await asyncio.wrap_future(submitted_query))
+
+    def __track_results(self, results):
         # now add the type of the results to the global context
-        if results and type(results) == list:
+        if isinstance(results, ResultsStream):
+            # the rows are fetched as the stream is consumed
+            dependencies = self.context_manager.dependencies
+            results.on_first_row = lambda row: dependencies.add(row.__class__)
+        elif results and type(results) == list:
             self.context_manager.dependencies.add(results[0].__class__)
         elif results:
             self.context_manager.dependencies.add(results.__class__)
@@ -120,6 +221,15 @@ class BaseProvider(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError("get_logs() method not implemented")
 
+    def get_connection_stats(self) -> dict:
+        """
+        Get the provider's connections stats (e.g. its connection pool metrics).
+
+        Returns:
+            dict: The stats, empty if the provider doesn't keep connections.
+        """
+        return {}
+
     def expose(self):
         """Expose parameters that were calculated during query time.
 
@@ -127,6 +237,15 @@ class BaseProvider(metaclass=abc.ABCMeta):
         E.g. parameters that were supplied by the user and were rendered by the provider.
 
         A concrete example is the "_from" and "to" of the Datadog Provider which are calculated during execution.
+        The parameters are of the last query in the caller's context (see set_exposed_parameters),
+            as the provider instance is shared by the steps of concurrent alerts.
         """
-        # TODO - implement dynamically using decorators and
-        return {}
+        return dict(exposed_parameters_var.get() or {})
+
+    def set_exposed_parameters(self, parameters: dict):
+        """
+        Expose parameters calculated by the running query (see expose), called by _query.
+        """
+        exposed_parameters = exposed_parameters_var.get()
+        if exposed_parameters is not None:
+            exposed_parameters.update(parameters)
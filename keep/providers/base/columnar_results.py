@@ -0,0 +1,76 @@
+"""
+A lightweight columnar container for (SQL) query results.
+"""
+import typing
+
+
+class ColumnarResults(typing.Sequence):
+    """
+    Query results stored as column names + a list of values per column.
+
+    Rows are accessed like a list of tuples (results[0][0] is the first column of the first row),
+        so templates such as {{ steps.x.results[0][0] }} work the same as with a list of rows.
+    """
+
+    def __init__(self, columns: typing.List[str], rows: typing.Iterable = ()):
+        """
+        Args:
+            columns (List[str]): The column names.
+            rows (Iterable, optional): Rows to add (sequences of values, in the columns order).
+        """
+        self.columns = list(columns)
+        self._values = [[] for _ in self.columns]
+        self._length = 0
+        self.extend(rows)
+
+    def extend(self, rows: typing.Iterable):
+        """
+        Add rows (e.g. a page of results) to the results.
+        """
+        for row in rows:
+            if len(row) != len(self.columns):
+                raise ValueError(
+                    f"Expected {len(self.columns)} values in a row but got {len(row)}"
+                )
+            for values, value in zip(self._values, row):
+                values.append(value)
+            self._length += 1
+
+    def column(self, name: str) -> list:
+        """
+        Get the values of a column by its name.
+        """
+        return self._values[self.columns.index(name)]
+
+    def to_dicts(self) -> typing.List[dict]:
+        return [dict(zip(self.columns, row)) for row in self]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int | slice):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if not isinstance(index, int):
+            # like a list, so template lookups (e.g. results.0) fall back to an integer index
+            raise TypeError(f"row indices must be integers, not {type(index).__name__}")
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("row index out of range")
+        return tuple(values[index] for values in self._values)
+
+    def __iter__(self) -> typing.Iterator[tuple]:
+        return zip(*self._values) if self._values else iter(())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ColumnarResults):
+            return self.columns == other.columns and self._values == other._values
+        return NotImplemented
+
+    def __str__(self) -> str:
+        # rendered into messages (e.g. {{ steps.x.results }}) as the rows, like the list of dicts it replaced
+        return str(self.to_dicts())
+
+    def __repr__(self) -> str:
+        return f"<ColumnarResults columns={self.columns} rows={self._length}>"
@@ -0,0 +1,208 @@
+"""
+A generic, thread safe, connection pool for providers that connect to databases.
+"""
+import contextlib
+import dataclasses
+import logging
+import threading
+import time
+import typing
+
+
+class ConnectionPoolTimeout(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class ConnectionPoolConfig:
+    """
+    Connection pool configuration, taken from the "pool" section of the provider config.
+
+    Args:
+        min_size (int): How many idle connections are kept open even when they exceed the idle timeout.
+        max_size (int): The maximum number of open connections.
+        idle_timeout (float): Seconds after which an idle connection is closed.
+        health_check_interval (float): Connections idle for more than this many seconds are checked before they are reused.
+        checkout_timeout (float): Seconds to wait for a connection when max_size connections are in use.
+    """
+
+    min_size: int = 0
+    max_size: int = 5
+    idle_timeout: float = 300
+    health_check_interval: float = 10
+    checkout_timeout: float = 30
+
+    @staticmethod
+    def from_config(pool_config: dict | None) -> "ConnectionPoolConfig":
+        pool_config = pool_config or {}
+        field_names = {field.name for field in dataclasses.fields(ConnectionPoolConfig)}
+        unknown_fields = set(pool_config) - field_names
+        if unknown_fields:
+            raise ValueError(f"Unknown connection pool settings: {unknown_fields}")
+        config = ConnectionPoolConfig(**pool_config)
+        if config.max_size < 1 or config.min_size > config.max_size:
+            raise ValueError(
+                "Connection pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1"
+            )
+        return config
+
+
+class ConnectionPool:
+    """
+    Keeps connections open between queries (and interval runs).
+
+    Connections are created on demand (up to max_size), reused LIFO, health checked on checkout
+        if they were idle for a while, and closed when idle for longer than idle_timeout.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect: typing.Callable[[], typing.Any],
+        close: typing.Callable[[typing.Any], None],
+        is_healthy: typing.Callable[[typing.Any], bool],
+        config: ConnectionPoolConfig = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.name = name
+        self.config = config or ConnectionPoolConfig()
+        self._connect = connect
+        self._close = close
+        self._is_healthy = is_healthy
+        self._condition = threading.Condition()
+        # (connection, last used monotonic time), the most recently used is last
+        self._idle = []
+        # idle + in use + being created
+        self._size = 0
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "closed_idle": 0,
+            "closed_unhealthy": 0,
+            "closed_broken": 0,
+            "waits": 0,
+        }
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Checkout a connection for the duration of the block.
+
+        A connection whose block raised an exception (or was abandoned, e.g. a generator that wasn't exhausted)
+            is closed instead of being returned to the pool, since its state (e.g. an aborted transaction) is unknown.
+        """
+        connection = self.checkout()
+        try:
+            yield connection
+        except BaseException:
+            self.discard(connection, "closed_broken")
+            raise
+        self.checkin(connection)
+
+    def checkout(self):
+        deadline = time.monotonic() + self.config.checkout_timeout
+        while True:
+            connection, last_used = None, None
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError(f"Connection pool {self.name} is closed")
+                self._close_idle_connections()
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                elif self._size < self.config.max_size:
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise ConnectionPoolTimeout(
+                            f"Timed out waiting for a connection from pool {self.name}"
+                        )
+                    self._stats["waits"] += 1
+                    self._condition.wait(remaining)
+                    continue
+            # connecting and health checks are done outside the lock
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                with self._condition:
+                    self._stats["created"] += 1
+                return connection
+            if (
+                time.monotonic() - last_used < self.config.health_check_interval
+                or self.__is_healthy(connection)
+            ):
+                with self._condition:
+                    self._stats["reused"] += 1
+                return connection
+            self.discard(connection, "closed_unhealthy")
+
+    def checkin(self, connection):
+        with self._condition:
+            if not self._closed:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+                return
+        self.discard(connection)
+
+    def close(self):
+        """
+        Close the idle connections, connections in use are closed when they are checked in.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self.discard(connection)
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            return {
+                "open": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                **self._stats,
+            }
+
+    def __is_healthy(self, connection) -> bool:
+        try:
+            return self._is_healthy(connection)
+        except Exception:
+            return False
+
+    def _close_idle_connections(self):
+        # must be called with the lock held, the least recently used connections are first
+        expired = time.monotonic() - self.config.idle_timeout
+        while (
+            self._idle
+            and self._idle[0][1] < expired
+            and len(self._idle) > self.config.min_size
+        ):
+            connection, _ = self._idle.pop(0)
+            self._size -= 1
+            self._stats["closed_idle"] += 1
+            self.__close(connection)
+
+    def discard(self, connection, reason: str = None):
+        """
+        Close a checked out connection instead of returning it to the pool (e.g. it has unread results).
+        """
+        self.__close(connection)
+        with self._condition:
+            self._size -= 1
+            if reason:
+                self._stats[reason] += 1
+            self._condition.notify()
+
+    def __close(self, connection):
+        try:
+            self._close(connection)
+        except Exception:
+            self.logger.warning(
+                "Failed to close connection", extra={"connection_pool": self.name}
+            )
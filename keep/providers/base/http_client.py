@@ -0,0 +1,247 @@
+"""
+A shared HTTP client for the providers that call REST APIs.
+"""
+import dataclasses
+import email.utils
+import http.cookiejar
+import logging
+import os
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# statuses that are retried (for any method - the request wasn't processed)
+RETRY_ALWAYS_STATUSES = (429, 503)
+# statuses that are retried only for idempotent methods (a POST may have been processed)
+RETRY_IDEMPOTENT_STATUSES = (500, 502, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+@dataclasses.dataclass
+class HttpClientConfig:
+    """
+    HTTP client configuration, taken from the KEEP_HTTP_* environment variables.
+
+    Args:
+        pool_size (int): The maximum number of kept-alive connections per host.
+        timeout (float): Seconds to wait for a connection and for a response (unless the request sets timeout).
+        retries (int): How many times a request is retried on connection errors and retryable statuses.
+        backoff_factor (float): Retries wait backoff_factor * 2 ** retry seconds, unless the response has Retry-After.
+        max_retry_after (float): Don't retry if Retry-After asks to wait longer than this many seconds.
+    """
+
+    pool_size: int = 10
+    timeout: float = 30
+    retries: int = 3
+    backoff_factor: float = 0.5
+    max_retry_after: float = 60
+
+    @staticmethod
+    def from_env() -> "HttpClientConfig":
+        return HttpClientConfig(
+            pool_size=int(os.environ.get("KEEP_HTTP_POOL_SIZE", 10)),
+            timeout=float(os.environ.get("KEEP_HTTP_TIMEOUT", 30)),
+            retries=int(os.environ.get("KEEP_HTTP_RETRIES", 3)),
+            backoff_factor=float(os.environ.get("KEEP_HTTP_BACKOFF_FACTOR", 0.5)),
+            max_retry_after=float(os.environ.get("KEEP_HTTP_MAX_RETRY_AFTER", 60)),
+        )
+
+
+class HttpClient:
+    """
+    Sends the providers' HTTP requests through a kept-alive session per host, so connections (and TLS handshakes)
+        are reused between requests, steps, actions and interval runs.
+
+    Requests are retried with an exponential backoff on connection errors, 429 and 503 (honoring Retry-After),
+        and on 500/502/504 for idempotent methods.
+    """
+
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    @staticmethod
+    def get_instance() -> "HttpClient":
+        with HttpClient.__instance_lock:
+            if HttpClient.__instance is None:
+                HttpClient.__instance = HttpClient(HttpClientConfig.from_env())
+            return HttpClient.__instance
+
+    def __init__(self, config: HttpClientConfig = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = config or HttpClientConfig()
+        self._lock = threading.Lock()
+        # host -> session (and its connection pool adapter)
+        self._sessions = {}
+        self._adapters = {}
+        # host -> stats
+        self._stats = {}
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request, same as requests.request.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL.
+            **kwargs: requests.request arguments (headers, json, params, timeout, etc.).
+
+        Returns:
+            requests.Response: The response (of the last attempt).
+        """
+        method = method.upper()
+        host = self.__get_host(url)
+        session = self.__get_session(host)
+        kwargs.setdefault("timeout", self.config.timeout)
+        for retry in range(self.config.retries + 1):
+            is_last_attempt = retry == self.config.retries
+            start = time.monotonic()
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.__record(host, time.monotonic() - start, error=True)
+                # a timed out request may have been processed
+                if is_last_attempt or method not in IDEMPOTENT_METHODS:
+                    raise
+                delay = self.__get_backoff(retry)
+            else:
+                self.__record(host, time.monotonic() - start)
+                delay = self.__get_retry_delay(method, response, retry)
+                if is_last_attempt or delay is None:
+                    return response
+                response.close()
+            self.logger.debug(
+                "Retrying HTTP request",
+                extra={"host": host, "retry": retry + 1, "delay": delay},
+            )
+            with self._lock:
+                if host in self._stats:
+                    self._stats[host]["retries"] += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def get_stats(self) -> dict:
+        """
+        Get the per host stats.
+
+        Returns:
+            dict: host -> requests, errors, retries, average/max latency (seconds),
+                and how many connections were opened (the rest of the requests reused a connection).
+        """
+        with self._lock:
+            stats = {}
+            for host, host_stats in self._stats.items():
+                pools = self._adapters[host].poolmanager.pools
+                connections = sum(pools[key].num_connections for key in pools.keys())
+                stats[host] = {
+                    "requests": host_stats["requests"],
+                    "errors": host_stats["errors"],
+                    "retries": host_stats["retries"],
+                    "connections": connections,
+                    "avg_latency": (
+                        host_stats["latency"] / host_stats["requests"]
+                        if host_stats["requests"]
+                        else 0
+                    ),
+                    "max_latency": host_stats["max_latency"],
+                }
+            return stats
+
+    def close(self):
+        """
+        Close the kept-alive connections.
+        """
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+            self._adapters = {}
+            self._stats = {}
+        for session in sessions.values():
+            session.close()
+
+    @staticmethod
+    def __get_host(url: str) -> str:
+        parsed_url = urllib.parse.urlsplit(url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+    def __get_session(self, host: str) -> requests.Session:
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                # the session is shared by every provider (and credentials) calling the host, don't keep cookies
+                session.cookies.set_policy(
+                    http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+                )
+                # retries are done by the client (see request), so they are counted and honor Retry-After
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.config.pool_size
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+                self._adapters[host] = adapter
+                self._stats[host] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "latency": 0.0,
+                    "max_latency": 0.0,
+                }
+            return self._sessions[host]
+
+    def __record(self, host: str, latency: float, error: bool = False):
+        with self._lock:
+            host_stats = self._stats.get(host)
+            if host_stats is None:
+                # the client was closed during the request
+                return
+            host_stats["requests"] += 1
+            host_stats["errors"] += int(error)
+            host_stats["latency"] += latency
+            host_stats["max_latency"] = max(host_stats["max_latency"], latency)
+
+    def __get_backoff(self, retry: int) -> float:
+        return self.config.backoff_factor * 2**retry
+
+    def __get_retry_delay(
+        self, method: str, response: requests.Response, retry: int
+    ) -> float | None:
+        # returns None if the response shouldn't be retried
+        if response.status_code in RETRY_IDEMPOTENT_STATUSES:
+            if method not in IDEMPOTENT_METHODS:
+                return None
+        elif response.status_code not in RETRY_ALWAYS_STATUSES:
+            return None
+        retry_after = self.__parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is None:
+            return self.__get_backoff(retry)
+        if retry_after > self.config.max_retry_after:
+            return None
+        return retry_after
+
+    @staticmethod
+    def __parse_retry_after(retry_after: str | None) -> float | None:
+        # either seconds or an HTTP date
+        if not retry_after:
+            return None
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        return max(retry_at.timestamp() - time.time(), 0)
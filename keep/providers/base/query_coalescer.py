@@ -0,0 +1,80 @@
+"""
+Coalesces identical provider queries issued by different steps/alerts in the same tick.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import typing
+
+# the coalescer of the current tick (see AlertManager), queries outside of a tick aren't coalesced
+query_coalescer_var: contextvars.ContextVar["QueryCoalescer"] = contextvars.ContextVar(
+    "query_coalescer", default=None
+)
+
+
+class QueryCoalescer:
+    """
+    Runs identical queries (the same provider instance with the same rendered parameters) once per tick,
+        a batch of alert runs, and shares the results (or the error) with every step that issued them.
+
+    Queries issued while an identical query is running wait for it, later ones get its results.
+    """
+
+    def __init__(self, stats: dict = None):
+        """
+        Args:
+            stats (dict, optional): Counters to update (queries, saved_calls), e.g. shared by the ticks of a run.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.stats = stats if stats is not None else {"queries": 0, "saved_calls": 0}
+        # query key -> (provider, the query task)
+        self._queries = {}
+
+    @staticmethod
+    def get_query_key(provider, query_parameters: dict) -> tuple | None:
+        """
+        Get the key of a query, None if it can't be coalesced (its parameters can't be serialized).
+        """
+        try:
+            parameters = json.dumps(query_parameters, sort_keys=True, default=str)
+        except (TypeError, ValueError):
+            return None
+        # the provider instance is shared by all the steps with the same provider config (see ProvidersRegistry)
+        return id(provider), parameters
+
+    async def query(
+        self,
+        provider,
+        query_parameters: dict,
+        run_query: typing.Callable[[], typing.Awaitable],
+    ):
+        """
+        Run the query, unless an identical query ran (or is running) in this tick.
+
+        Args:
+            provider (BaseProvider): The queried provider.
+            query_parameters (dict): The rendered query parameters.
+            run_query (Callable[[], Awaitable]): Runs the query.
+
+        Returns:
+            The query results.
+        """
+        key = self.get_query_key(provider, query_parameters)
+        if key is None:
+            return await run_query()
+        self.stats["queries"] += 1
+        if key in self._queries:
+            self.stats["saved_calls"] += 1
+            self.logger.debug(
+                "Coalesced query", extra={"provider_id": provider.provider_id}
+            )
+        else:
+            task = asyncio.ensure_future(run_query())
+            # the error is raised to the waiting steps, don't warn if they were all cancelled
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            # the provider is kept, so its id isn't reused during the tick
+            self._queries[key] = (provider, task)
+        _, task = self._queries[key]
+        # a cancelled step doesn't cancel the query of the other steps
+        return await asyncio.shield(task)
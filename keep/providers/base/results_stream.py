@@ -0,0 +1,135 @@
+"""
+Streaming (chunked) query results, for queries whose results shouldn't be materialized in memory.
+"""
+import logging
+import threading
+import typing
+
+from keep.exceptions.provider_exception import ProviderException
+
+# how many rows a stream fetches at a time, unless the step sets chunk_size
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class MaxRowsExceeded(ProviderException):
+    pass
+
+
+class ResultsStream(typing.Iterator):
+    """
+    Iterates over query results, fetching them in chunks.
+
+    Providers return a stream (instead of a list) when a step sets stream: true, the step results can then be
+        consumed once - by a (step or action) foreach - in bounded memory.
+
+    The stream owns the underlying resources (e.g. a pooled connection and its cursor),
+        on_close is called once: with exhausted=True after the last row was read, or with exhausted=False
+        if the stream was closed (or garbage collected) before that, or if fetching failed.
+    """
+
+    def __init__(
+        self,
+        fetch_chunk: typing.Callable[[], list],
+        on_close: typing.Callable[[bool], None] = None,
+        max_rows: int = None,
+        name: str = "",
+        columns: typing.List[str] = None,
+    ):
+        """
+        Args:
+            fetch_chunk (Callable[[], list]): Returns the next chunk of rows, an empty chunk ends the stream.
+            on_close (Callable[[bool], None], optional): Releases the underlying resources.
+            max_rows (int, optional): Raise MaxRowsExceeded once more than max_rows rows were read.
+            name (str, optional): Used in logs and errors (e.g. the provider id).
+            columns (List[str], optional): The column names of the rows, when the query returns them (e.g. SQL).
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.name = name
+        self.columns = columns
+        self.max_rows = int(max_rows) if max_rows is not None else None
+        self.rows_count = 0
+        # called with the first row (see BaseProvider.query)
+        self.on_first_row: typing.Callable[[typing.Any], None] = None
+        self._fetch_chunk = fetch_chunk
+        self._on_close = on_close
+        self._chunk = []
+        self._chunk_index = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> "ResultsStream":
+        if self._closed and self._chunk_index >= len(self._chunk):
+            raise ProviderException(
+                f"Results of {self.name} were already consumed, streamed results can be iterated only once"
+            )
+        return self
+
+    def __repr__(self) -> str:
+        # e.g. when the step results are dumped to the state store
+        return f"<ResultsStream {self.name}: {self.rows_count} rows read>"
+
+    def __next__(self):
+        if self._chunk_index >= len(self._chunk):
+            self._chunk = self.__fetch_chunk()
+            self._chunk_index = 0
+        row = self._chunk[self._chunk_index]
+        self._chunk_index += 1
+        return row
+
+    def chunks(self) -> typing.Iterator[list]:
+        """
+        Iterate over the (remaining) rows chunk by chunk.
+        """
+        if self._chunk_index < len(self._chunk):
+            yield self._chunk[self._chunk_index :]
+        while True:
+            try:
+                self._chunk = self.__fetch_chunk()
+            except StopIteration:
+                return
+            self._chunk_index = len(self._chunk)
+            yield self._chunk
+
+    def __fetch_chunk(self) -> list:
+        if self._closed:
+            raise StopIteration
+        try:
+            chunk = list(self._fetch_chunk() or [])
+        except BaseException:
+            self.close()
+            raise
+        if not chunk:
+            self.close(exhausted=True)
+            raise StopIteration
+        if not self.rows_count and self.on_first_row:
+            self.on_first_row(chunk[0])
+        self.rows_count += len(chunk)
+        if self.max_rows is not None and self.rows_count > self.max_rows:
+            self.close()
+            raise MaxRowsExceeded(
+                f"Query results of {self.name} exceed max_rows ({self.max_rows})"
+            )
+        return chunk
+
+    def close(self, exhausted: bool = False):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._chunk, self._chunk_index = [], 0
+        if self._on_close:
+            try:
+                self._on_close(exhausted)
+            except Exception:
+                self.logger.warning(
+                    "Failed to close results stream", extra={"stream": self.name}
+                )
+
+    def __enter__(self) -> "ResultsStream":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
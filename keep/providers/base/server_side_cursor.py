@@ -0,0 +1,58 @@
+"""
+Streams query results through a server side (named) cursor of a pooled (psycopg2) connection.
+"""
+import uuid
+
+from keep.providers.base.connection_pool import ConnectionPool
+from keep.providers.base.results_stream import ResultsStream
+
+
+def stream_server_side_cursor(
+    pool: ConnectionPool,
+    query: str,
+    chunk_size: int,
+    max_rows: int | None,
+    name: str,
+) -> ResultsStream:
+    """
+    Execute a query with a server side cursor, so its rows are fetched chunk_size at a time.
+
+    The connection is checked out of the pool until the stream is closed (or discarded if it broke).
+
+    Args:
+        pool (ConnectionPool): The pool of the (autocommit) connections.
+        query (str): The query.
+        chunk_size (int): How many rows to fetch at a time.
+        max_rows (int | None): Fail the stream once it read more than max_rows rows.
+        name (str): The stream name (e.g. the provider id).
+
+    Returns:
+        ResultsStream: The rows.
+    """
+    conn = pool.checkout()
+    try:
+        # server side (named) cursors live in a transaction, rolled back when the stream is closed
+        conn.autocommit = False
+        cur = conn.cursor(name=f"keep_{uuid.uuid4().hex}")
+        cur.itersize = chunk_size
+        cur.execute(query)
+    except BaseException:
+        pool.discard(conn, "closed_broken")
+        raise
+
+    def on_close(exhausted: bool):
+        try:
+            cur.close()
+            conn.rollback()
+            conn.autocommit = True
+        except Exception:
+            pool.discard(conn, "closed_broken")
+            raise
+        pool.checkin(conn)
+
+    return ResultsStream(
+        fetch_chunk=lambda: cur.fetchmany(chunk_size),
+        on_close=on_close,
+        max_rows=max_rows,
+        name=name,
+    )
@@ -3,6 +3,7 @@ BigQuery provider.
 """
 import dataclasses
 import os
+import threading
 from typing import Optional
 
 import google.auth
@@ -10,6 +11,7 @@ from google.cloud import bigquery
 from pydantic.dataclasses import dataclass
 
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.base.results_stream import DEFAULT_CHUNK_SIZE, ResultsStream
 from keep.providers.models.provider_config import ProviderConfig
 
 
@@ -43,6 +45,16 @@ class BigqueryProvider(BaseProvider):
 
     def __init__(self, provider_id: str, config: ProviderConfig):
         super().__init__(provider_id, config)
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> bigquery.Client:
+        # create the client on first use, once even if steps query concurrently
+        with self._client_lock:
+            if not self._client:
+                self.init_client()
+            return self._client
 
     def validate_config(self):
         """
@@ -73,32 +85,49 @@ class BigqueryProvider(BaseProvider):
 
     def init_client(self):
         if self.authentication_config.credentials_path:
-            self.client = bigquery.Client.from_service_account_json(
+            client = bigquery.Client.from_service_account_json(
                 self.authentication_config.service_account_file
             )
         else:
-            self.client = bigquery.Client()
+            client = bigquery.Client()
         # check if the project id was set in the environment and use it if exists
         if self.authentication_config.project_id:
-            self.client.project = self.authentication_config.project_id
+            client.project = self.authentication_config.project_id
         elif "GOOGLE_CLOUD_PROJECT" in os.environ:
-            self.client.project = os.environ["GOOGLE_CLOUD_PROJECT"]
+            client.project = os.environ["GOOGLE_CLOUD_PROJECT"]
         else:
             raise ValueError(
                 "Project ID must be set in either the configuration or the 'GOOGLE_CLOUD_PROJECT' environment variable."
             )
+        self._client = client
 
     def dispose(self):
-        self.client.close()
+        # the client is created on first query
+        if self._client:
+            self._client.close()
+            self._client = None
 
     def notify(self, **kwargs):
         pass  # Define how to notify about any alerts or issues
 
-    def _query(self, query: str):
-        self.init_client()
+    def _query(
+        self,
+        query: str,
+        stream: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_rows: int = None,
+    ):
         query_job = self.client.query(query)
-        results = list(query_job.result())
-        return results
+        if not stream:
+            results = list(query_job.result())
+            return results
+        # the result pages are fetched as the stream is consumed
+        pages = query_job.result(page_size=int(chunk_size or DEFAULT_CHUNK_SIZE)).pages
+        return ResultsStream(
+            fetch_chunk=lambda: list(next(pages, [])),
+            max_rows=max_rows,
+            name=self.provider_id,
+        )
 
     def get_alerts(self, alert_id: Optional[str] = None):
         pass  # Define how to get alerts from BigQuery if applicable
@@ -4,15 +4,22 @@ CloudwatchProvider is a class that provides a way to read data from AWS Cloudwat
 
 import dataclasses
 import datetime
+import logging
 import os
+import threading
 import time
+from concurrent.futures import Future
 
 import boto3
 import pydantic
 
+from keep.exceptions.provider_exception import ProviderException
 from keep.providers.base.base_provider import BaseProvider
 from keep.providers.models.provider_config import ProviderConfig
 
+# seconds a Logs Insights query may run before it's stopped, unless the step sets timeout
+DEFAULT_QUERY_TIMEOUT = 300
+
 
 @pydantic.dataclasses.dataclass
 class CloudwatchProviderAuthConfig:
@@ -42,7 +49,17 @@ class CloudwatchProvider(BaseProvider):
 
     def __init__(self, aws_client_type: str, provider_id: str, config: ProviderConfig):
         super().__init__(provider_id, config)
-        self.client = self.__generate_client(aws_client_type)
+        self.aws_client_type = aws_client_type
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        # create the client on first use, so parsing alerts doesn't resolve credentials/endpoints
+        with self._client_lock:
+            if not self._client:
+                self._client = self.__generate_client(self.aws_client_type)
+            return self._client
 
     def __generate_client(self, aws_client_type: str):
         client = boto3.client(
@@ -54,10 +71,13 @@ class CloudwatchProvider(BaseProvider):
         return client
 
     def dispose(self):
+        if not self._client:
+            return
         try:
-            self.client.close()
+            self._client.close()
         except Exception:
             self.logger.exception("Error closing boto3 connection")
+        self._client = None
 
     def validate_config(self):
         self.authentication_config = CloudwatchProviderAuthConfig(
@@ -65,6 +85,125 @@ class CloudwatchProvider(BaseProvider):
         )
 
 
+class LogsQueriesPoller:
+    """
+    Waits for the results of all the running Logs Insights queries (of a client) together, on a single thread.
+
+    The queries are polled with an exponential backoff (reset whenever a query is submitted),
+        and stopped if they don't complete before their deadline.
+    """
+
+    RUNNING_STATUSES = ("Scheduled", "Running")
+
+    def __init__(
+        self,
+        client,
+        initial_interval: float = 0.2,
+        max_interval: float = 2.0,
+        backoff: float = 1.5,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.client = client
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._interval = initial_interval
+        # query id -> (future, monotonic deadline)
+        self._queries = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self.stats = {"queries": 0, "polls": 0, "timed_out": 0}
+
+    def submit(self, query_id: str, timeout: float) -> Future:
+        """
+        Wait for the results of a started query.
+
+        Args:
+            query_id (str): The query id (returned by start_query).
+            timeout (float): Seconds after which the query is stopped.
+
+        Returns:
+            Future: Resolved with the query results once the query completes.
+        """
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise ProviderException("The CloudWatch Logs provider was disposed")
+            self._queries[query_id] = (future, time.monotonic() + timeout)
+            self.stats["queries"] += 1
+            self._interval = self.initial_interval
+            # the polling thread runs only while there are running queries
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self.__run, name="keep-cloudwatch-logs", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def close(self):
+        """
+        Stop the running queries.
+        """
+        with self._condition:
+            self._closed = True
+            queries, self._queries = self._queries, {}
+        for query_id, (future, _) in queries.items():
+            self.__stop_query(query_id)
+            future.cancel()
+
+    def __run(self):
+        while True:
+            with self._condition:
+                if not self._queries:
+                    self._thread = None
+                    return
+                self._condition.wait(self._interval)
+                self._interval = min(self._interval * self.backoff, self.max_interval)
+                queries = dict(self._queries)
+            for query_id, (future, deadline) in queries.items():
+                if self.__poll(query_id, future, deadline):
+                    with self._condition:
+                        self._queries.pop(query_id, None)
+
+    def __poll(self, query_id: str, future: Future, deadline: float) -> bool:
+        # returns whether the query is done
+        if future.cancelled():
+            self.__stop_query(query_id)
+            return True
+        if time.monotonic() > deadline:
+            self.__stop_query(query_id)
+            self.stats["timed_out"] += 1
+            future.set_exception(
+                ProviderException(f"CloudWatch Logs query {query_id} timed out")
+            )
+            return True
+        try:
+            self.stats["polls"] += 1
+            response = self.client.get_query_results(queryId=query_id)
+            status = response["status"]
+        except Exception as e:
+            future.set_exception(e)
+            return True
+        if status in self.RUNNING_STATUSES:
+            return False
+        if status == "Complete":
+            future.set_result(response["results"])
+        else:
+            future.set_exception(
+                ProviderException(f"CloudWatch Logs query {query_id} {status}")
+            )
+        return True
+
+    def __stop_query(self, query_id: str):
+        try:
+            self.client.stop_query(queryId=query_id)
+        except Exception:
+            # e.g. the query already completed
+            self.logger.debug("Failed to stop query", extra={"query_id": query_id})
+
+
 class CloudwatchLogsProvider(CloudwatchProvider):
     """
     CloudwatchLogsProvider is a class that provides a way to read data from AWS Cloudwatch Logs.
@@ -72,11 +211,34 @@ class CloudwatchLogsProvider(CloudwatchProvider):
 
     def __init__(self, provider_id: str, config: ProviderConfig):
         super().__init__("logs", provider_id, config)
+        self._poller = None
+        self._poller_lock = threading.Lock()
+
+    @property
+    def poller(self) -> LogsQueriesPoller:
+        # shared by all the steps (and alerts) using this provider, so their queries are polled together
+        with self._poller_lock:
+            if not self._poller:
+                self._poller = LogsQueriesPoller(self.client)
+            return self._poller
 
-    def _query(self, **kwargs: dict) -> dict:
+    def dispose(self):
+        if self._poller:
+            self._poller.close()
+            self._poller = None
+        super().dispose()
+
+    def submit_query(self, **kwargs: dict) -> Future:
+        """
+        Start a Logs Insights query.
+
+        Returns:
+            Future: The query results, once the query completes.
+        """
         log_group = kwargs.get("log_group")
         query = kwargs.get("query")
         hours = kwargs.get("hours", 24)
+        timeout = float(kwargs.get("timeout") or DEFAULT_QUERY_TIMEOUT)
         start_query_response = self.client.start_query(
             logGroupName=log_group,
             queryString=query,
@@ -89,15 +251,11 @@ class CloudwatchLogsProvider(CloudwatchProvider):
         )
 
         query_id = start_query_response["queryId"]
+        self.logger.debug("AWS cloudwatch query started", extra={"query_id": query_id})
+        return self.poller.submit(query_id, timeout)
 
-        response = None
-
-        while response is None or response["status"] == "Running":
-            self.logger.debug("Waiting for AWS cloudwatch query to complete...")
-            time.sleep(1)
-            response = self.client.get_query_results(queryId=query_id)
-
-        return results
+    def _query(self, **kwargs: dict) -> list:
+        return self.submit_query(**kwargs).result()
 
 
 class CloudwatchMetricsProvider(CloudwatchProvider):
@@ -61,9 +61,6 @@ class DatadogProvider(BaseProvider):
         self.configuration = Configuration()
         self.configuration.api_key["apiKeyAuth"] = self.authentication_config.api_key
         self.configuration.api_key["appKeyAuth"] = self.authentication_config.app_key
-        # to be exposed
-        self.to = None
-        self._from = None
 
     def dispose(self):
         """
@@ -80,20 +77,19 @@ class DatadogProvider(BaseProvider):
             **self.config.authentication
         )
 
-    def expose(self):
-        return {
-            "to": int(self.to.timestamp()) * 1000,
-            "from": int(self._from.timestamp()) * 1000,
-        }
-
     def _query(self, **kwargs: dict):
         query = kwargs.get("query")
         timeframe = kwargs.get("timeframe")
         timeframe_in_seconds = DatadogProvider.convert_to_seconds(timeframe)
         query_type = kwargs.get("query_type")
-        self.to = datetime.datetime.fromtimestamp(time.time())
-        self._from = datetime.datetime.fromtimestamp(
-            time.time() - (timeframe_in_seconds)
+        to = datetime.datetime.fromtimestamp(time.time())
+        _from = datetime.datetime.fromtimestamp(time.time() - (timeframe_in_seconds))
+        # the provider is shared by concurrent queries, the window is exposed per query
+        self.set_exposed_parameters(
+            {
+                "to": int(to.timestamp()) * 1000,
+                "from": int(_from.timestamp()) * 1000,
+            }
         )
         if query_type == "logs":
             with ApiClient(self.configuration) as api_client:
@@ -102,8 +98,8 @@ class DatadogProvider(BaseProvider):
                     body={
                         "query": query,
                         "time": {
-                            "_from": self._from,
-                            "to": self.to,
+                            "_from": _from,
+                            "to": to,
                         },
                     }
                 )
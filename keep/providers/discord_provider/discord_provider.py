@@ -4,7 +4,6 @@ DiscordProvider is a class that implements the BaseOutputProvider interface for
 import dataclasses
 
 import pydantic
-import requests
 
 from keep.exceptions.provider_exception import ProviderException
 from keep.providers.base.base_provider import BaseProvider
@@ -57,7 +56,7 @@ class DiscordProvider(BaseProvider):
                 f"{self.__class__.__name__} Keyword Arguments Missing : content or components atleast one of them needed to trigger message"
             )
 
-        response = requests.post(
+        response = self.http_client.post(
             webhook_url,
             json={"content": content, "components": components},
         )
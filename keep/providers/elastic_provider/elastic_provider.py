@@ -10,9 +10,17 @@ from elasticsearch import Elasticsearch
 from keep.exceptions.provider_config_exception import ProviderConfigException
 from keep.exceptions.provider_connection_failed import ProviderConnectionFailed
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.base.columnar_results import ColumnarResults
+from keep.providers.base.results_stream import DEFAULT_CHUNK_SIZE, ResultsStream
 from keep.providers.models.provider_config import ProviderConfig
 from keep.providers.providers_factory import ProvidersFactory
 
+# how long a point in time is kept between two pages of a search
+POINT_IN_TIME_KEEP_ALIVE = "1m"
+# the hits (and SQL rows) of a single page, elastic's defaults, fetched without stream or max_rows
+DEFAULT_SEARCH_SIZE = 10
+DEFAULT_SQL_FETCH_SIZE = 1000
+
 
 @pydantic.dataclasses.dataclass
 class ElasticProviderAuthConfig:
@@ -100,53 +108,218 @@ class ElasticProvider(BaseProvider):
         """
         Dispose of the provider.
         """
+        # the client is created on first use, nothing to close if it was never used
+        if not self._client:
+            return
         try:
-            self.client.close()
+            self._client.close()
         except Exception:
             self.logger.exception("Failed to close ElasticSearch client")
+        self._client = None
 
-    def _query(self, query: str | dict, index: str = None) -> list[str]:
+    def _query(
+        self,
+        query: str | dict,
+        index: str = None,
+        aggs: str | dict = None,
+        stream: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_rows: int = None,
+    ) -> list[str] | ColumnarResults | dict | ResultsStream:
         """
         Query Elasticsearch index.
 
         Args:
             query (str | dict): The body of the query
             index (str): The index to search in
+            aggs (str | dict): Aggregations to run instead of returning the hits (only with index)
+            stream (bool): Return a ResultsStream that fetches the hits (or SQL rows) page by page
+            chunk_size (int): How many hits (or SQL rows) are fetched in every page
+            max_rows (int): Fail the query once more than max_rows hits (or SQL rows) were fetched,
+                without stream or max_rows only the first page of elastic's default size is fetched
 
         Returns:
-            list[str]: hits found by the query
+            list[str] | ColumnarResults | dict | ResultsStream: hits (or SQL rows) found by the query,
+                or the aggregations results
         """
+        chunk_size = int(chunk_size or DEFAULT_CHUNK_SIZE)
+        # all the pages are fetched only when asked for, the hits may be many
+        first_page_only = not stream and max_rows is None
         # Make sure query is a dict
         if not index:
-            return self._run_sql_query(query)
-        else:
-            return self._run_eql_query(query, index)
-
-    def _run_sql_query(self, query: str) -> list[str]:
-        response = self.client.sql.query(body={"query": query})
-        import pandas as pd
-
-        results = pd.DataFrame(response["rows"])
-        columns = [col["name"] for col in response["columns"]]
-        results.rename(
-            columns={i: columns[i] for i in range(len(columns))}, inplace=True
+            if first_page_only:
+                return self._run_sql_page(query, DEFAULT_SQL_FETCH_SIZE)
+            results = self._run_sql_query(query, chunk_size, max_rows)
+            if stream:
+                return results
+            columnar_results = ColumnarResults(results.columns)
+            for rows in results.chunks():
+                columnar_results.extend(rows)
+            return columnar_results
+        if aggs:
+            return self._run_aggregation_query(query, index, aggs)
+        if first_page_only:
+            return self._run_search_page(query, index, DEFAULT_SEARCH_SIZE)
+        results = self._run_eql_query(query, index, chunk_size, max_rows)
+        return results if stream else list(results)
+
+    def _run_sql_query(
+        self, query: str, chunk_size: int, max_rows: int = None
+    ) -> ResultsStream:
+        """
+        Run an SQL query, fetching its rows page by page using the SQL cursor.
+
+        Returns:
+            ResultsStream: The rows (and the column names).
+        """
+        response = self.client.sql.query(query=query, fetch_size=chunk_size)
+        cursor = response.get("cursor")
+        first_page = response["rows"]
+
+        def fetch_chunk() -> list:
+            nonlocal cursor, first_page
+            if first_page is not None:
+                rows, first_page = first_page, None
+                return rows
+            if not cursor:
+                return []
+            response = self.client.sql.query(cursor=cursor)
+            # the cursor isn't returned with the last page
+            cursor = response.get("cursor")
+            return response["rows"]
+
+        def on_close(exhausted: bool):
+            # the cursor is closed by elastic after the last page
+            if cursor:
+                self.client.sql.clear_cursor(cursor=cursor)
+
+        return ResultsStream(
+            fetch_chunk=fetch_chunk,
+            on_close=on_close,
+            max_rows=max_rows,
+            name=self.provider_id,
+            columns=[col["name"] for col in response["columns"]],
         )
+
+    def _run_eql_query(
+        self, query: str | dict, index: str, chunk_size: int, max_rows: int = None
+    ) -> ResultsStream:
+        """
+        Search an index, fetching all the hits page by page (point in time + search_after).
+
+        Returns:
+            ResultsStream: The hits.
+        """
+        if isinstance(query, str):
+            query = json.loads(query)
+
+        pit_id = self.client.open_point_in_time(
+            index=index, keep_alive=POINT_IN_TIME_KEEP_ALIVE
+        )["id"]
+        search_after = None
+        last_page = False
+
+        def fetch_chunk() -> list:
+            nonlocal pit_id, search_after, last_page
+            if last_page:
+                return []
+            response = self.client.search(
+                query=query,
+                size=chunk_size,
+                pit={"id": pit_id, "keep_alive": POINT_IN_TIME_KEEP_ALIVE},
+                sort=[{"_shard_doc": "asc"}],
+                search_after=search_after,
+                track_total_hits=search_after is None,
+            )
+            # the point in time id may change between pages
+            pit_id = response.get("pit_id", pit_id)
+            hits = response.get("hits", {}).get("hits", [])
+            if search_after is None:
+                self.logger.debug(
+                    "Got elasticsearch hits",
+                    extra={
+                        "num_of_hits": response.get("hits", {})
+                        .get("total", {})
+                        .get("value", 0)
+                    },
+                )
+            last_page = len(hits) < chunk_size
+            if hits:
+                search_after = hits[-1]["sort"]
+            return hits
+
+        def on_close(exhausted: bool):
+            self.client.close_point_in_time(id=pit_id)
+
+        return ResultsStream(
+            fetch_chunk=fetch_chunk,
+            on_close=on_close,
+            max_rows=max_rows,
+            name=self.provider_id,
+        )
+
+    def _run_search_page(self, query: str | dict, index: str, size: int) -> list:
+        """
+        Search an index, fetching only the first page of hits.
+
+        Returns:
+            list: The hits.
+        """
+        if isinstance(query, str):
+            query = json.loads(query)
+
+        response = self.client.search(index=index, query=query, size=size)
+        num_of_hits = response.get("hits", {}).get("total", {}).get("value", 0)
+        self.logger.debug("Got elasticsearch hits", extra={"num_of_hits": num_of_hits})
+        if num_of_hits > size:
+            self.logger.warning(
+                f"Only the first {size} of {num_of_hits} hits were fetched, set stream or max_rows to fetch them all",
+                extra={"provider_id": self.provider_id},
+            )
+        return response.get("hits", {}).get("hits", [])
+
+    def _run_sql_page(self, query: str, fetch_size: int) -> ColumnarResults:
+        """
+        Run an SQL query, fetching only the first page of rows.
+
+        Returns:
+            ColumnarResults: The rows.
+        """
+        response = self.client.sql.query(query=query, fetch_size=fetch_size)
+        results = ColumnarResults([col["name"] for col in response["columns"]])
+        results.extend(response["rows"])
+        # the cursor is returned if there are more rows
+        cursor = response.get("cursor")
+        if cursor:
+            self.logger.warning(
+                f"Only the first {fetch_size} rows were fetched, set stream or max_rows to fetch them all",
+                extra={"provider_id": self.provider_id},
+            )
+            self.client.sql.clear_cursor(cursor=cursor)
         return results
 
-    def _run_eql_query(self, query: str | dict, index: str) -> list[str]:
+    def _run_aggregation_query(
+        self, query: str | dict, index: str, aggs: str | dict
+    ) -> dict:
+        """
+        Run aggregations over the documents that match the query, without fetching any hit.
+
+        Returns:
+            dict: The aggregations results (e.g. {"errors": {"doc_count": 42}}), by aggregation name.
+        """
         if isinstance(query, str):
             query = json.loads(query)
+        if isinstance(aggs, str):
+            aggs = json.loads(aggs)
 
-        response = self.client.search(index=index, query=query)
+        response = self.client.search(index=index, query=query, aggs=aggs, size=0)
         self.logger.debug(
-            "Got elasticsearch hits",
+            "Got elasticsearch aggregations",
             extra={
                 "num_of_hits": response.get("hits", {}).get("total", {}).get("value", 0)
             },
         )
-        if "hits" in response and "hits" in response["hits"]:
-            return response["hits"]["hits"]
-        return []
+        return response.get("aggregations", {})
 
 
 if __name__ == "__main__":
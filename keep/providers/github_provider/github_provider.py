@@ -3,6 +3,7 @@ GithubProvider is a provider that interacts with GitHub.
 """
 
 import dataclasses
+import threading
 
 import pydantic
 from github import Github
@@ -10,6 +11,9 @@ from github import Github
 from keep.providers.base.base_provider import BaseProvider
 from keep.providers.models.provider_config import ProviderConfig
 
+# the most items a GitHub API page has
+PER_PAGE = 100
+
 
 @pydantic.dataclasses.dataclass
 class GithubProviderAuthConfig:
@@ -28,20 +32,28 @@ class GithubProviderAuthConfig:
 
 class GithubProvider(BaseProvider):
     """
-    GithubProvider is a class that provides a way to read data from AWS Cloudwatch.
+    GithubProvider is a class that provides a way to read data from GitHub.
     """
 
+    # access token -> client, shared by the providers so its connections are reused across runs
+    __clients = {}
+    __clients_lock = threading.Lock()
+
     def __init__(self, provider_id: str, config: ProviderConfig):
         super().__init__(provider_id, config)
         self.client = self.__generate_client()
 
     def __generate_client(self):
-        # Should get an access token once we have a real use case for GitHub provider
-        if self.authentication_config.access_token:
-            client = Github(self.authentication_config.access_token)
-        else:
-            client = Github()
-        return client
+        access_token = self.authentication_config.access_token
+        with GithubProvider.__clients_lock:
+            if access_token not in GithubProvider.__clients:
+                # Should get an access token once we have a real use case for GitHub provider
+                if access_token:
+                    client = Github(access_token, per_page=PER_PAGE)
+                else:
+                    client = Github(per_page=PER_PAGE)
+                GithubProvider.__clients[access_token] = client
+            return GithubProvider.__clients[access_token]
 
     def dispose(self):
         """
@@ -60,25 +72,54 @@ class GithubStarsProvider(GithubProvider):
     GithubStarsProvider is a class that provides a way to read stars from a GitHub repository.
     """
 
+    # (client, repository name) -> the repository, refreshed by conditional requests
+    __repositories = {}
+    __repositories_lock = threading.Lock()
+
     def __init__(self, provider_id: str, config: ProviderConfig):
         super().__init__(provider_id, config)
 
+    def __get_repository(self, repository: str):
+        key = (id(self.client), repository)
+        with GithubStarsProvider.__repositories_lock:
+            repo = GithubStarsProvider.__repositories.get(key)
+        if repo is None:
+            repo = self.client.get_repo(repository)
+            with GithubStarsProvider.__repositories_lock:
+                GithubStarsProvider.__repositories[key] = repo
+        # If-None-Match the repository's ETag, an unchanged repository (304) doesn't count against the rate limit
+        elif not repo.update():
+            self.logger.debug(f"Repository {repository} didn't change")
+        return repo
+
     def _query(
         self, repository: str, previous_stars_count: int = 0, **kwargs: dict
     ) -> dict:
-        repo = self.client.get_repo(repository)
+        repo = self.__get_repository(repository)
         stars_count = repo.stargazers_count
         new_stargazers = []
 
         if not previous_stars_count:
             previous_stars_count = 0
+        previous_stars_count = int(previous_stars_count)
 
         self.logger.debug(f"Previous stargazers: {previous_stars_count}")
-        self.logger.debug(f"New stargazers: {stars_count - int(previous_stars_count)}")
-        if previous_stars_count and int(previous_stars_count) > 0:
-            stargazers_with_dates = list(repo.get_stargazers_with_dates())[
-                int(previous_stars_count) :
-            ]
+        self.logger.debug(f"New stargazers: {stars_count - previous_stars_count}")
+        if previous_stars_count > 0 and stars_count > previous_stars_count:
+            # the stargazers are listed oldest first, fetch only the pages after the previous stargazers
+            stargazers = repo.get_stargazers_with_dates()
+            first_page, first_page_offset = divmod(previous_stars_count, PER_PAGE)
+            last_page = (stars_count - 1) // PER_PAGE
+            stargazers_with_dates = []
+            for page in range(first_page, last_page + 1):
+                stargazers_page = stargazers.get_page(page)
+                stargazers_with_dates.extend(
+                    stargazers_page[first_page_offset:]
+                    if page == first_page
+                    else stargazers_page
+                )
+                if len(stargazers_page) < PER_PAGE:
+                    break
             for stargazer in stargazers_with_dates:
                 new_stargazers.append(
                     {
@@ -5,7 +5,6 @@ Grafana Provider is a class that allows to ingest/digest data from Grafana.
 import dataclasses
 
 import pydantic
-import requests
 from grafana_api.alerting import Alerting
 from grafana_api.alerting_provisioning import AlertingProvisioning
 from grafana_api.model import APIEndpoints, APIModel
@@ -68,7 +67,7 @@ class GrafanaProvider(BaseProvider):
     def get_alerts(self, alert_id: str | None = None):
         api = f"{self.authentication_config.host}{APIEndpoints.ALERTING_PROVISIONING.value}/alert-rules"
         headers = {"Authorization": f"Bearer {self.authentication_config.token}"}
-        response = requests.get(api, headers=headers)
+        response = self.http_client.get(api, headers=headers)
         if not response.ok:
             self.logger.warn(
                 "Could not get alerts", extra={"response": response.json()}
@@ -85,7 +84,7 @@ class GrafanaProvider(BaseProvider):
         self.logger.info("Deploying alert")
         api = f"{self.authentication_config.host}{APIEndpoints.ALERTING_PROVISIONING.value}/alert-rules"
         headers = {"Authorization": f"Bearer {self.authentication_config.token}"}
-        response = requests.post(api, json=alert, headers=headers)
+        response = self.http_client.post(api, json=alert, headers=headers)
 
         if not response.ok:
             self.logger.warn(
@@ -3,7 +3,6 @@ HttpProvider is a class that provides a way to send HTTP requests.
 """
 import typing
 
-import requests
 from requests.exceptions import JSONDecodeError
 
 from keep.providers.base.base_provider import BaseProvider
@@ -79,19 +78,19 @@ class HttpProvider(BaseProvider):
             },
         )
         if method == "GET":
-            response = requests.get(
+            response = self.http_client.get(
                 url, headers=headers, params=params, proxies=proxies, **kwargs
             )
         elif method == "POST":
-            response = requests.post(
+            response = self.http_client.post(
                 url, headers=headers, json=body, proxies=proxies, **kwargs
             )
         elif method == "PUT":
-            response = requests.put(
+            response = self.http_client.put(
                 url, headers=headers, json=body, proxies=proxies, **kwargs
             )
         elif method == "DELETE":
-            response = requests.delete(
+            response = self.http_client.delete(
                 url, headers=headers, json=body, proxies=proxies, **kwargs
             )
         else:
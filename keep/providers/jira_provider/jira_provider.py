@@ -4,7 +4,6 @@ JiraProvider is a class that implements the BaseProvider interface for Jira upda
 import dataclasses
 
 import pydantic
-import requests
 
 from keep.exceptions.provider_exception import ProviderException
 from keep.providers.base.base_provider import BaseProvider
@@ -56,7 +55,7 @@ class JiraProvider(BaseProvider):
         email = kwargs.pop("email", "")
 
         request_url = f"https://{host}/rest/agile/1.0/board/{board_id}/issue"
-        response = requests.get(request_url, auth=(email, jira_api_token))
+        response = self.http_client.get(request_url, auth=(email, jira_api_token))
         if not response.ok:
             raise ProviderException(
                 f"{self.__class__.__name__} failed to fetch data from Jira: {response.text}"
@@ -0,0 +1,142 @@
+"""
+An online log template miner (Drain), clusters log lines by their template as they are read.
+"""
+import dataclasses
+import typing
+
+# a template token that varies between the lines of the cluster
+WILDCARD = "<*>"
+
+
+@dataclasses.dataclass
+class LogTemplate:
+    id: int
+    tokens: typing.List[str]
+    # the number of lines that matched the template
+    count: int = 0
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+
+@dataclasses.dataclass
+class _Node:
+    children: typing.Dict[str, "_Node"] = dataclasses.field(default_factory=dict)
+    # the templates of the lines that reach this leaf
+    template_ids: typing.List[int] = dataclasses.field(default_factory=list)
+
+
+class LogTemplateMiner:
+    """
+    Drain (https://jiemingzhu.github.io/pub/pjhe_icws2017.pdf) - lines are routed through a fixed depth prefix tree
+        (the number of tokens, then the first depth - 2 tokens) to a few candidate templates,
+        and added to the most similar one, or to a new template if none is similar enough.
+
+    Every line costs the tree depth plus the candidates in its leaf, instead of re-clustering all the lines.
+    The state (see get_state) is the templates, the tree is rebuilt from them.
+    """
+
+    def __init__(
+        self,
+        depth: int = 4,
+        similarity_threshold: float = 0.4,
+        max_children: int = 100,
+        state: dict = None,
+    ):
+        """
+        Args:
+            depth (int, optional): The depth of the prefix tree (at least 3), deeper trees have fewer candidates per leaf.
+            similarity_threshold (float, optional): The ratio of a line's tokens that have to match a template's.
+            max_children (int, optional): The children of a tree node, more tokens are routed to a wildcard child.
+            state (dict, optional): The state of a previous miner (see get_state).
+        """
+        if depth < 3:
+            raise ValueError("The template miner depth should be at least 3")
+        self.depth = depth
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        # id -> LogTemplate
+        self.templates = {}
+        # the number of tokens -> the prefix tree of the lines with that many tokens
+        self._root = {}
+        for template_state in (state or {}).get("templates", []):
+            template = LogTemplate(**template_state)
+            self.templates[template.id] = template
+            self.__add_to_tree(template)
+
+    def get_state(self) -> dict:
+        return {
+            "templates": [
+                dataclasses.asdict(template) for template in self.templates.values()
+            ]
+        }
+
+    def add_line(self, line: str) -> LogTemplate:
+        """
+        Add a line to its template (merging the template), or to a new template.
+
+        Returns:
+            LogTemplate: The line's template.
+        """
+        tokens = line.split()
+        template = self.__match(tokens)
+        if template is None:
+            template = LogTemplate(id=len(self.templates) + 1, tokens=tokens)
+            self.templates[template.id] = template
+            self.__add_to_tree(template)
+        else:
+            template.tokens = [
+                template_token if template_token == token else WILDCARD
+                for template_token, token in zip(template.tokens, tokens)
+            ]
+        template.count += 1
+        return template
+
+    def __get_prefix(self, tokens: typing.List[str]) -> typing.List[str]:
+        return tokens[: self.depth - 2]
+
+    def __add_to_tree(self, template: LogTemplate):
+        node = self._root.setdefault(len(template.tokens), _Node())
+        for token in self.__get_prefix(template.tokens):
+            if token in node.children:
+                node = node.children[token]
+            # tokens with digits are likely parameters (ids, sizes, times)
+            elif (
+                any(char.isdigit() for char in token)
+                or len(node.children) >= self.max_children
+            ):
+                node = node.children.setdefault(WILDCARD, _Node())
+            else:
+                node = node.children.setdefault(token, _Node())
+        node.template_ids.append(template.id)
+
+    def __match(self, tokens: typing.List[str]) -> LogTemplate | None:
+        node = self._root.get(len(tokens))
+        for token in self.__get_prefix(tokens):
+            if node is None:
+                return None
+            node = node.children.get(token) or node.children.get(WILDCARD)
+        if node is None:
+            return None
+        best_template, best_similarity = None, None
+        for template_id in node.template_ids:
+            template = self.templates[template_id]
+            similarity = self.__get_similarity(template.tokens, tokens)
+            if best_similarity is None or similarity > best_similarity:
+                best_template, best_similarity = template, similarity
+        if best_template is None or best_similarity[0] < self.similarity_threshold:
+            return None
+        return best_template
+
+    @staticmethod
+    def __get_similarity(
+        template_tokens: typing.List[str], tokens: typing.List[str]
+    ) -> tuple:
+        # the ratio of equal tokens, then the number of wildcards (prefer the more general template)
+        equal_tokens = sum(
+            template_token == token
+            for template_token, token in zip(template_tokens, tokens)
+        )
+        wildcards = template_tokens.count(WILDCARD)
+        return equal_tokens / len(tokens) if tokens else 1.0, wildcards
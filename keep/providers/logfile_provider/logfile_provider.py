@@ -1,21 +1,32 @@
 """
-LogfileProvider is a class that implements the BaseOutputProvider interface for Mock messages.
+LogfileProvider is a class that implements the BaseProvider interface for clustering log files lines.
 """
+import collections
 import datetime
 import io
+import mmap
 import os
 import re
-import uuid
+import typing
 
 import datefinder
-from logmine_pkg.log_mine import LogMine
+from logmine_pkg.clusterer import Clusterer
+from logmine_pkg.output import Output
 
 from keep.exceptions.provider_config_exception import ProviderConfigException
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.logfile_provider.log_template_miner import LogTemplateMiner
 from keep.providers.models.provider_config import ProviderConfig
+from keep.statestore.statestore import StateRetention
+
+# how many lines after a binary search probe are tried for a timestamp (e.g. after a stack trace)
+MAX_PROBE_LINES = 100
 
 
 class LogfileProvider(BaseProvider):
+    # incremental queries depend on the read offsets of the querying alert
+    COALESCE_QUERIES = False
+
     def __init__(self, provider_id: str, config: ProviderConfig):
         super().__init__(provider_id, config)
 
@@ -23,44 +34,265 @@ class LogfileProvider(BaseProvider):
         pass
 
     def _query(self, **kwargs):
-        """This is mock provider that just return the command output.
+        """Cluster the lines of a log file (by LogMine, or by their templates).
+
+        Args:
+            filename (str): The log file.
+            time (str, optional): Only lines from the last time window (e.g. 10m, 1h).
+            incremental (bool, optional): Only lines appended since the previous successful run.
+            timestamp_format (str, optional): The strptime format of the timestamp the lines start with,
+                e.g. "%Y-%m-%d %H:%M:%S" (if not set, the first date found in the line is used).
+            clustering (str, optional): logmine (the default) or templates (see _mine_templates, requires incremental).
+            depth (int, optional): The templates prefix tree depth (see LogTemplateMiner).
+            similarity_threshold (float, optional): The templates similarity threshold (see LogTemplateMiner).
 
         Returns:
-            _type_: _description_
+            list[str]: The clusters, "<count> <pattern>" sorted by count.
+            list[dict]: The templates of the lines (clustering: templates).
         """
-
         filename = kwargs.get("filename")
-        date = kwargs.get("time")
-
-        seconds_per_unit = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+        window = kwargs.get("time")
+        incremental = kwargs.get("incremental", False)
+        clustering = kwargs.get("clustering", "logmine")
+        if clustering not in ("logmine", "templates"):
+            raise ProviderConfigException(
+                f"Unknown clustering {clustering}, should be logmine or templates",
+                provider_id=self.provider_id,
+            )
+        if clustering == "templates" and not incremental:
+            # the templates' counts are kept between runs, every line should be added once
+            raise ProviderConfigException(
+                "Clustering by templates requires incremental reads",
+                provider_id=self.provider_id,
+            )
 
-        def convert_to_seconds(s):
-            return int(s[:-1]) * seconds_per_unit[s[-1]]
+        since = None
+        if window:
+            since = datetime.datetime.now().astimezone() - datetime.timedelta(
+                seconds=StateRetention.convert_to_seconds(window)
+            )
+        parse_timestamp = self._get_timestamp_parser(kwargs.get("timestamp_format"))
 
-        seconds = convert_to_seconds(date)
+        if incremental:
+            lines = self._read_new_lines(filename)
+        elif since:
+            lines = self._read_window_lines(filename, since, parse_timestamp)
+        else:
+            lines = self._read_lines(filename)
+        if since:
+            lines = self._filter_lines(lines, since, parse_timestamp)
+        if clustering == "templates":
+            return self._mine_templates(
+                filename,
+                lines,
+                depth=kwargs.get("depth", 4),
+                similarity_threshold=kwargs.get("similarity_threshold", 0.4),
+            )
+        return self._cluster_lines(lines)
 
+    def _open(self, filename: str) -> typing.BinaryIO:
         try:
-            with open(filename, "r") as f:
-                lines = f.readlines()
+            return open(filename, "rb")
         except FileNotFoundError:
             self.logger.exception(f"File {filename} not found")
             raise ProviderConfigException(
                 f"File {filename} not found", provider_id=self.provider_id
             )
 
+    @staticmethod
+    def _decode_lines(data: bytes) -> list[str]:
+        return data.decode("utf-8", errors="replace").split("\n")
+
+    def _read_lines(self, filename: str) -> list[str]:
+        with self._open(filename) as f:
+            return self._decode_lines(f.read())
+
+    def _read_new_lines(self, filename: str) -> list[str]:
+        """
+        Read the lines appended to the file since the previous successful run.
+
+        The file's inode and the offset read up to are kept in the alert's state (if the run succeeds),
+            a different inode (the file was rotated) or a smaller file (truncated) is read from the start.
+        A partial last line (still being written) is read by the next run.
+        """
+        checkpoint_key = f"logfile:{os.path.abspath(filename)}"
+        checkpoint = self.context_manager.get_state_value(checkpoint_key) or {}
+        with self._open(filename) as f:
+            stat = os.fstat(f.fileno())
+            offset = checkpoint.get("offset", 0)
+            if checkpoint.get("inode") != stat.st_ino:
+                if checkpoint:
+                    self.logger.info(f"File {filename} was rotated, reading it all")
+                offset = 0
+            elif stat.st_size < offset:
+                self.logger.info(f"File {filename} was truncated, reading it all")
+                offset = 0
+            f.seek(offset)
+            # lines appended while reading are read by the next run
+            data = f.read(stat.st_size - offset)
+        complete_size = data.rfind(b"\n") + 1
+        self.context_manager.set_pending_state_value(
+            checkpoint_key, {"inode": stat.st_ino, "offset": offset + complete_size}
+        )
+        self.logger.debug(
+            f"Read {complete_size} new bytes of {filename}",
+            extra={"offset": offset},
+        )
+        return self._decode_lines(data[:complete_size])
+
+    def _read_window_lines(
+        self,
+        filename: str,
+        since: datetime.datetime,
+        parse_timestamp: typing.Callable[[str], datetime.datetime | None],
+    ) -> list[str]:
+        """
+        Read the lines from the first line after since, found by a binary search over the (time ordered) file.
+
+        Only the timestamps of the probed lines are parsed, so the last minutes of a large file
+            read a few pages of it instead of all of it.
+        """
+        with self._open(filename) as f:
+            if not os.fstat(f.fileno()).st_size:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # the first position whose next timestamped line is after since
+                low, high = 0, len(mm)
+                while low < high:
+                    middle = (low + high) // 2
+                    if self._is_after_since(mm, middle, since, parse_timestamp):
+                        high = middle
+                    else:
+                        low = middle + 1
+                start = self._get_line_start(mm, low)
+                self.logger.debug(
+                    f"Reading {len(mm) - start} bytes of {filename}",
+                    extra={"offset": start},
+                )
+                return self._decode_lines(mm[start:])
+
+    @staticmethod
+    def _get_line_start(mm: mmap.mmap, position: int) -> int:
+        """
+        Get the start of the first line at or after the position.
+        """
+        if position == 0:
+            return 0
+        newline = mm.find(b"\n", position - 1)
+        return len(mm) if newline == -1 else newline + 1
+
+    def _is_after_since(
+        self,
+        mm: mmap.mmap,
+        position: int,
+        since: datetime.datetime,
+        parse_timestamp: typing.Callable[[str], datetime.datetime | None],
+    ) -> bool:
+        line_start = self._get_line_start(mm, position)
+        for _ in range(MAX_PROBE_LINES):
+            if line_start >= len(mm):
+                return True
+            line_end = mm.find(b"\n", line_start)
+            if line_end == -1:
+                line_end = len(mm)
+            timestamp = parse_timestamp(
+                mm[line_start:line_end].decode("utf-8", errors="replace")
+            )
+            if timestamp is not None:
+                return self._is_after(timestamp, since)
+            line_start = line_end + 1
+        # no timestamp near the position, read from it (the lines are filtered anyway)
+        return True
+
+    @staticmethod
+    def _is_after(timestamp: datetime.datetime, since: datetime.datetime) -> bool:
+        # timestamps without a timezone are local time
+        return timestamp > (since if timestamp.tzinfo else since.replace(tzinfo=None))
+
+    @staticmethod
+    def _get_timestamp_parser(
+        timestamp_format: str = None,
+    ) -> typing.Callable[[str], datetime.datetime | None]:
+        if not timestamp_format:
+
+            def parse_timestamp(line):
+                # try the first one
+                return next(datefinder.find_dates(line), None)
+
+            return parse_timestamp
+
+        # the timestamp is the line's first words, as many as in the format
+        words = len(timestamp_format.split())
+
+        def parse_timestamp(line):
+            try:
+                return datetime.datetime.strptime(
+                    " ".join(line.split(maxsplit=words)[:words]), timestamp_format
+                )
+            except ValueError:
+                return None
+
+        return parse_timestamp
+
+    def _filter_lines(
+        self,
+        lines: typing.Iterable[str],
+        since: datetime.datetime,
+        parse_timestamp: typing.Callable[[str], datetime.datetime | None],
+    ) -> list[str]:
+        """
+        Get the lines after since.
+        """
         relevant_lines = []
-        for l in lines:
-            # try the first one
-            date = list(datefinder.find_dates(l))[0]
-            if date + datetime.timedelta(seconds=seconds) > datetime.datetime.now():
-                relevant_lines.append(l)
-
-        tmp_filename = str(uuid.uuid4())
-        with open(tmp_filename, "w") as f:
-            f.writelines(relevant_lines)
+        timestamp = None
+        for line in lines:
+            # lines without a timestamp (e.g. a stack trace) are part of the previous line
+            timestamp = parse_timestamp(line) or timestamp
+            if timestamp is None:
+                continue
+            if self._is_after(timestamp, since):
+                relevant_lines.append(line)
+        return relevant_lines
+
+    def _mine_templates(
+        self,
+        filename: str,
+        lines: typing.Iterable[str],
+        depth: int,
+        similarity_threshold: float,
+    ) -> list[dict]:
+        """
+        Add the lines to the templates of the file, kept in the alert's state (if the run succeeds).
+
+        Returns:
+            list[dict]: The templates of the lines, sorted by the number of lines:
+                template, count (all the lines since the first run), new_lines (in this run)
+                and new (the template first appeared in this run).
+        """
+        state_key = f"logfile_templates:{os.path.abspath(filename)}"
+        miner = LogTemplateMiner(
+            depth=depth,
+            similarity_threshold=similarity_threshold,
+            state=self.context_manager.get_state_value(state_key),
+        )
+        known_templates = set(miner.templates)
+        new_lines = collections.Counter(
+            miner.add_line(line).id for line in lines if line.strip()
+        )
+        self.context_manager.set_pending_state_value(state_key, miner.get_state())
+        return [
+            {
+                "template": miner.templates[template_id].template,
+                "count": miner.templates[template_id].count,
+                "new_lines": lines_count,
+                "new": template_id not in known_templates,
+            }
+            for template_id, lines_count in new_lines.most_common()
+        ]
+
+    def _cluster_lines(self, lines: typing.Iterable[str]) -> list[str]:
         # TODO: make this configurable
         options = {
-            "file": ["-"],
             "max_dist": 0.2,
             "variables": [],
             "delimeters": "\\s+",
@@ -73,13 +305,9 @@ class LogfileProvider(BaseProvider):
             "highlight_patterns": False,
             "mask_variables": True,
             "highlight_variables": False,
-            "single_core": False,
         }
-        logmine = LogMine(
-            # Processor config
-            {k: options[k] for k in ("single_core",)},
-            # Cluster config
-            {
+        clusterer = Clusterer(
+            **{
                 k: options[k]
                 for k in (
                     "max_dist",
@@ -89,8 +317,9 @@ class LogfileProvider(BaseProvider):
                     "k1",
                     "k2",
                 )
-            },
-            # Output config
+            }
+        )
+        logmine_output = Output(
             {
                 k: options[k]
                 for k in (
@@ -101,19 +330,21 @@ class LogfileProvider(BaseProvider):
                     "highlight_patterns",
                     "highlight_variables",
                 )
-            },
+            }
         )
         try:
+            # the lines are clustered in memory, as they are read
+            clusters = clusterer.find(line for line in lines if line.strip())
             buffer = io.StringIO()
-            logmine.output.set_output_file(file=buffer)
-            logmine.run(files=[tmp_filename])
+            logmine_output.set_output_file(file=buffer)
+            logmine_output.out(clusters)
             buffer.seek(0)
             output = buffer.readlines()
         except Exception as e:
             self.logger.exception(f"Error while running logmine: {e}")
-            raise ProviderConfigException(f"Error while running logmine: {e}", p)
-        finally:
-            os.unlink(tmp_filename)
+            raise ProviderConfigException(
+                f"Error while running logmine: {e}", provider_id=self.provider_id
+            )
         output = [self._remove_ansi(o).replace("\n", "") for o in output]
         return output
 
@@ -16,10 +16,12 @@ class ProviderConfig:
     Args:
         description (Optional[str]): The description of the provider.
         authentication (dict): The configuration for the provider.
+        pool (Optional[dict]): The connection pool configuration, for providers that pool connections (see ConnectionPoolConfig).
     """
 
     authentication: Optional[dict]
     description: Optional[str] = None
+    pool: Optional[dict] = None
 
     def __post_init__(self):
         if not self.authentication:
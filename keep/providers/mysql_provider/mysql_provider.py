@@ -4,11 +4,18 @@ MysqlProvider is a class that provides a way to read data from MySQL.
 
 import dataclasses
 import os
+import threading
 
 import mysql.connector
 import pydantic
 
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.base.connection_pool import ConnectionPool, ConnectionPoolConfig
+from keep.providers.base.results_stream import (
+    DEFAULT_CHUNK_SIZE,
+    MaxRowsExceeded,
+    ResultsStream,
+)
 from keep.providers.models.provider_config import ProviderConfig
 
 
@@ -31,28 +38,55 @@ class MysqlProviderAuthConfig:
 class MysqlProvider(BaseProvider):
     def __init__(self, provider_id: str, config: ProviderConfig):
         super().__init__(provider_id, config)
-        self.client = None
-
-    def __generate_client(self) -> mysql.connector.CMySQLConnection:
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        # created on first use, the provider (and its pool) is shared by all the steps/actions using the same config
+        with self._pool_lock:
+            if not self._pool:
+                self._pool = ConnectionPool(
+                    name=self.provider_id,
+                    connect=self.__generate_client,
+                    close=lambda client: client.close(),
+                    is_healthy=self.__is_client_healthy,
+                    config=self.pool_config,
+                )
+            return self._pool
+
+    def __generate_client(self) -> mysql.connector.MySQLConnection:
         """
         Generates a MySQL client.
 
         Returns:
-            mysql.connector.CMySQLConnection: MySQL Client
+            mysql.connector.MySQLConnection: MySQL Client
         """
         client = mysql.connector.connect(
             user=self.authentication_config.username,
             password=self.authentication_config.password,
             host=self.authentication_config.host,
             database=self.authentication_config.database,
+            # pooled connections shouldn't keep a transaction (and its snapshot) open between queries
+            autocommit=True,
         )
         return client
 
+    @staticmethod
+    def __is_client_healthy(client) -> bool:
+        client.ping()
+        return True
+
     def dispose(self):
+        if not self._pool:
+            return
         try:
-            self.client.close()
+            self._pool.close()
         except Exception:
-            self.logger.exception("Error closing MySQL connection")
+            self.logger.exception("Error closing MySQL connections")
+
+    def get_connection_stats(self) -> dict:
+        return self._pool.get_stats() if self._pool else {}
 
     def validate_config(self):
         """
@@ -61,29 +95,80 @@ class MysqlProvider(BaseProvider):
         self.authentication_config = MysqlProviderAuthConfig(
             **self.config.authentication
         )
+        self.pool_config = ConnectionPoolConfig.from_config(self.config.pool)
 
-    def _query(self, **kwargs: dict) -> list | tuple:
+    def _query(self, **kwargs: dict) -> list | tuple | ResultsStream:
         """
         Executes a query against the MySQL database.
 
+        Args:
+            query (str): The query, formatted with the rest of the kwargs.
+            single_row (bool): Return only the first row.
+            stream (bool): Return a ResultsStream that fetches the rows in chunks (using an unbuffered cursor)
+                instead of fetching all of them.
+            chunk_size (int): How many rows a stream fetches at a time.
+            max_rows (int): Fail the query if it returns more than max_rows rows.
+
         Returns:
-            list | tuple: list of results or single result if single_row is True
+            list | tuple | ResultsStream: list of results, single result if single_row is True
+                or a stream of results if stream is True
         """
-        client = self.__generate_client()
-        cursor = client.cursor()
-
         query = kwargs.pop("query")
+        single_row = kwargs.pop("single_row", False)
+        stream = kwargs.pop("stream", False)
+        chunk_size = int(kwargs.pop("chunk_size", None) or DEFAULT_CHUNK_SIZE)
+        max_rows = kwargs.pop("max_rows", None)
+        max_rows = int(max_rows) if max_rows is not None else None
         formatted_query = query.format(**kwargs)
 
-        cursor.execute(formatted_query)
-        results = cursor.fetchall()
-
-        if kwargs.get("single_row"):
+        if stream and not single_row:
+            return self.__stream_query(formatted_query, chunk_size, max_rows)
+
+        with self.pool.connection() as client:
+            cursor = client.cursor()
+            cursor.execute(formatted_query)
+            if max_rows is None:
+                results = cursor.fetchall()
+            else:
+                # don't materialize more than max_rows + 1 rows, the connection (with the unread rows) is discarded
+                results = cursor.fetchmany(max_rows + 1)
+                if len(results) > max_rows:
+                    raise MaxRowsExceeded(
+                        f"Query results of {self.provider_id} exceed max_rows ({max_rows})"
+                    )
+            cursor.close()
+
+        if single_row:
             return results[0]
-
-        cursor.close()
         return results
 
+    def __stream_query(
+        self, query: str, chunk_size: int, max_rows: int | None
+    ) -> ResultsStream:
+        # the query is executed now (so errors are raised by the step), the rows are fetched as the stream is consumed
+        client = self.pool.checkout()
+        try:
+            cursor = client.cursor(buffered=False)
+            cursor.execute(query)
+        except BaseException:
+            self.pool.discard(client, "closed_broken")
+            raise
+
+        def on_close(exhausted: bool):
+            if exhausted:
+                cursor.close()
+                self.pool.checkin(client)
+            else:
+                # the connection still has unread rows
+                self.pool.discard(client)
+
+        return ResultsStream(
+            fetch_chunk=lambda: cursor.fetchmany(chunk_size),
+            on_close=on_close,
+            max_rows=max_rows,
+            name=self.provider_id,
+        )
+
 
 if __name__ == "__main__":
     config = ProviderConfig(
@@ -5,7 +5,6 @@ NewrelicProvider is a provider that provides a way to interact with New Relic.
 import dataclasses
 
 import pydantic
-import requests
 
 from keep.exceptions.provider_config_exception import ProviderConfigException
 from keep.exceptions.provider_exception import ProviderException
@@ -69,7 +68,7 @@ class NewrelicProvider(BaseProvider):
         )
         payload = {"query": query}
 
-        response = requests.post(
+        response = self.http_client.post(
             new_relic_api,
             headers={"Api-Key": self.newrelic_config.api_key},
             json=payload,
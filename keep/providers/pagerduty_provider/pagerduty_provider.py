@@ -5,7 +5,6 @@ import typing
 import uuid
 
 import pydantic
-import requests
 
 from keep.exceptions.provider_config_exception import ProviderConfigException
 from keep.providers.base.base_provider import BaseProvider
@@ -94,7 +93,9 @@ class PagerdutyProvider(BaseProvider):
 
         url = "https://events.pagerduty.com//v2/enqueue"
 
-        result = requests.post(url, json=self._build_alert(title, alert_body, dedup))
+        result = self.http_client.post(
+            url, json=self._build_alert(title, alert_body, dedup)
+        )
 
         self.logger.debug("Alert status: %s", result.status_code)
         self.logger.debug("Alert response: %s", result.text)
@@ -130,7 +131,7 @@ class PagerdutyProvider(BaseProvider):
             }
         }
 
-        r = requests.post(url, headers=headers, data=json.dumps(payload))
+        r = self.http_client.post(url, headers=headers, data=json.dumps(payload))
 
         print(f"Status Code: {r.status_code}")
         print(r.json())
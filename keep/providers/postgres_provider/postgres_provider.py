@@ -4,11 +4,15 @@ PostgresProvider is a class that provides a way to read data from Postgres and w
 
 import dataclasses
 import os
+import threading
 
 import psycopg2
 import pydantic
 
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.base.connection_pool import ConnectionPool, ConnectionPoolConfig
+from keep.providers.base.results_stream import DEFAULT_CHUNK_SIZE, ResultsStream
+from keep.providers.base.server_side_cursor import stream_server_side_cursor
 from keep.providers.models.provider_config import ProviderConfig
 
 
@@ -38,7 +42,22 @@ class PostgresProviderAuthConfig:
 class PostgresProvider(BaseProvider):
     def __init__(self, provider_id: str, config: ProviderConfig):
         super().__init__(provider_id, config)
-        self.conn = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        # created on first use, the provider (and its pool) is shared by all the steps/actions using the same config
+        with self._pool_lock:
+            if not self._pool:
+                self._pool = ConnectionPool(
+                    name=self.provider_id,
+                    connect=self.__init_connection,
+                    close=lambda conn: conn.close(),
+                    is_healthy=self.__is_connection_healthy,
+                    config=self.pool_config,
+                )
+            return self._pool
 
     def __init_connection(self):
         """
@@ -54,14 +73,28 @@ class PostgresProvider(BaseProvider):
             host=self.authentication_config.host,
             port=self.authentication_config.port,
         )
-        self.conn = conn
+        # pooled connections shouldn't keep a transaction open between queries
+        conn.autocommit = True
         return conn
 
+    @staticmethod
+    def __is_connection_healthy(conn) -> bool:
+        if conn.closed:
+            return False
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        return True
+
     def dispose(self):
+        if not self._pool:
+            return
         try:
-            self.conn.close()
+            self._pool.close()
         except Exception:
-            self.logger.exception("Error closing Postgres connection")
+            self.logger.exception("Error closing Postgres connections")
+
+    def get_connection_stats(self) -> dict:
+        return self._pool.get_stats() if self._pool else {}
 
     def validate_config(self):
         """
@@ -70,34 +103,41 @@ class PostgresProvider(BaseProvider):
         self.authentication_config = PostgresProviderAuthConfig(
             **self.config.authentication
         )
+        self.pool_config = ConnectionPoolConfig.from_config(self.config.pool)
 
-    def _query(self, **kwargs: dict) -> list | tuple:
+    def _query(self, **kwargs: dict) -> list | tuple | ResultsStream:
         """
         Executes a query against the Postgres database.
 
+        Args:
+            query (str): The query.
+            stream (bool): Return a ResultsStream that fetches the rows in chunks (using a server side cursor).
+            chunk_size (int): How many rows a stream fetches at a time.
+            max_rows (int): Fail a stream once it read more than max_rows rows.
+
         Returns:
-            list | tuple: list of results or single result if single_row is True
+            list | tuple | ResultsStream: list of results or a stream of results if stream is True
         """
         query = kwargs.get("query")
         if not query:
             raise ValueError("Query is required")
 
-        conn = self.__init_connection()
-        try:
+        if kwargs.get("stream"):
+            return stream_server_side_cursor(
+                self.pool,
+                query,
+                chunk_size=int(kwargs.get("chunk_size") or DEFAULT_CHUNK_SIZE),
+                max_rows=kwargs.get("max_rows"),
+                name=self.provider_id,
+            )
+
+        with self.pool.connection() as conn:
             with conn.cursor() as cur:
-                # Open a cursor to perform database operations
-                cur = conn.cursor()
                 # Execute a simple query
                 cur.execute(query)
                 # Fetch the results
                 results = cur.fetchall()
-                # Close the cursor and connection
-                cur.close()
-                conn.close()
-            return list(results)
-        finally:
-            # Close the database connection
-            conn.close()
+        return list(results)
 
     def notify(self, **kwargs):
         """
@@ -108,20 +148,11 @@ class PostgresProvider(BaseProvider):
         if not query:
             raise ValueError("Query is required")
 
-        conn = self.__init_connection()
-        try:
+        # the pooled connections are in autocommit mode
+        with self.pool.connection() as conn:
             with conn.cursor() as cur:
-                # Open a cursor to perform database operations
-                cur = conn.cursor()
                 # Execute a simple query
                 cur.execute(query)
-                # Close the cursor and connection
-                cur.close()
-                conn.commit()
-                conn.close()
-        finally:
-            # Close the database connection
-            conn.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+"""
+The providers registry module.
+"""
+import collections
+import hashlib
+import json
+import logging
+import threading
+
+from keep.providers.base.base_provider import BaseProvider
+from keep.providers.providers_factory import ProvidersFactory
+
+
+class ProvidersRegistry:
+    """
+    Shares provider instances (and their connections) between steps, actions, alerts and interval runs.
+
+    Providers are keyed by (provider id, provider type, config hash) and are reference counted,
+        a provider is disposed once nothing references it anymore (e.g. its alerts were re-parsed after a config change)
+        or when the registry is disposed (on shutdown).
+    """
+
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    @staticmethod
+    def get_instance() -> "ProvidersRegistry":
+        with ProvidersRegistry.__instance_lock:
+            if ProvidersRegistry.__instance is None:
+                ProvidersRegistry.__instance = ProvidersRegistry()
+            return ProvidersRegistry.__instance
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        # provider key -> provider
+        self._providers = {}
+        # provider key -> number of steps/actions referencing the provider
+        self._references = {}
+        # id(provider) -> provider key
+        self._keys = {}
+
+    @staticmethod
+    def get_provider_key(
+        provider_id: str, provider_type: str, provider_config: dict
+    ) -> tuple:
+        config_hash = hashlib.sha256(
+            json.dumps(provider_config, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return provider_id, provider_type, config_hash
+
+    def acquire(
+        self, provider_id: str, provider_type: str, provider_config: dict
+    ) -> BaseProvider:
+        """
+        Get a (shared) provider instance, creating it if needed.
+
+        Args:
+            provider_id (str): The provider id.
+            provider_type (str): The provider type.
+            provider_config (dict): The provider configuration.
+
+        Returns:
+            BaseProvider: The provider, must be released with release() when it's no longer used.
+        """
+        key = self.get_provider_key(provider_id, provider_type, provider_config)
+        with self._lock:
+            provider = self._providers.get(key)
+            if provider is None:
+                provider = ProvidersFactory.get_provider(
+                    provider_id, provider_type, provider_config
+                )
+                self._providers[key] = provider
+                self._references[key] = 0
+                self._keys[id(provider)] = key
+                self.logger.debug(
+                    "Provider created",
+                    extra={"provider_id": provider_id, "provider_type": provider_type},
+                )
+            self._references[key] += 1
+            return provider
+
+    def release(self, provider: BaseProvider):
+        """
+        Release a provider acquired with acquire(), disposing it if it's no longer referenced.
+
+        Args:
+            provider (BaseProvider): The provider.
+        """
+        with self._lock:
+            key = self._keys.get(id(provider))
+            if key is None:
+                # not a shared provider
+                self.__dispose_provider(provider)
+                return
+            self._references[key] -= 1
+            if self._references[key] <= 0:
+                self.__dispose(key)
+
+    def dispose(self):
+        """
+        Dispose all the providers (e.g. on shutdown).
+        """
+        with self._lock:
+            for key in list(self._providers.keys()):
+                self.__dispose(key)
+
+    def __dispose(self, key: tuple):
+        provider = self._providers.pop(key)
+        del self._references[key]
+        del self._keys[id(provider)]
+        self.logger.debug(
+            "Disposing provider",
+            extra={"provider_id": key[0], "provider_type": key[1]},
+        )
+        self.__dispose_provider(provider)
+
+    def __dispose_provider(self, provider: BaseProvider):
+        try:
+            provider.dispose()
+        except Exception:
+            self.logger.exception(
+                "Error disposing provider", extra={"provider_id": provider.provider_id}
+            )
+
+    def get_stats(self) -> dict:
+        """
+        Get the open providers (connections) stats.
+
+        Returns:
+            dict: The number of open providers, per provider type, how many steps/actions reference them
+                and the connections stats of the providers that keep connections.
+        """
+        with self._lock:
+            connections = {}
+            for provider in self._providers.values():
+                connection_stats = provider.get_connection_stats()
+                if connection_stats:
+                    connections[provider.provider_id] = connection_stats
+            return {
+                "open_providers": len(self._providers),
+                "open_providers_by_type": dict(
+                    collections.Counter(key[1] for key in self._providers)
+                ),
+                "provider_references": sum(self._references.values()),
+                "connections": connections,
+            }
@@ -4,6 +4,7 @@ PsqlProvider is a class that provides a way to read data from Postgres.
 
 import dataclasses
 import os
+import threading
 from typing import List
 
 import pydantic
@@ -11,6 +12,9 @@ from psycopg2 import connect
 
 from keep.exceptions.provider_exception import ProviderException
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.base.connection_pool import ConnectionPool, ConnectionPoolConfig
+from keep.providers.base.results_stream import DEFAULT_CHUNK_SIZE, ResultsStream
+from keep.providers.base.server_side_cursor import stream_server_side_cursor
 from keep.providers.models.provider_config import ProviderConfig
 
 
@@ -41,6 +45,36 @@ class PsqlProviderAuthConfig:
 class PsqlProvider(BaseProvider):
     def __init__(self, provider_id: str, config: ProviderConfig):
         super().__init__(provider_id, config)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        # created on first use, the provider (and its pool) is shared by all the steps/actions using the same config
+        with self._pool_lock:
+            if not self._pool:
+                self._pool = ConnectionPool(
+                    name=self.provider_id,
+                    connect=self.__connect,
+                    close=lambda conn: conn.close(),
+                    is_healthy=self.__is_connection_healthy,
+                    config=self.pool_config,
+                )
+            return self._pool
+
+    def __connect(self):
+        conn = connect(**dataclasses.asdict(self.authentication_config))
+        # pooled connections shouldn't keep a transaction open between queries
+        conn.autocommit = True
+        return conn
+
+    @staticmethod
+    def __is_connection_healthy(conn) -> bool:
+        if conn.closed:
+            return False
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        return True
 
     def validate_config(self):
         """
@@ -49,31 +83,46 @@ class PsqlProvider(BaseProvider):
         self.authentication_config = PsqlProviderAuthConfig(
             **self.config.authentication
         )
+        self.pool_config = ConnectionPoolConfig.from_config(self.config.pool)
 
     def dispose(self):
         """
-        No need to dispose of anything, so just do nothing.
+        Close the pooled connections.
         """
-        pass
+        if self._pool:
+            self._pool.close()
+
+    def get_connection_stats(self) -> dict:
+        return self._pool.get_stats() if self._pool else {}
 
     def fetch_query(self, sql_query: str, fetch_one: bool) -> List[tuple] | tuple:
-        postgres_config = dataclasses.asdict(self.authentication_config)
-        with connect(**postgres_config) as conn:
+        with self.pool.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql_query)
                 res = cur.fetchone() if fetch_one else cur.fetchall()
                 return res
 
-    def _query(self, **kwargs: dict) -> List[tuple] | tuple:
+    def _query(self, **kwargs: dict) -> List[tuple] | tuple | ResultsStream:
         """
         Executes a query against the Postgres database.
 
+        Args:
+            query (str): The query, formatted with the rest of the kwargs.
+            single_row (bool): Return only the first row.
+            stream (bool): Return a ResultsStream that fetches the rows in chunks (using a server side cursor).
+            chunk_size (int): How many rows a stream fetches at a time.
+            max_rows (int): Fail a stream once it read more than max_rows rows.
+
         Returns:
-            list | tuple: list of results or single result if single_row is True
+            list | tuple | ResultsStream: list of results, single result if single_row is True
+                or a stream of results if stream is True
         """
 
         query = kwargs.pop("query")
         fetch_all = kwargs.get("single_row", False)
+        stream = kwargs.pop("stream", False)
+        chunk_size = int(kwargs.pop("chunk_size", None) or DEFAULT_CHUNK_SIZE)
+        max_rows = kwargs.pop("max_rows", None)
 
         if not query:
             raise ProviderException(
@@ -81,6 +130,10 @@ class PsqlProvider(BaseProvider):
             )
 
         formatted_query = query.format(**kwargs)
+        if stream and not fetch_all:
+            return stream_server_side_cursor(
+                self.pool, formatted_query, chunk_size, max_rows, name=self.provider_id
+            )
         results = self.fetch_query(formatted_query, fetch_all)
 
         return results
@@ -1,7 +1,6 @@
 import dataclasses
 
 import pydantic
-import requests
 
 from keep.exceptions.provider_exception import ProviderException
 from keep.providers.base.base_provider import BaseProvider
@@ -49,7 +48,7 @@ class PushoverProvider(BaseProvider):
         """
         self.logger.debug("Notifying alert message to Pushover")
         message = kwargs.pop("message", "")
-        resp = requests.post(
+        resp = self.http_client.post(
             "https://api.pushover.net/1/messages.json",
             data={
                 "token": self.authentication_config.token,
@@ -4,7 +4,6 @@ ResendProvider is a class that implements the the Resend API and allows email se
 import dataclasses
 
 import pydantic
-import requests
 
 from keep.providers.base.base_provider import BaseProvider
 from keep.providers.models.provider_config import ProviderConfig
@@ -52,7 +51,7 @@ class ResendProvider(BaseProvider):
             },
         )
         # until https://github.com/resendlabs/resend-python/pull/37/files is merged
-        response = requests.post(
+        response = self.http_client.post(
             f"{self.RESEND_API_URL}/emails",
             json={
                 "from": _from,
@@ -4,7 +4,6 @@ SentryProvider is a class that provides a way to read data from Sentry.
 import dataclasses
 
 import pydantic
-import requests
 
 from keep.exceptions.provider_config_exception import ProviderConfigException
 from keep.providers.base.base_provider import BaseProvider
@@ -59,7 +58,7 @@ class SentryProvider(BaseProvider):
         project = kwargs.get("project")
 
         params = {"limit": 100}
-        response = requests.get(
+        response = self.http_client.get(
             self.get_events_url(project, time), headers=headers, params=params
         )
         response.raise_for_status()
@@ -4,7 +4,6 @@ SlackOutput is a class that implements the BaseOutputProvider interface for Slac
 import dataclasses
 
 import pydantic
-import requests
 
 from keep.exceptions.provider_exception import ProviderException
 from keep.providers.base.base_provider import BaseProvider
@@ -54,7 +53,7 @@ class SlackProvider(BaseProvider):
 
         if not message:
             message = blocks[0].get("text")
-        response = requests.post(
+        response = self.http_client.post(
             webhook_url,
             json={"text": message, "blocks": blocks},
         )
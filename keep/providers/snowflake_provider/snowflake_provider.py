@@ -3,6 +3,7 @@ SnowflakeProvider is a class that provides a way to read data from Snowflake.
 """
 
 import dataclasses
+import threading
 import typing
 
 import pydantic
@@ -13,6 +14,7 @@ from snowflake.connector.connection import SnowflakeConnection
 
 from keep.exceptions.provider_config_exception import ProviderConfigException
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.base.results_stream import DEFAULT_CHUNK_SIZE, ResultsStream
 from keep.providers.models.provider_config import ProviderConfig
 from keep.providers.providers_factory import ProvidersFactory
 
@@ -44,7 +46,16 @@ class SnowflakeProviderAuthConfig:
 class SnowflakeProvider(BaseProvider):
     def __init__(self, provider_id: str, config: ProviderConfig):
         super().__init__(provider_id, config)
-        self.client = self.__generate_client()
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> SnowflakeConnection:
+        # connect on first use, so parsing alerts doesn't open connections
+        with self._client_lock:
+            if not self._client:
+                self._client = self.__generate_client()
+            return self._client
 
     def __generate_client(self) -> SnowflakeConnection:
         """
@@ -75,10 +86,13 @@ class SnowflakeProvider(BaseProvider):
         return snowflake_connection
 
     def dispose(self):
+        if not self._client:
+            return
         try:
-            self.client.close()
+            self._client.close()
         except Exception:
             self.logger.exception("Error closing Snowflake connection")
+        self._client = None
 
     def validate_config(self):
         """
@@ -92,18 +106,37 @@ class SnowflakeProvider(BaseProvider):
             **self.config.authentication
         )
 
-    def _query(self, query: str, **kwargs: dict):
+    def _query(
+        self,
+        query: str,
+        stream: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_rows: int = None,
+        **kwargs: dict,
+    ):
         """
         Query snowflake using the given query
 
         Args:
             query (str): query to execute
+            stream (bool): return a ResultsStream that fetches the rows in chunks, instead of fetching all of them
+            chunk_size (int): how many rows a stream fetches at a time
+            max_rows (int): fail a stream once it read more than max_rows rows
 
         Returns:
-            list[tuple] | list[dict]: results of the query
+            list[tuple] | list[dict] | ResultsStream: results of the query
         """
         cursor = self.client.cursor()
-        return cursor.execute(query.format(**kwargs)).fetchall()
+        cursor.execute(query.format(**kwargs))
+        if not stream:
+            return cursor.fetchall()
+        chunk_size = int(chunk_size or DEFAULT_CHUNK_SIZE)
+        return ResultsStream(
+            fetch_chunk=lambda: cursor.fetchmany(chunk_size),
+            on_close=lambda exhausted: cursor.close(),
+            max_rows=max_rows,
+            name=self.provider_id,
+        )
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ SshProvider is a class that provides a way to execute SSH commands and get the o
 """
 import dataclasses
 import io
+import threading
 
 import pydantic
 from paramiko import AutoAddPolicy, RSAKey, SSHClient
@@ -56,7 +57,16 @@ class SshProviderAuthConfig:
 class SshProvider(BaseProvider):
     def __init__(self, provider_id: str, config: ProviderConfig):
         super().__init__(provider_id, config)
-        self.client = self.__generate_client()
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> SSHClient:
+        # connect on first use, so parsing alerts doesn't open connections
+        with self._client_lock:
+            if not self._client:
+                self._client = self.__generate_client()
+            return self._client
 
     def __generate_client(self) -> SSHClient:
         """
@@ -96,10 +106,13 @@ class SshProvider(BaseProvider):
         """
         Closes the SSH connection.
         """
+        if not self._client:
+            return
         try:
-            self.client.close()
+            self._client.close()
         except Exception as e:
             self.logger.error("Error closing SSH connection", extra={"error": str(e)})
+        self._client = None
 
     def validate_config(self):
         """
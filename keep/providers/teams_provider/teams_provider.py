@@ -4,7 +4,6 @@ TeamsProvider is a class that implements the BaseOutputProvider interface for Mi
 import dataclasses
 
 import pydantic
-import requests
 
 from keep.exceptions.provider_exception import ProviderException
 from keep.providers.base.base_provider import BaseProvider
@@ -55,7 +54,7 @@ class TeamsProvider(BaseProvider):
         themeColor = kwargs.pop("themeColor", None)
         sections = kwargs.pop("sections", [])
 
-        response = requests.post(
+        response = self.http_client.post(
             webhook_url,
             json={
                 "@type": typeCard,
@@ -4,7 +4,6 @@ TrelloOutput is a class that implements the BaseOutputProvider interface for Tre
 import dataclasses
 
 import pydantic
-import requests
 
 from keep.exceptions.provider_exception import ProviderException
 from keep.providers.base.base_provider import BaseProvider
@@ -59,7 +58,7 @@ class TrelloProvider(BaseProvider):
         filter = kwargs.pop("filter", "createCard")
 
         request_url = f"https://api.trello.com/1/boards/{board_id}/actions?key={trello_api_key}&token={trello_api_token}&filter={filter}"
-        response = requests.get(request_url)
+        response = self.http_client.get(request_url)
         if not response.ok:
             raise ProviderException(
                 f"{self.__class__.__name__} failed to fetch data from Trello: {response.text}"
@@ -1,7 +1,6 @@
 import dataclasses
 
 import pydantic
-import requests
 
 from keep.exceptions.provider_exception import ProviderException
 from keep.providers.base.base_provider import BaseProvider
@@ -64,7 +63,7 @@ class ZendutyProvider(BaseProvider):
         headers = {
             "Authorization": "Token " + self.authentication_config.api_key,
         }
-        resp = requests.post(
+        resp = self.http_client.post(
             url="https://www.zenduty.com/api/incidents/", json=body, headers=headers
         )
         assert resp.status == 201
@@ -0,0 +1,344 @@
+"""
+Per-alert schedules (interval or cron) and the scheduler that fires the alerts on their own cadence.
+"""
+import dataclasses
+import datetime
+import heapq
+import itertools
+import logging
+import random
+import time
+import typing
+
+from keep.statestore.statestore import StateRetention
+
+# (name, min, max) of the cron fields, day of week 7 is sunday as well as 0
+CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+)
+# how far ahead to look for the next cron match (e.g. "0 0 29 2 *" matches once in 4 years)
+CRON_MAX_LOOKAHEAD = datetime.timedelta(days=366 * 8)
+
+
+class CronExpression:
+    """
+    A standard 5 fields cron expression (minute hour day-of-month month day-of-week), in local time.
+
+    Supports *, values, ranges (1-5), steps (*/15, 0-30/10) and lists (1,15,30).
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(
+                f"Cron expression '{expression}' should have {len(CRON_FIELDS)} fields"
+            )
+        (
+            self.minutes,
+            self.hours,
+            self.days,
+            self.months,
+            self.weekdays,
+        ) = (
+            self.__parse_field(field, *cron_field)
+            for field, cron_field in zip(fields, CRON_FIELDS)
+        )
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        # when both are restricted a day matches either of them (as in cron)
+        self.days_restricted = fields[2] != "*"
+        self.weekdays_restricted = fields[4] != "*"
+
+    def __parse_field(self, field: str, name: str, low: int, high: int) -> set:
+        values = set()
+        for part in field.split(","):
+            range_part, _, step = part.partition("/")
+            try:
+                step = int(step) if step else 1
+                if range_part == "*":
+                    start, end = low, high
+                elif "-" in range_part:
+                    start, end = (int(value) for value in range_part.split("-", 1))
+                else:
+                    start = int(range_part)
+                    # e.g. 5/15 is 5-59/15
+                    end = high if step > 1 else start
+            except ValueError:
+                raise ValueError(
+                    f"Invalid {name} '{part}' in cron expression '{self.expression}'"
+                )
+            if step < 1 or not low <= start <= end <= high:
+                raise ValueError(
+                    f"Invalid {name} '{part}' in cron expression '{self.expression}'"
+                )
+            values.update(range(start, end + 1, step))
+        return values
+
+    def __day_matches(self, date: datetime.datetime) -> bool:
+        # cron weeks start on sunday (0)
+        day_matches = date.day in self.days
+        weekday_matches = (date.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return day_matches or weekday_matches
+        return day_matches and weekday_matches
+
+    def next_run(self, after: float) -> float:
+        """
+        Get the first time (timestamp) after the given time that matches the expression.
+        """
+        date = datetime.datetime.fromtimestamp(after).replace(
+            second=0, microsecond=0
+        ) + datetime.timedelta(minutes=1)
+        max_date = date + CRON_MAX_LOOKAHEAD
+        while date <= max_date:
+            if date.month not in self.months:
+                date = (
+                    date.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)
+                ).replace(day=1)
+            elif not self.__day_matches(date):
+                date = date.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif date.hour not in self.hours:
+                date = date.replace(minute=0) + datetime.timedelta(hours=1)
+            elif date.minute not in self.minutes:
+                date += datetime.timedelta(minutes=1)
+            else:
+                return date.timestamp()
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+
+@dataclasses.dataclass
+class AlertSchedule:
+    """
+    When an alert runs.
+
+    Args:
+        interval (int): run every interval seconds.
+        cron (str): run by a cron expression (see CronExpression).
+        jitter (int): delay every run by a random 0 to jitter seconds, so alerts with the same schedule don't run all at once.
+    """
+
+    interval: typing.Optional[int] = None
+    cron: typing.Optional[str] = None
+    jitter: int = 0
+
+    def __post_init__(self):
+        if (self.interval is None) == (self.cron is None):
+            raise ValueError("A schedule should have either an interval or a cron")
+        if self.interval is not None and self.interval <= 0:
+            raise ValueError("A schedule interval should be positive")
+        self._cron_expression = CronExpression(self.cron) if self.cron else None
+        if self._cron_expression:
+            # fail on parsing instead of on scheduling
+            self._cron_expression.next_run(time.time())
+
+    @staticmethod
+    def from_config(schedule_config: dict, default_jitter: int = 0) -> "AlertSchedule":
+        """
+        Build the schedule from an alert's `schedule` config.
+            e.g. {"interval": "5m", "jitter": "10s"} or {"cron": "*/5 * * * *"}
+        """
+        interval = schedule_config.get("interval")
+        jitter = schedule_config.get("jitter")
+        return AlertSchedule(
+            interval=StateRetention.convert_to_seconds(interval)
+            if interval is not None
+            else None,
+            cron=schedule_config.get("cron"),
+            jitter=StateRetention.convert_to_seconds(jitter)
+            if jitter is not None
+            else default_jitter,
+        )
+
+    def next_run(self, previous_run: float, now: float) -> float:
+        """
+        Get the next (scheduled, without jitter) run time after now.
+
+        Intervals are counted from the previous scheduled run (not from when it finished), so runs don't drift.
+        """
+        if self._cron_expression:
+            return self._cron_expression.next_run(max(previous_run, now))
+        missed_runs = max(int((now - previous_run) // self.interval), 0)
+        return previous_run + (missed_runs + 1) * self.interval
+
+
+@dataclasses.dataclass
+class ScheduledAlert:
+    alert: typing.Any
+    schedule: typing.Optional[AlertSchedule]
+    # the scheduled run time (without jitter) and the time it actually runs (with jitter)
+    next_run: typing.Optional[float] = None
+    next_run_at: typing.Optional[float] = None
+    last_run_at: typing.Optional[float] = None
+    running: bool = False
+    runs: int = 0
+    skipped_runs: int = 0
+    last_lag: float = 0.0
+    max_lag: float = 0.0
+    # entries in the heap with an older version are stale (the alert was rescheduled or removed)
+    version: int = 0
+
+
+class AlertScheduler:
+    """
+    Fires every alert on its own schedule, using a heap of the alerts' next run times.
+
+    Alerts without a schedule use the default schedule (keep run --interval), or run once if there's none.
+    A run that is due while the alert's previous run is still running is skipped.
+    """
+
+    def __init__(self, default_schedule: AlertSchedule = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.default_schedule = default_schedule
+        # (next_run_at, sequence, alert key, version)
+        self._heap = []
+        self._sequence = itertools.count()
+        # alert key -> ScheduledAlert
+        self._scheduled_alerts = {}
+
+    @staticmethod
+    def __get_key(alert) -> tuple:
+        return (alert.alert_source, alert.alert_id)
+
+    def update(self, alerts: typing.Iterable, now: float):
+        """
+        Schedule new alerts, reschedule alerts whose schedule changed and unschedule removed alerts.
+
+        Args:
+            alerts (Iterable[Alert]): The current alerts.
+            now (float): The current time.
+        """
+        keys = set()
+        for alert in alerts:
+            key = self.__get_key(alert)
+            keys.add(key)
+            schedule = alert.alert_schedule or self.default_schedule
+            scheduled_alert = self._scheduled_alerts.get(key)
+            if scheduled_alert is None:
+                scheduled_alert = ScheduledAlert(alert=alert, schedule=schedule)
+                self._scheduled_alerts[key] = scheduled_alert
+                # the first run is right away (cron schedules wait for their time)
+                first_run = (
+                    schedule.next_run(now, now) if schedule and schedule.cron else now
+                )
+                self.__schedule(scheduled_alert, first_run)
+                continue
+            # the alert was reloaded (e.g. its file changed)
+            scheduled_alert.alert = alert
+            if schedule != scheduled_alert.schedule:
+                self.logger.info(
+                    f"Alert {alert.alert_id} schedule changed",
+                    extra={"schedule": schedule},
+                )
+                scheduled_alert.schedule = schedule
+                self.__schedule(
+                    scheduled_alert, schedule.next_run(now, now) if schedule else None
+                )
+        for key in list(self._scheduled_alerts.keys()):
+            if key not in keys:
+                # the heap entries are stale now, a running alert finishes its run
+                del self._scheduled_alerts[key]
+
+    def __schedule(self, scheduled_alert: ScheduledAlert, next_run: float | None):
+        scheduled_alert.version += 1
+        scheduled_alert.next_run = next_run
+        if next_run is None:
+            scheduled_alert.next_run_at = None
+            return
+        schedule = scheduled_alert.schedule
+        jitter = (
+            random.uniform(0, schedule.jitter) if schedule and schedule.jitter else 0
+        )
+        scheduled_alert.next_run_at = next_run + jitter
+        heapq.heappush(
+            self._heap,
+            (
+                scheduled_alert.next_run_at,
+                next(self._sequence),
+                self.__get_key(scheduled_alert.alert),
+                scheduled_alert.version,
+            ),
+        )
+
+    def pop_due(self, now: float) -> typing.List[ScheduledAlert]:
+        """
+        Get the alerts that should run now, and schedule their next runs.
+
+        Args:
+            now (float): The current time.
+
+        Returns:
+            List[ScheduledAlert]: The due alerts (marked as running, see finished).
+        """
+        due_alerts = []
+        while self._heap and self._heap[0][0] <= now:
+            run_at, _, key, version = heapq.heappop(self._heap)
+            scheduled_alert = self._scheduled_alerts.get(key)
+            if scheduled_alert is None or scheduled_alert.version != version:
+                continue
+            if scheduled_alert.running:
+                scheduled_alert.skipped_runs += 1
+                self.logger.warning(
+                    f"Alert {scheduled_alert.alert.alert_id} is still running, skipping its scheduled run",
+                    extra={"skipped_runs": scheduled_alert.skipped_runs},
+                )
+            else:
+                scheduled_alert.running = True
+                scheduled_alert.last_run_at = run_at
+                due_alerts.append(scheduled_alert)
+            schedule = scheduled_alert.schedule
+            self.__schedule(
+                scheduled_alert,
+                schedule.next_run(scheduled_alert.next_run, now) if schedule else None,
+            )
+        return due_alerts
+
+    def started(self, scheduled_alert: ScheduledAlert, now: float) -> float:
+        """
+        Record that a due alert started running (it may wait for a free worker after it's due).
+
+        Returns:
+            float: The schedule lag - how many seconds after its scheduled time the alert started.
+        """
+        lag = max(now - scheduled_alert.last_run_at, 0)
+        scheduled_alert.runs += 1
+        scheduled_alert.last_lag = lag
+        scheduled_alert.max_lag = max(scheduled_alert.max_lag, lag)
+        return lag
+
+    def finished(self, scheduled_alert: ScheduledAlert):
+        scheduled_alert.running = False
+
+    def get_next_run_at(self) -> float | None:
+        """
+        Get when the next alert is due, None if no alert is scheduled.
+        """
+        while self._heap:
+            _, _, key, version = self._heap[0]
+            scheduled_alert = self._scheduled_alerts.get(key)
+            if scheduled_alert is not None and scheduled_alert.version == version:
+                return self._heap[0][0]
+            heapq.heappop(self._heap)
+        return None
+
+    def get_stats(self) -> dict:
+        """
+        Get the per alert schedule stats.
+
+        Returns:
+            dict: alert id -> runs, skipped runs, last/max schedule lag (seconds) and the next run time.
+        """
+        return {
+            scheduled_alert.alert.alert_id: {
+                "runs": scheduled_alert.runs,
+                "skipped_runs": scheduled_alert.skipped_runs,
+                "last_lag": scheduled_alert.last_lag,
+                "max_lag": scheduled_alert.max_lag,
+                "next_run_at": scheduled_alert.next_run_at,
+            }
+            for scheduled_alert in self._scheduled_alerts.values()
+        }
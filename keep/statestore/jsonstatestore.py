@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+import typing
+
+from keep.statestore.statestore import (
+    ALERT_CONTEXT_PAYLOAD_KEYS,
+    BaseStateStore,
+    StateRetention,
+)
+
+# the alerts values are kept under this key, next to the alerts runs
+VALUES_KEY = "__values__"
+
+
+class JsonStateStore(BaseStateStore):
+    """
+    Keeps the whole state in memory and dumps it to a JSON file on every write.
+
+    This is the legacy (and default) format, see docs/platform/core/syntax/slate.mdx
+    """
+
+    def __init__(self, state_file: str, **kwargs):
+        super().__init__(**kwargs)
+        self.state_file = state_file
+        self.state = {}
+        self._lock = threading.Lock()
+        self.__load_state()
+
+    def __load_state(self):
+        if self.state_file:
+            try:
+                with open(self.state_file, "r") as f:
+                    self.state = json.load(f)
+            except Exception:
+                self.logger.warning("Failed to load state file, using empty state")
+                self.state = {}
+
+    def __dump_state(self):
+        with open(self.state_file, "w") as f:
+            json.dump(self.state, f, default=str)
+
+    def get_alert_runs(self, alert_id: str) -> typing.Sequence[dict]:
+        if alert_id == VALUES_KEY:
+            return []
+        return self.state.get(alert_id, [])
+
+    def get_last_alert_run(self, alert_id: str) -> dict:
+        if alert_id != VALUES_KEY and alert_id in self.state and self.state[alert_id]:
+            return self.state[alert_id][-1]
+        # no previous runs
+        return {}
+
+    def set_last_alert_run(
+        self, alert_id: str, alert_run: dict, retention: StateRetention = None
+    ) -> None:
+        with self._lock:
+            if alert_id not in self.state:
+                self.state[alert_id] = []
+            self.state[alert_id].append({**alert_run, "run_timestamp": time.time()})
+            if retention:
+                self.__compact(alert_id, retention)
+            self.__dump_state()
+
+    def __compact(self, alert_id: str, retention: StateRetention) -> int:
+        if alert_id not in self.state:
+            return 0
+        alert_runs = self.state[alert_id]
+        compacted = 0
+        if retention.max_age is not None:
+            min_run_timestamp = time.time() - retention.max_age
+            # runs from older versions of the state file don't have a timestamp, keep them
+            kept_runs = [
+                alert_run
+                for alert_run in alert_runs
+                if alert_run.get("run_timestamp") is None
+                or alert_run["run_timestamp"] >= min_run_timestamp
+            ]
+            compacted += len(alert_runs) - len(kept_runs)
+            alert_runs = kept_runs
+        if retention.max_runs is not None and len(alert_runs) > retention.max_runs:
+            compacted += len(alert_runs) - retention.max_runs
+            alert_runs = alert_runs[len(alert_runs) - retention.max_runs :]
+        if retention.max_context_runs is not None:
+            for alert_run in alert_runs[
+                : max(len(alert_runs) - retention.max_context_runs, 0)
+            ]:
+                alert_context = alert_run.get("alert_context") or {}
+                if any(key in alert_context for key in ALERT_CONTEXT_PAYLOAD_KEYS):
+                    alert_run["alert_context"] = {
+                        key: value
+                        for key, value in alert_context.items()
+                        if key not in ALERT_CONTEXT_PAYLOAD_KEYS
+                    }
+                    compacted += 1
+        if alert_runs:
+            self.state[alert_id] = alert_runs
+        else:
+            del self.state[alert_id]
+        return compacted
+
+    def compact(self, alert_id: str, retention: StateRetention) -> int:
+        with self._lock:
+            compacted = self.__compact(alert_id, retention)
+            if compacted:
+                self.__dump_state()
+        return compacted
+
+    def get_alert_ids(self) -> list[str]:
+        return [alert_id for alert_id in self.state.keys() if alert_id != VALUES_KEY]
+
+    def has_alert(self, alert_id: str) -> bool:
+        return alert_id != VALUES_KEY and alert_id in self.state
+
+    def get_value(
+        self, alert_id: str, key: str, default: typing.Any = None
+    ) -> typing.Any:
+        return self.state.get(VALUES_KEY, {}).get(alert_id, {}).get(key, default)
+
+    def set_value(self, alert_id: str, key: str, value: typing.Any) -> None:
+        with self._lock:
+            alert_values = self.state.setdefault(VALUES_KEY, {}).setdefault(
+                alert_id, {}
+            )
+            if value is None:
+                alert_values.pop(key, None)
+            else:
+                # stored as it would be loaded from the file (e.g. datetimes as strings)
+                alert_values[key] = json.loads(json.dumps(value, default=str))
+            self.__dump_state()
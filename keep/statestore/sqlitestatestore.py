@@ -0,0 +1,230 @@
+import json
+import sqlite3
+import threading
+import time
+import typing
+
+from keep.statestore.statestore import (
+    ALERT_CONTEXT_PAYLOAD_KEYS,
+    BaseStateStore,
+    StateRetention,
+)
+
+
+class SqliteAlertRuns(typing.Sequence):
+    """
+    A lazy, read-only view over the runs of a single alert.
+
+    Only the runs that are actually accessed (e.g. {{ state.<alert-id>.-1 }}) are loaded from the database.
+    """
+
+    def __init__(self, store: "SqliteStateStore", alert_id: str):
+        self.store = store
+        self.alert_id = alert_id
+
+    def __len__(self) -> int:
+        return self.store._count_alert_runs(self.alert_id)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.store._load_alert_runs(self.alert_id)[index]
+        # chevron tries to subscript with the raw (string) key first
+        if not isinstance(index, int):
+            raise TypeError("alert runs indices must be integers or slices")
+        length = len(self)
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError("alert run index out of range")
+        return self.store._load_alert_run_at(self.alert_id, index)
+
+    def __iter__(self):
+        return iter(self.store._load_alert_runs(self.alert_id))
+
+
+class SqliteStateStore(BaseStateStore):
+    """
+    Keeps the alerts state in an SQLite database (WAL mode).
+
+    Every run is a row indexed by (alert_id, run_timestamp), so appending a run doesn't rewrite the history
+        and fetching the last run is an indexed lookup.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS alert_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alert_id TEXT NOT NULL,
+            run_timestamp REAL NOT NULL,
+            alert_status TEXT,
+            alert_context TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_alert_runs_alert_id_run_timestamp
+            ON alert_runs (alert_id, run_timestamp);
+        CREATE TABLE IF NOT EXISTS alert_values (
+            alert_id TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            updated_timestamp REAL NOT NULL,
+            PRIMARY KEY (alert_id, key)
+        );
+    """
+
+    def __init__(self, state_file: str, **kwargs):
+        super().__init__(**kwargs)
+        self.state_file = state_file
+        self._lock = threading.RLock()
+        # the connection is shared between threads, access is serialized with the lock
+        self._conn = sqlite3.connect(
+            self.state_file, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+
+    def _execute(self, query: str, parameters: tuple = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(query, parameters).fetchall()
+
+    @staticmethod
+    def _row_to_alert_run(row: sqlite3.Row) -> dict:
+        return {
+            "alert_status": row["alert_status"],
+            "alert_context": json.loads(row["alert_context"])
+            if row["alert_context"]
+            else {},
+            "run_timestamp": row["run_timestamp"],
+        }
+
+    def _count_alert_runs(self, alert_id: str) -> int:
+        rows = self._execute(
+            "SELECT COUNT(*) AS runs FROM alert_runs WHERE alert_id = ?", (alert_id,)
+        )
+        return rows[0]["runs"]
+
+    def _load_alert_runs(self, alert_id: str) -> list[dict]:
+        rows = self._execute(
+            "SELECT alert_status, alert_context, run_timestamp FROM alert_runs WHERE alert_id = ? ORDER BY run_timestamp, id",
+            (alert_id,),
+        )
+        return [self._row_to_alert_run(row) for row in rows]
+
+    def _load_alert_run_at(self, alert_id: str, index: int) -> dict:
+        rows = self._execute(
+            "SELECT alert_status, alert_context, run_timestamp FROM alert_runs WHERE alert_id = ? ORDER BY run_timestamp, id LIMIT 1 OFFSET ?",
+            (alert_id, index),
+        )
+        if not rows:
+            raise IndexError("alert run index out of range")
+        return self._row_to_alert_run(rows[0])
+
+    def get_alert_runs(self, alert_id: str) -> typing.Sequence[dict]:
+        return SqliteAlertRuns(self, alert_id)
+
+    def get_last_alert_run(self, alert_id: str) -> dict:
+        rows = self._execute(
+            "SELECT alert_status, alert_context, run_timestamp FROM alert_runs WHERE alert_id = ? ORDER BY run_timestamp DESC, id DESC LIMIT 1",
+            (alert_id,),
+        )
+        # no previous runs
+        if not rows:
+            return {}
+        return self._row_to_alert_run(rows[0])
+
+    def set_last_alert_run(
+        self, alert_id: str, alert_run: dict, retention: StateRetention = None
+    ) -> None:
+        with self._lock:
+            self._execute(
+                "INSERT INTO alert_runs (alert_id, run_timestamp, alert_status, alert_context) VALUES (?, ?, ?, ?)",
+                (
+                    alert_id,
+                    time.time(),
+                    alert_run.get("alert_status"),
+                    json.dumps(alert_run.get("alert_context"), default=str),
+                ),
+            )
+            if retention:
+                self.compact(alert_id, retention)
+
+    def compact(self, alert_id: str, retention: StateRetention) -> int:
+        compacted = 0
+        with self._lock:
+            if retention.max_age is not None:
+                compacted += self._conn.execute(
+                    "DELETE FROM alert_runs WHERE alert_id = ? AND run_timestamp < ?",
+                    (alert_id, time.time() - retention.max_age),
+                ).rowcount
+            if retention.max_runs is not None:
+                compacted += self._conn.execute(
+                    """
+                    DELETE FROM alert_runs WHERE alert_id = ? AND id NOT IN (
+                        SELECT id FROM alert_runs WHERE alert_id = ? ORDER BY run_timestamp DESC, id DESC LIMIT ?
+                    )
+                    """,
+                    (alert_id, alert_id, retention.max_runs),
+                ).rowcount
+            if retention.max_context_runs is not None:
+                payload_paths = [f"'$.{key}'" for key in ALERT_CONTEXT_PAYLOAD_KEYS]
+                has_payload = " OR ".join(
+                    f"json_type(alert_context, {path}) IS NOT NULL"
+                    for path in payload_paths
+                )
+                # only runs that still have a payload are updated, so this is incremental
+                compacted += self._conn.execute(
+                    f"""
+                    UPDATE alert_runs SET alert_context = json_remove(alert_context, {", ".join(payload_paths)})
+                    WHERE alert_id = ? AND ({has_payload}) AND id NOT IN (
+                        SELECT id FROM alert_runs WHERE alert_id = ? ORDER BY run_timestamp DESC, id DESC LIMIT ?
+                    )
+                    """,
+                    (alert_id, alert_id, retention.max_context_runs),
+                ).rowcount
+        return compacted
+
+    def compact_all(self, retention: StateRetention) -> int:
+        compacted = super().compact_all(retention)
+        # give the freed pages back to the file system
+        if compacted:
+            with self._lock:
+                self._conn.execute("VACUUM")
+        return compacted
+
+    def get_alert_ids(self) -> list[str]:
+        rows = self._execute("SELECT DISTINCT alert_id FROM alert_runs")
+        return [row["alert_id"] for row in rows]
+
+    def has_alert(self, alert_id: str) -> bool:
+        rows = self._execute(
+            "SELECT 1 FROM alert_runs WHERE alert_id = ? LIMIT 1", (alert_id,)
+        )
+        return len(rows) > 0
+
+    def get_value(
+        self, alert_id: str, key: str, default: typing.Any = None
+    ) -> typing.Any:
+        rows = self._execute(
+            "SELECT value FROM alert_values WHERE alert_id = ? AND key = ?",
+            (alert_id, key),
+        )
+        return json.loads(rows[0]["value"]) if rows else default
+
+    def set_value(self, alert_id: str, key: str, value: typing.Any) -> None:
+        if value is None:
+            self._execute(
+                "DELETE FROM alert_values WHERE alert_id = ? AND key = ?",
+                (alert_id, key),
+            )
+            return
+        self._execute(
+            """
+            INSERT INTO alert_values (alert_id, key, value, updated_timestamp) VALUES (?, ?, ?, ?)
+            ON CONFLICT (alert_id, key) DO UPDATE SET value = excluded.value, updated_timestamp = excluded.updated_timestamp
+            """,
+            (alert_id, key, json.dumps(value, default=str), time.time()),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,238 @@
+import abc
+import dataclasses
+import logging
+import os
+import typing
+
+# the parts of a run's alert_context that are dropped when the run is compacted
+ALERT_CONTEXT_PAYLOAD_KEYS = ("alert_steps_context", "alert_actions_context")
+
+
+@dataclasses.dataclass
+class StateRetention:
+    """
+    How much of an alert's runs history to keep.
+
+    Args:
+        max_runs (int): keep only the last max_runs runs.
+        max_age (int): keep only runs newer than max_age seconds.
+        max_context_runs (int): drop the steps/actions context of all but the last max_context_runs runs (keeps the status).
+    """
+
+    max_runs: typing.Optional[int] = None
+    max_age: typing.Optional[int] = None
+    max_context_runs: typing.Optional[int] = None
+
+    @staticmethod
+    def convert_to_seconds(s: str | int) -> int:
+        seconds_per_unit = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+        if isinstance(s, int) or str(s).isdigit():
+            return int(s)
+        return int(s[:-1]) * seconds_per_unit[s[-1]]
+
+    @staticmethod
+    def from_config(retention_config: dict) -> "StateRetention":
+        """
+        Build the retention from an alert's `state.retention` config.
+            e.g. {"max_runs": 100, "max_age": "7d", "max_context_runs": 10}
+        """
+        retention_config = retention_config or {}
+        max_runs = retention_config.get("max_runs")
+        max_age = retention_config.get("max_age")
+        max_context_runs = retention_config.get("max_context_runs")
+        return StateRetention(
+            max_runs=int(max_runs) if max_runs is not None else None,
+            max_age=StateRetention.convert_to_seconds(max_age)
+            if max_age is not None
+            else None,
+            max_context_runs=int(max_context_runs)
+            if max_context_runs is not None
+            else None,
+        )
+
+    @staticmethod
+    def from_env() -> "StateRetention":
+        """
+        Build the default retention from KEEP_STATE_MAX_RUNS, KEEP_STATE_MAX_AGE and KEEP_STATE_MAX_CONTEXT_RUNS.
+        """
+        return StateRetention.from_config(
+            {
+                "max_runs": os.environ.get("KEEP_STATE_MAX_RUNS"),
+                "max_age": os.environ.get("KEEP_STATE_MAX_AGE"),
+                "max_context_runs": os.environ.get("KEEP_STATE_MAX_CONTEXT_RUNS"),
+            }
+        )
+
+    def merge(self, other: "StateRetention") -> "StateRetention":
+        """
+        Override this retention with the values that are set in other.
+        """
+        if other is None:
+            return self
+        return StateRetention(
+            **{
+                field.name: getattr(other, field.name)
+                if getattr(other, field.name) is not None
+                else getattr(self, field.name)
+                for field in dataclasses.fields(self)
+            }
+        )
+
+    def is_empty(self) -> bool:
+        return all(
+            getattr(self, field.name) is None for field in dataclasses.fields(self)
+        )
+
+
+class BaseStateStore(typing.Mapping, metaclass=abc.ABCMeta):
+    """
+    Base class for Keep's alert state stores.
+
+    The store maps an alert id to the list of its runs (oldest first), so it can be
+    injected as-is into the templating context (e.g. {{ state.<alert-id>.-1.alert_status }}).
+
+    It also keeps (JSON serializable) values per alert, that steps and providers carry between runs
+        (e.g. watermarks and file offsets), see get_value and set_value.
+    """
+
+    def __init__(self, **kwargs):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @abc.abstractmethod
+    def get_alert_runs(self, alert_id: str) -> typing.Sequence[dict]:
+        """
+        Get all the runs of an alert.
+
+        Args:
+            alert_id (str): The id of the alert.
+
+        Returns:
+            typing.Sequence[dict]: The alert runs, oldest first.
+        """
+        raise NotImplementedError("get_alert_runs() method not implemented")
+
+    @abc.abstractmethod
+    def get_last_alert_run(self, alert_id: str) -> dict:
+        """
+        Get the last run of an alert.
+
+        Args:
+            alert_id (str): The id of the alert.
+
+        Returns:
+            dict: The last alert run or an empty dict if the alert never ran.
+        """
+        raise NotImplementedError("get_last_alert_run() method not implemented")
+
+    @abc.abstractmethod
+    def set_last_alert_run(
+        self, alert_id: str, alert_run: dict, retention: StateRetention = None
+    ) -> None:
+        """
+        Append a run to the alert's history.
+
+        Args:
+            alert_id (str): The id of the alert.
+            alert_run (dict): The alert run (alert_status, alert_context).
+            retention (StateRetention, optional): If given, compact the alert's history after the write.
+        """
+        raise NotImplementedError("set_last_alert_run() method not implemented")
+
+    @abc.abstractmethod
+    def compact(self, alert_id: str, retention: StateRetention) -> int:
+        """
+        Apply the retention on the alert's runs history.
+
+        Args:
+            alert_id (str): The id of the alert.
+            retention (StateRetention): The retention to apply.
+
+        Returns:
+            int: The number of runs that were deleted or stripped.
+        """
+        raise NotImplementedError("compact() method not implemented")
+
+    def compact_all(self, retention: StateRetention) -> int:
+        """
+        Apply the retention on all the alerts.
+
+        Args:
+            retention (StateRetention): The retention to apply.
+
+        Returns:
+            int: The number of runs that were deleted or stripped.
+        """
+        return sum(
+            self.compact(alert_id, retention) for alert_id in self.get_alert_ids()
+        )
+
+    @abc.abstractmethod
+    def get_alert_ids(self) -> list[str]:
+        """
+        List the ids of all the alerts that have state.
+
+        Returns:
+            list[str]: The alert ids.
+        """
+        raise NotImplementedError("get_alert_ids() method not implemented")
+
+    @abc.abstractmethod
+    def get_value(
+        self, alert_id: str, key: str, default: typing.Any = None
+    ) -> typing.Any:
+        """
+        Get a value that was kept for an alert.
+
+        Args:
+            alert_id (str): The id of the alert.
+            key (str): The value key (e.g. watermark:<step-id>).
+            default (Any, optional): Returned if the value doesn't exist.
+
+        Returns:
+            Any: The value.
+        """
+        raise NotImplementedError("get_value() method not implemented")
+
+    @abc.abstractmethod
+    def set_value(self, alert_id: str, key: str, value: typing.Any) -> None:
+        """
+        Keep a value for an alert (overriding the previous value), None deletes the value.
+
+        Args:
+            alert_id (str): The id of the alert.
+            key (str): The value key.
+            value (Any): A JSON serializable value.
+        """
+        raise NotImplementedError("set_value() method not implemented")
+
+    def has_alert(self, alert_id: str) -> bool:
+        """
+        Check whether the alert has any state.
+
+        Args:
+            alert_id (str): The id of the alert.
+
+        Returns:
+            bool: True if the alert ran at least once, False otherwise.
+        """
+        return alert_id in self.get_alert_ids()
+
+    def close(self) -> None:
+        """
+        Release any resource held by the store.
+        """
+        pass
+
+    def __getitem__(self, alert_id: str) -> typing.Sequence[dict]:
+        if not self.has_alert(alert_id):
+            raise KeyError(alert_id)
+        return self.get_alert_runs(alert_id)
+
+    def __contains__(self, alert_id: object) -> bool:
+        return isinstance(alert_id, str) and self.has_alert(alert_id)
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self.get_alert_ids())
+
+    def __len__(self) -> int:
+        return len(self.get_alert_ids())
@@ -0,0 +1,55 @@
+import enum
+import os
+
+from keep.statestore.statestore import BaseStateStore
+
+
+class StateStoreTypes(enum.Enum):
+    JSON = "json"
+    SQLITE = "sqlite"
+
+
+class StateStoreFactory:
+    SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+    @staticmethod
+    def get_state_store(
+        state_file: str, state_store_type: StateStoreTypes = None, **kwargs
+    ) -> BaseStateStore:
+        """
+        Get a state store.
+
+        Args:
+            state_file (str): The path to the state file.
+            state_store_type (StateStoreTypes, optional): The type of the store.
+                Defaults to KEEP_STATE_STORE_TYPE, or to SQLite if the state file looks like an SQLite database, or to JSON.
+
+        Returns:
+            BaseStateStore: The state store.
+        """
+        if not state_store_type:
+            if os.environ.get("KEEP_STATE_STORE_TYPE"):
+                try:
+                    state_store_type = StateStoreTypes[
+                        os.environ.get("KEEP_STATE_STORE_TYPE").upper()
+                    ]
+                except KeyError:
+                    raise ValueError(
+                        f"Invalid KEEP_STATE_STORE_TYPE {os.environ.get('KEEP_STATE_STORE_TYPE')}, "
+                        f"should be one of: {', '.join(t.value for t in StateStoreTypes)}"
+                    )
+            elif state_file.endswith(StateStoreFactory.SQLITE_EXTENSIONS):
+                state_store_type = StateStoreTypes.SQLITE
+            else:
+                state_store_type = StateStoreTypes.JSON
+        if state_store_type == StateStoreTypes.JSON:
+            from keep.statestore.jsonstatestore import JsonStateStore
+
+            return JsonStateStore(state_file, **kwargs)
+        elif state_store_type == StateStoreTypes.SQLITE:
+            from keep.statestore.sqlitestatestore import SqliteStateStore
+
+            return SqliteStateStore(state_file, **kwargs)
+        raise NotImplementedError(
+            f"State store type {str(state_store_type)} not implemented"
+        )
@@ -1,4 +1,7 @@
+import asyncio
+import collections.abc
 import logging
+import typing
 from dataclasses import field
 
 import chevron
@@ -7,6 +10,7 @@ from pydantic.dataclasses import dataclass
 from keep.contextmanager.contextmanager import ContextManager
 from keep.iohandler.iohandler import IOHandler
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.base.results_stream import ResultsStream
 
 
 @dataclass(config={"arbitrary_types_allowed": True})
@@ -15,25 +19,138 @@ class Step:
     step_config: dict
     provider: BaseProvider
     provider_parameters: dict
+    # the ids of the (previous) steps this step depends on, see Parser._parse_step_dependencies
+    dependencies: typing.List[str] = field(default_factory=list)
 
     def __post_init__(self):
         self.io_handler = IOHandler()
         self.logger = logging.getLogger(__name__)
-        self.context_manager = ContextManager.get_instance()
+
+    @property
+    def context_manager(self) -> ContextManager:
+        return ContextManager.get_instance()
 
     @property
     def foreach(self):
         return self.step_config.get("foreach")
 
-    def run(self):
+    @property
+    def foreach_concurrency(self) -> int:
+        return int(self.step_config.get("foreach_concurrency") or 1)
+
+    @property
+    def watermark(self) -> dict | None:
+        return self.step_config.get("watermark")
+
+    @property
+    def can_submit_query(self) -> bool:
+        # only providers that run queries asynchronously override submit_query
+        return type(self.provider).submit_query is not BaseProvider.submit_query
+
+    def _render_provider_parameters(self) -> dict:
+        if self.watermark:
+            # {{ watermark }} - where the previous successful run stopped
+            with self.context_manager.watermark_scope(self._get_watermark()):
+                return self.__render_provider_parameters()
+        return self.__render_provider_parameters()
+
+    def __render_provider_parameters(self) -> dict:
+        # Inject the context to the parameters
+        rendered_providers_parameters = {}
+        for parameter in self.provider_parameters:
+            rendered_providers_parameters[parameter] = self.io_handler.render(
+                self.provider_parameters[parameter]
+            )
+        return rendered_providers_parameters
+
+    def _get_watermark(self):
+        watermark = self.context_manager.get_watermark(self.step_id)
+        if watermark is None and self.watermark.get("initial") is not None:
+            # the first run
+            watermark = self.io_handler.render(self.watermark.get("initial"))
+        return watermark
+
+    def _update_watermark(self, step_output):
+        """
+        Set the step's next watermark: the highest watermark field of the results,
+            or the time the alert run started if the watermark has no field.
+        """
+        watermark_field = self.watermark.get("field")
+        if not watermark_field:
+            run_started_at = self.context_manager.run_started_at
+            watermark_format = self.watermark.get("format")
+            self.context_manager.set_pending_watermark(
+                self.step_id,
+                run_started_at.strftime(watermark_format)
+                if watermark_format
+                else run_started_at.isoformat(),
+            )
+            return
+        if isinstance(step_output, ResultsStream):
+            self.logger.warning(
+                "Watermark fields of streamed results aren't supported",
+                extra={"step_id": self.step_id},
+            )
+            return
+        if hasattr(step_output, "columns") and hasattr(step_output, "column"):
+            # e.g. ColumnarResults
+            values = step_output.column(watermark_field)
+        else:
+            if not isinstance(step_output, (list, tuple)):
+                step_output = [step_output] if step_output else []
+            values = [
+                row.get(watermark_field)
+                if isinstance(row, collections.abc.Mapping)
+                else getattr(row, watermark_field, None)
+                for row in step_output
+            ]
+        values = [value for value in values if value is not None]
+        # no new results, the watermark stays
+        if not values:
+            return
+        try:
+            watermark = max(values)
+        except TypeError:
+            self.logger.warning(
+                f"Watermark field {watermark_field} has values that can't be compared",
+                extra={"step_id": self.step_id},
+            )
+            return
+        self.context_manager.set_pending_watermark(self.step_id, watermark)
+
+    async def submit_query(self):
+        """
+        Start the step's query without waiting for its results, if the provider supports it (see BaseProvider.submit_query).
+        """
+        try:
+            rendered_providers_parameters = self._render_provider_parameters()
+            # starting the query is a (blocking) request to the provider
+            submitted_query = await asyncio.to_thread(
+                self.provider.submit_query, **rendered_providers_parameters
+            )
+        except Exception as e:
+            raise StepError(e)
+        if submitted_query is not None:
+            # run uses the same parameters, instead of rendering them again
+            self.context_manager.set_submitted_query(
+                self.step_id, submitted_query, rendered_providers_parameters
+            )
+
+    async def run(self):
         try:
-            # Inject the context to the parameters
-            rendered_providers_parameters = {}
-            for parameter in self.provider_parameters:
-                rendered_providers_parameters[parameter] = self.io_handler.render(
-                    self.provider_parameters[parameter]
+            (
+                submitted_query,
+                rendered_providers_parameters,
+            ) = self.context_manager.pop_submitted_query(self.step_id)
+            if submitted_query is not None:
+                step_output = await self.provider.get_query_results_async(
+                    submitted_query
+                )
+            else:
+                rendered_providers_parameters = self._render_provider_parameters()
+                step_output = await self.provider.query_async(
+                    **rendered_providers_parameters
                 )
-            step_output = self.provider.query(**rendered_providers_parameters)
             # after the provider ran, let's update the context with the context of the provider
             #                         so it'll be available for the alert.
             extra_context = self.provider.expose()
@@ -41,6 +158,8 @@ class Step:
             self.context_manager.set_step_provider_paremeters(
                 self.step_id, rendered_providers_parameters
             )
+            if self.watermark:
+                self._update_watermark(step_output)
         except Exception as e:
             raise StepError(e)
 
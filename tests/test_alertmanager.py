@@ -0,0 +1,427 @@
+"""
+Test the alert manager
+"""
+import datetime
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from keep.alertmanager.alertmanager import AlertManager
+from keep.contextmanager.contextmanager import ContextManager
+from keep.eventloop.eventloop import EventLoop
+from keep.providers.base.results_stream import ResultsStream
+from keep.providers.mock_provider.mock_provider import MockProvider
+
+path_to_test_resources = Path(__file__).parent / "alerts"
+alert_path = str(path_to_test_resources / "db_disk_space_for_testing.yml")
+providers_path = str(path_to_test_resources / "providers_for_testing.yaml")
+
+
+@pytest.fixture
+def alerts_directory() -> str:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shutil.copy(alert_path, tmp_dir)
+        yield tmp_dir
+
+
+def test_alerts_cache(alerts_directory):
+    alert_manager = AlertManager()
+    alerts = alert_manager.get_alerts(alerts_directory, providers_path)
+    assert len(alerts) == 1
+    assert alert_manager.alerts_cache_misses == 1
+    # nothing changed, the alerts should be reused
+    cached_alerts = alert_manager.get_alerts(alerts_directory, providers_path)
+    assert cached_alerts[0] is alerts[0]
+    assert alert_manager.alerts_cache_hits == 1
+
+
+def test_alerts_cache_touched_file(alerts_directory):
+    alert_manager = AlertManager()
+    alert_file = os.path.join(alerts_directory, os.path.basename(alert_path))
+    alerts = alert_manager.get_alerts(alerts_directory, providers_path)
+    # the file was touched but its content didn't change
+    os.utime(alert_file, ns=(0, 0))
+    cached_alerts = alert_manager.get_alerts(alerts_directory, providers_path)
+    assert cached_alerts[0] is alerts[0]
+    assert alert_manager.alerts_cache_misses == 1
+
+
+def test_alerts_cache_changed_file(alerts_directory):
+    alert_manager = AlertManager()
+    alert_file = os.path.join(alerts_directory, os.path.basename(alert_path))
+    alerts = alert_manager.get_alerts(alerts_directory, providers_path)
+    with open(alert_file, "a") as f:
+        f.write("\n# changed\n")
+    changed_alerts = alert_manager.get_alerts(alerts_directory, providers_path)
+    assert changed_alerts[0] is not alerts[0]
+    assert alert_manager.alerts_cache_misses == 2
+    # the file was removed
+    os.remove(alert_file)
+    assert alert_manager.get_alerts(alerts_directory, providers_path) == []
+    assert alert_manager.alerts_cache == {}
+
+
+def test_alerts_cache_urls(monkeypatch):
+    alert_manager = AlertManager()
+    parse = alert_manager.parser.parse
+    monkeypatch.setattr(
+        alert_manager.parser,
+        "parse",
+        lambda alert_source, providers_file: parse(alert_path, providers_file),
+    )
+    alert_urls = ("https://example.com/alerts/db_disk_space.yml",)
+    providers_registry = alert_manager.parser.providers_registry
+    alert_manager.get_alerts(alert_urls, providers_path)
+    provider_references = providers_registry.get_stats()["provider_references"]
+    # the urls are re-parsed, the previous alerts' providers are released
+    alert_manager.get_alerts(alert_urls, providers_path)
+    assert alert_manager.alerts_cache_misses == 0
+    assert providers_registry.get_stats()["provider_references"] == provider_references
+    alert_manager.dispose()
+
+
+def test_dispose_keeps_shared_providers(alerts_directory):
+    alert_manager, other_alert_manager = AlertManager(), AlertManager()
+    providers_registry = alert_manager.parser.providers_registry
+    references = providers_registry.get_stats()["provider_references"]
+    alert_manager.get_alerts(alerts_directory, providers_path)
+    other_alert_manager.get_alerts(alerts_directory, providers_path)
+    stats = providers_registry.get_stats()
+    alert_manager.dispose()
+    # the providers are still used by the other alert manager's alerts
+    assert providers_registry.get_stats()["open_providers"] == stats["open_providers"]
+    assert (
+        providers_registry.get_stats()["provider_references"]
+        == references + (stats["provider_references"] - references) // 2
+    )
+    other_alert_manager.dispose()
+    assert providers_registry.get_stats()["provider_references"] == references
+
+
+CONCURRENT_ALERT_TEMPLATE = """
+alert:
+  id: {alert_id}
+  steps:
+    - name: {alert_id}-step
+      provider:
+        type: mock
+        with:
+          command_output: {alert_id}-output
+  actions:
+    - name: {alert_id}-action
+      provider:
+        type: console
+        with:
+          alert_message: "{{{{ steps.{alert_id}-step.results }}}}"
+"""
+
+
+def test_run_alerts_concurrently(monkeypatch, capsys):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.setenv("KEEP_STATE_FILE", os.path.join(tmp_dir, "keepstate.db"))
+        alerts_dir = os.path.join(tmp_dir, "alerts")
+        os.mkdir(alerts_dir)
+        alert_ids = [f"mock-alert-{i}" for i in range(8)]
+        for alert_id in alert_ids:
+            with open(os.path.join(alerts_dir, f"{alert_id}.yml"), "w") as f:
+                f.write(CONCURRENT_ALERT_TEMPLATE.format(alert_id=alert_id))
+        alert_manager = AlertManager()
+        alert_manager.run(alerts_dir, providers_path, workers=4)
+
+        printed = capsys.readouterr().out.splitlines()
+        assert sorted(printed) == sorted(f"{alert_id}-output" for alert_id in alert_ids)
+        # every alert ran with its own context, so its state has only its own steps
+        state = ContextManager.get_instance().state
+        for alert_id in alert_ids:
+            alert_context = state.get_last_alert_run(alert_id)["alert_context"]
+            assert set(alert_context["alert_steps_context"]) == {
+                f"{alert_id}-step",
+                "this",
+            }
+        ContextManager.delete_instance()
+
+
+def test_run_independent_steps_concurrently(monkeypatch, capsys):
+    def slow_query(self, **kwargs):
+        time.sleep(0.2)
+        return kwargs.get("command_output")
+
+    monkeypatch.setattr(MockProvider, "_query", slow_query)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.setenv("KEEP_STATE_FILE", os.path.join(tmp_dir, "keepstate.db"))
+        alert_file = os.path.join(tmp_dir, "alert.yml")
+        with open(alert_file, "w") as f:
+            f.write(
+                """
+alert:
+  id: independent-steps
+  steps_concurrency: 3
+  steps:
+    - name: datadog
+      provider:
+        type: mock
+        with:
+          command_output: datadog
+    - name: elastic
+      provider:
+        type: mock
+        with:
+          command_output: elastic
+    - name: postgres
+      provider:
+        type: mock
+        with:
+          command_output: postgres
+    - name: summary
+      provider:
+        type: mock
+        with:
+          command_output: "{{ steps.datadog.results }} {{ steps.elastic.results }} {{ steps.postgres.results }}"
+  actions:
+    - name: print-summary
+      provider:
+        type: console
+        with:
+          alert_message: "{{ steps.this.results }}"
+"""
+            )
+        alert_manager = AlertManager()
+        start = time.monotonic()
+        alert_manager.run(alert_file, providers_path)
+        # the first three steps ran at the same time, the summary step waited for them
+        assert time.monotonic() - start < 0.6
+        assert capsys.readouterr().out.strip() == "datadog elastic postgres"
+        ContextManager.delete_instance()
+
+
+def test_run_foreach_concurrently(monkeypatch, capsys):
+    def slow_query(self, **kwargs):
+        time.sleep(0.2)
+        return kwargs.get("command_output")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.setenv("KEEP_STATE_FILE", os.path.join(tmp_dir, "keepstate.db"))
+        alert_file = os.path.join(tmp_dir, "alert.yml")
+        with open(alert_file, "w") as f:
+            f.write(
+                """
+alert:
+  id: foreach-hosts
+  steps:
+    - name: get-hosts
+      provider:
+        type: mock
+        with:
+          command_output: [host-1, host-2, host-3, host-4]
+    - name: check-host
+      foreach: "{{ steps.get-hosts.results }}"
+      foreach_concurrency: 4
+      provider:
+        type: mock
+        with:
+          command_output: "{{ foreach.value }} is up"
+  actions:
+    - name: print-host
+      foreach: "{{ steps.check-host.results }}"
+      foreach_concurrency: 4
+      provider:
+        type: console
+        with:
+          alert_message: "{{ foreach.value }}"
+"""
+            )
+        alert_manager = AlertManager()
+        monkeypatch.setattr(MockProvider, "_query", slow_query)
+        start = time.monotonic()
+        alert_manager.run(alert_file, providers_path)
+        # get-hosts + the 4 hosts at the same time
+        assert time.monotonic() - start < 0.6
+        host_checks = [f"host-{i} is up" for i in range(1, 5)]
+        # the step results are in the foreach items order
+        steps_context = ContextManager.get_instance().steps_context
+        assert steps_context["check-host"]["results"] == host_checks
+        assert sorted(capsys.readouterr().out.splitlines()) == host_checks
+        ContextManager.delete_instance()
+
+
+def test_run_foreach_over_streamed_results(monkeypatch, capsys):
+    fetched_chunks = []
+    closed_streams = []
+
+    def streaming_query(self, **kwargs):
+        rows = iter(kwargs.get("command_output"))
+
+        def fetch_chunk():
+            chunk = [row for _, row in zip(range(2), rows)]
+            fetched_chunks.append(chunk)
+            return chunk
+
+        return ResultsStream(
+            fetch_chunk=fetch_chunk,
+            on_close=closed_streams.append,
+            name=self.provider_id,
+        )
+
+    monkeypatch.setattr(MockProvider, "_query", streaming_query)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.setenv("KEEP_STATE_FILE", os.path.join(tmp_dir, "keepstate.db"))
+        alert_file = os.path.join(tmp_dir, "alert.yml")
+        with open(alert_file, "w") as f:
+            f.write(
+                """
+alert:
+  id: streamed-rows
+  steps:
+    - name: get-rows
+      provider:
+        type: mock
+        with:
+          command_output: [row-1, row-2, row-3, row-4, row-5]
+    - name: unused-rows
+      provider:
+        type: mock
+        with:
+          command_output: [row-1, row-2, row-3]
+  actions:
+    - name: print-row
+      foreach: "{{ steps.get-rows.results }}"
+      provider:
+        type: console
+        with:
+          alert_message: "{{ foreach.value }}"
+"""
+            )
+        AlertManager().run(alert_file, providers_path)
+        assert capsys.readouterr().out.splitlines() == [f"row-{i}" for i in range(1, 6)]
+        # the rows were fetched in chunks, and the stream that wasn't consumed was closed by the alert
+        assert fetched_chunks == [["row-1", "row-2"], ["row-3", "row-4"], ["row-5"], []]
+        assert sorted(closed_streams) == [False, True]
+        ContextManager.delete_instance()
+
+
+def test_run_scheduled_alerts(monkeypatch, capsys):
+    def query(self, **kwargs):
+        if kwargs.get("sleep"):
+            time.sleep(1.5)
+        return kwargs.get("command_output")
+
+    monkeypatch.setattr(MockProvider, "_query", query)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.setenv("KEEP_STATE_FILE", os.path.join(tmp_dir, "keepstate.db"))
+        alert_file = os.path.join(tmp_dir, "alert.yml")
+        with open(alert_file, "w") as f:
+            f.write(
+                """
+alerts:
+  - id: every-second
+    schedule:
+      interval: 1
+    steps:
+      - name: get-value
+        provider:
+          type: mock
+          with:
+            command_output: every-second
+    actions:
+      - name: print-value
+        provider:
+          type: console
+          with:
+            alert_message: "{{ steps.get-value.results }}"
+  - id: slow
+    schedule:
+      interval: 1
+    steps:
+      - name: get-value
+        provider:
+          type: mock
+          with:
+            command_output: slow
+            sleep: true
+"""
+            )
+        alert_manager = AlertManager()
+        with pytest.raises(TimeoutError):
+            EventLoop.get_instance().run(
+                alert_manager._run_scheduled(alert_file, providers_path, workers=2),
+                timeout=2.5,
+            )
+        # the alerts ran on their own schedule, the slow alert didn't delay the other alert
+        assert capsys.readouterr().out.splitlines() == ["every-second"] * 3
+        stats = alert_manager.scheduler.get_stats()
+        assert stats["every-second"]["runs"] == 3
+        assert stats["every-second"]["max_lag"] < 0.5
+        # the slow alert was still running when its next run was due
+        assert stats["slow"]["runs"] == 2
+        assert stats["slow"]["skipped_runs"] == 1
+        alert_manager.dispose()
+        ContextManager.delete_instance()
+
+
+def test_run_with_watermarks(monkeypatch, capsys):
+    rows = [{"id": i, "message": f"error {i}"} for i in range(1, 4)]
+    queried_watermarks = []
+
+    def query(self, **kwargs):
+        if "last_run" in kwargs:
+            return []
+        queried_watermarks.append(kwargs["since"])
+        return [row for row in rows if row["id"] > kwargs["since"]]
+
+    monkeypatch.setattr(MockProvider, "_query", query)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.setenv("KEEP_STATE_FILE", os.path.join(tmp_dir, "keepstate.db"))
+        alert_file = os.path.join(tmp_dir, "alert.yml")
+        with open(alert_file, "w") as f:
+            f.write(
+                """
+alert:
+  id: new-errors
+  steps:
+    - name: errors
+      watermark:
+        field: id
+        initial: 0
+      provider:
+        type: mock
+        with:
+          since: "{{ watermark }}"
+    - name: last-run
+      watermark:
+        format: "%Y-%m-%d"
+      provider:
+        type: mock
+        with:
+          last_run: "{{ watermark }}"
+  actions:
+    - name: print-errors
+      foreach: "{{ steps.errors.results }}"
+      provider:
+        type: console
+        with:
+          alert_message: "{{ foreach.value.message }}"
+"""
+            )
+        AlertManager().run(alert_file, providers_path)
+        rows.append({"id": 4, "message": "error 4"})
+        AlertManager().run(alert_file, providers_path)
+        AlertManager().run(alert_file, providers_path)
+        # every run fetched only the rows since the previous run
+        assert queried_watermarks == [0, 3, 4]
+        assert capsys.readouterr().out.splitlines() == [
+            "error 1",
+            "error 2",
+            "error 3",
+            "error 4",
+        ]
+        state = ContextManager.get_instance().state
+        assert state.get_value("new-errors", "watermark:errors") == 4
+        assert state.get_value("new-errors", "watermark:last-run") == (
+            datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+        )
+        ContextManager.delete_instance()
@@ -0,0 +1,197 @@
+"""
+Test the CloudWatch Logs provider queries polling
+"""
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from keep.alertmanager.alertmanager import AlertManager
+from keep.contextmanager.contextmanager import ContextManager
+from keep.exceptions.provider_exception import ProviderException
+from keep.providers.cloudwatch_provider.cloudwatch_provider import (
+    CloudwatchLogsProvider,
+    CloudwatchProvider,
+)
+from keep.providers.models.provider_config import ProviderConfig
+from keep.step.step import Step
+
+providers_path = str(Path(__file__).parent / "alerts" / "providers_for_testing.yaml")
+
+CLOUDWATCH_ALERT_TEMPLATE = """
+alert:
+  id: cloudwatch-errors
+  steps:{steps}
+  actions:
+    - name: print-errors
+      provider:
+        type: console
+        with:
+          alert_message: "{{{{ steps.errors-2.results[0][0].value }}}}"
+"""
+
+CLOUDWATCH_STEP_TEMPLATE = """
+    - name: errors-{i}
+      provider:
+        type: cloudwatch.logs
+        config:
+          authentication:
+            access_key: key
+            access_key_secret: secret
+        with:
+          log_group: app-{i}
+          query: errors {i}"""
+
+MOCK_STEP = """
+    - name: mock
+      provider:
+        type: mock
+        with:
+          command_output: ls"""
+
+
+class MockLogsClient:
+    """
+    A Logs Insights client whose queries complete after query_duration seconds.
+    """
+
+    def __init__(self, query_duration: float = 0.3):
+        self.query_duration = query_duration
+        self.queries = {}
+        self.stopped_queries = []
+        self.polls = 0
+        self._lock = threading.Lock()
+
+    def start_query(self, logGroupName, queryString, startTime, endTime):
+        with self._lock:
+            query_id = f"query-{len(self.queries)}"
+            self.queries[query_id] = (queryString, time.monotonic())
+        return {"queryId": query_id}
+
+    def get_query_results(self, queryId):
+        with self._lock:
+            self.polls += 1
+            query, started = self.queries[queryId]
+        if time.monotonic() - started < self.query_duration:
+            return {"status": "Running", "results": []}
+        return {
+            "status": "Complete",
+            "results": [[{"field": "@message", "value": query}]],
+        }
+
+    def stop_query(self, queryId):
+        self.stopped_queries.append(queryId)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch) -> MockLogsClient:
+    client = MockLogsClient()
+    monkeypatch.setattr(
+        CloudwatchProvider,
+        "_CloudwatchProvider__generate_client",
+        lambda self, aws_client_type: client,
+    )
+    return client
+
+
+@pytest.fixture
+def provider(client) -> CloudwatchLogsProvider:
+    provider = CloudwatchLogsProvider(
+        "cloudwatch-logs",
+        ProviderConfig(
+            authentication={"access_key": "key", "access_key_secret": "secret"}
+        ),
+    )
+    yield provider
+    provider.dispose()
+
+
+def test_cloudwatch_logs_query(provider, client):
+    results = provider.query(log_group="app", query="errors")
+    assert results == [[{"field": "@message", "value": "errors"}]]
+    # polled with backoff, not every second
+    assert client.polls <= 3
+
+
+def test_cloudwatch_logs_queries_run_together(provider, client):
+    start = time.monotonic()
+    submitted_queries = [
+        provider.submit_query(log_group="app", query=f"query {i}") for i in range(5)
+    ]
+    results = [submitted_query.result() for submitted_query in submitted_queries]
+    # one after the other would take at least 1.5 seconds
+    assert time.monotonic() - start < 0.9
+    assert [result[0][0]["value"] for result in results] == [
+        f"query {i}" for i in range(5)
+    ]
+
+
+def test_cloudwatch_logs_query_timeout(provider, client):
+    client.query_duration = 10
+    with pytest.raises(ProviderException, match="timed out"):
+        provider.query(log_group="app", query="slow", timeout=0.1)
+    assert client.stopped_queries == ["query-0"]
+
+
+def test_cloudwatch_logs_steps_submitted_up_front(client, monkeypatch, capsys):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.setenv("KEEP_STATE_FILE", os.path.join(tmp_dir, "keepstate.db"))
+        alert_file = os.path.join(tmp_dir, "alert.yml")
+        with open(alert_file, "w") as f:
+            f.write(
+                CLOUDWATCH_ALERT_TEMPLATE.format(
+                    steps="".join(
+                        CLOUDWATCH_STEP_TEMPLATE.format(i=i) for i in range(3)
+                    )
+                )
+            )
+        start = time.monotonic()
+        AlertManager().run(alert_file, providers_path)
+        # the (sequential) steps' queries ran at the same time, one after the other would take at least 0.9 seconds
+        assert time.monotonic() - start < 0.9
+        assert capsys.readouterr().out.strip() == "errors 2"
+        ContextManager.delete_instance()
+
+
+def test_cloudwatch_logs_steps_rendered_once(client, monkeypatch, capsys):
+    submitted_steps, rendered_steps = [], []
+    submit_query = Step.submit_query
+    render_provider_parameters = Step._render_provider_parameters
+
+    async def track_submit_query(self):
+        submitted_steps.append(self.step_id)
+        await submit_query(self)
+
+    def track_render_provider_parameters(self):
+        rendered_steps.append(self.step_id)
+        return render_provider_parameters(self)
+
+    monkeypatch.setattr(Step, "submit_query", track_submit_query)
+    monkeypatch.setattr(
+        Step, "_render_provider_parameters", track_render_provider_parameters
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.setenv("KEEP_STATE_FILE", os.path.join(tmp_dir, "keepstate.db"))
+        alert_file = os.path.join(tmp_dir, "alert.yml")
+        with open(alert_file, "w") as f:
+            f.write(
+                CLOUDWATCH_ALERT_TEMPLATE.format(
+                    steps="".join(
+                        CLOUDWATCH_STEP_TEMPLATE.format(i=i) for i in range(3)
+                    )
+                    + MOCK_STEP
+                )
+            )
+        AlertManager().run(alert_file, providers_path)
+        assert capsys.readouterr().out.strip() == "errors 2"
+        ContextManager.delete_instance()
+    # the mock provider can't submit queries
+    assert submitted_steps == ["errors-0", "errors-1", "errors-2"]
+    # the submitted queries' steps ran with the parameters they were submitted with
+    assert sorted(rendered_steps) == ["errors-0", "errors-1", "errors-2", "mock"]
@@ -0,0 +1,42 @@
+"""
+Test the columnar query results
+"""
+import pytest
+
+from keep.contextmanager.contextmanager import ContextManager
+from keep.iohandler.iohandler import IOHandler
+from keep.providers.base.columnar_results import ColumnarResults
+
+
+def test_columnar_results_rows():
+    results = ColumnarResults(["host", "count"], [("host-1", 1)])
+    results.extend([["host-2", 2], ["host-3", 3]])
+    assert len(results) == 3
+    assert results[0] == ("host-1", 1)
+    assert results[-1][1] == 3
+    assert results[1:] == [("host-2", 2), ("host-3", 3)]
+    assert list(results) == [("host-1", 1), ("host-2", 2), ("host-3", 3)]
+    assert results.column("count") == [1, 2, 3]
+    assert results.to_dicts()[0] == {"host": "host-1", "count": 1}
+    with pytest.raises(IndexError):
+        results[3]
+    with pytest.raises(ValueError):
+        results.extend([("host-4",)])
+
+
+def test_columnar_results_templates(mocked_context):
+    context_manager = ContextManager.get_instance()
+    context_manager.set_step_context(
+        "count-errors", results=ColumnarResults(["host", "count"], [("host-1", 42)])
+    )
+    io_handler = IOHandler()
+    assert io_handler.render("{{ steps.count-errors.results[0][1] }}") == 42
+    assert (
+        io_handler.render("{{ steps.count-errors.results[0][0] }} has errors")
+        == "host-1 has errors"
+    )
+    assert (
+        io_handler.render("Errors: {{ steps.count-errors.results }}")
+        == "Errors: [{'host': 'host-1', 'count': 42}]"
+    )
+    ContextManager.delete_instance()
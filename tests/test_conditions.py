@@ -1,9 +1,13 @@
+from decimal import Decimal
+
 import pytest
 
 from keep.conditions.assert_condition import AssertCondition
 from keep.conditions.condition_factory import ConditionFactory
 from keep.conditions.stddev_condition import StddevCondition
 from keep.conditions.threshold_condition import ThresholdCondition
+from keep.contextmanager.contextmanager import ContextManager
+from keep.providers.base.results_stream import ResultsStream
 
 
 def test_condition_factory():
@@ -36,6 +40,21 @@ def test_assert_condition():
     assert compare_value == "mock"
 
 
+@pytest.mark.parametrize("value, assertion_result", [(True, False), (0, True)])
+def test_assert_condition_single_variable(value, assertion_result):
+    context_manager = ContextManager.get_instance()
+    context_manager.set_step_context("check", results={"ok": value})
+    assert_condtion = AssertCondition(
+        condition_type="assert",
+        condition_name="mock",
+        condition_config={"assert": "{{ steps.check.results.ok }}"},
+    )
+    compare_value = assert_condtion.get_compare_value()
+    assert compare_value == value
+    assert assert_condtion.apply(None, compare_value) == assertion_result
+    ContextManager.delete_instance()
+
+
 def test_threshold_condition_single_threshold_gt():
     threshold_condition = ThresholdCondition(
         condition_type="threshold",
@@ -98,6 +117,16 @@ def test_threshold_condition_one_value_is_precentage():
         threshold_condition.apply("90", "80%")
 
 
+def test_threshold_condition_native_numbers():
+    threshold_condition = ThresholdCondition(
+        condition_type="threshold",
+        condition_name="mock",
+        condition_config={"compare_type": "gt"},
+    )
+    assert threshold_condition.apply(100, 200.5) is True
+    assert threshold_condition.apply(Decimal("300"), 200) is False
+
+
 def test_threshold_condition_multithreshold():
     threshold_condition = ThresholdCondition(
         condition_type="threshold",
@@ -128,3 +157,18 @@ def test_stddev_condition():
     )
     result = stddev_condition.apply(1, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
     assert result is True
+
+
+def test_condition_rejects_streamed_results():
+    context_manager = ContextManager.get_instance()
+    rows = ResultsStream(fetch_chunk=lambda: [], name="mock")
+    context_manager.set_step_context("rows", results=rows)
+    threshold_condition = ThresholdCondition(
+        condition_type="threshold",
+        condition_name="mock",
+        condition_config={"value": "{{ steps.rows.results }}", "compare_to": 10},
+    )
+    with pytest.raises(ValueError, match="streamed results"):
+        threshold_condition.get_compare_value()
+    rows.close()
+    ContextManager.delete_instance()
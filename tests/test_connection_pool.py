@@ -0,0 +1,105 @@
+"""
+Test the providers connection pool
+"""
+import threading
+import time
+
+import pytest
+
+from keep.providers.base.connection_pool import (
+    ConnectionPool,
+    ConnectionPoolConfig,
+    ConnectionPoolTimeout,
+)
+
+
+class MockConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+def get_connection_pool(**config) -> ConnectionPool:
+    return ConnectionPool(
+        name="mock-db",
+        connect=MockConnection,
+        close=lambda connection: connection.close(),
+        is_healthy=lambda connection: connection.healthy,
+        config=ConnectionPoolConfig(**config),
+    )
+
+
+def test_connection_pool_reuses_connections():
+    pool = get_connection_pool()
+    with pool.connection() as connection:
+        pass
+    with pool.connection() as reused_connection:
+        assert reused_connection is connection
+    assert pool.get_stats() == {
+        "open": 1,
+        "idle": 1,
+        "in_use": 0,
+        "created": 1,
+        "reused": 1,
+        "closed_idle": 0,
+        "closed_unhealthy": 0,
+        "closed_broken": 0,
+        "waits": 0,
+    }
+    pool.close()
+    assert connection.closed
+
+
+def test_connection_pool_max_size():
+    pool = get_connection_pool(max_size=1, checkout_timeout=0.1)
+    connection = pool.checkout()
+    with pytest.raises(ConnectionPoolTimeout):
+        pool.checkout()
+    # the waiting checkout gets the connection once it's checked in
+    threading.Timer(0.05, pool.checkin, args=(connection,)).start()
+    assert pool.checkout() is connection
+    assert pool.get_stats()["waits"] == 2
+
+
+def test_connection_pool_health_check():
+    pool = get_connection_pool(health_check_interval=0)
+    with pool.connection() as connection:
+        connection.healthy = False
+    with pool.connection() as new_connection:
+        assert new_connection is not connection
+    assert connection.closed
+    assert pool.get_stats()["closed_unhealthy"] == 1
+
+
+def test_connection_pool_broken_connection():
+    pool = get_connection_pool()
+    with pytest.raises(ValueError):
+        with pool.connection() as connection:
+            raise ValueError("query failed")
+    assert connection.closed
+    assert pool.get_stats()["open"] == 0
+
+
+def test_connection_pool_idle_timeout():
+    pool = get_connection_pool(min_size=1, idle_timeout=0.01)
+    first_connection = pool.checkout()
+    second_connection = pool.checkout()
+    pool.checkin(first_connection)
+    pool.checkin(second_connection)
+    time.sleep(0.02)
+    # the idle connections expired, but min_size connections are kept open
+    assert pool.checkout() is second_connection
+    assert first_connection.closed
+    assert pool.get_stats()["closed_idle"] == 1
+
+
+def test_connection_pool_config():
+    assert ConnectionPoolConfig.from_config(None) == ConnectionPoolConfig()
+    assert ConnectionPoolConfig.from_config({"max_size": 10}).max_size == 10
+    with pytest.raises(ValueError):
+        ConnectionPoolConfig.from_config({"max_connections": 10})
+    with pytest.raises(ValueError):
+        ConnectionPoolConfig.from_config({"min_size": 2, "max_size": 1})
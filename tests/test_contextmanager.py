@@ -1,6 +1,7 @@
 """
 Test the context manager
 """
+import asyncio
 import json
 import tempfile
 
@@ -107,6 +108,69 @@ def test_get_contexst_manager_id_with_starlette_context(mocked_context):
     assert isinstance(get_context_manager_id(), int)
 
 
+def test_context_manager_use_instance(context_manager: ContextManager):
+    """
+    Test the use_instance function (e.g. a context manager per alert)
+    """
+    with ContextManager.use_instance("mock_alert") as alert_context_manager:
+        assert get_context_manager_id() == "mock_alert"
+        assert ContextManager.get_instance() is alert_context_manager
+        assert alert_context_manager is not context_manager
+        alert_context_manager.set_step_context("mock_step", results="mock_results")
+        ContextManager.delete_instance()
+    assert ContextManager.get_instance() is context_manager
+    assert "mock_step" not in context_manager.steps_context
+
+
+def test_context_manager_run_foreach(context_manager: ContextManager):
+    """
+    Test the run_foreach function (concurrent foreach items)
+    """
+
+    async def run_item():
+        value = context_manager.foreach_context["value"]
+        # the first items finish last
+        await asyncio.sleep(0.01 * (5 - value))
+        context_manager.aliases["mock_alias"] = value
+        return context_manager.get_full_context()["foreach"]["value"] * 2
+
+    assert asyncio.run(
+        context_manager.run_foreach(range(5), run_item, concurrency=5)
+    ) == [
+        0,
+        2,
+        4,
+        6,
+        8,
+    ]
+    # every item ran with its own foreach context and aliases
+    assert context_manager.foreach_context == {"value": None}
+    assert "mock_alias" not in context_manager.aliases
+
+
+def test_context_manager_run_foreach_reads_items_lazily(
+    context_manager: ContextManager,
+):
+    """
+    Test that run_foreach doesn't read the (streamed) items ahead of the running items
+    """
+    read_items = []
+
+    def items():
+        for item in range(20):
+            read_items.append(item)
+            yield item
+
+    async def run_item():
+        # at most concurrency * 2 items are read ahead
+        assert len(read_items) <= context_manager.foreach_context["value"] + 5
+        return context_manager.foreach_context["value"]
+
+    assert asyncio.run(
+        context_manager.run_foreach(items(), run_item, concurrency=2)
+    ) == list(range(20))
+
+
 def test_context_manager_set_alert_context(context_manager: ContextManager):
     """
     Test the set_alert_context function
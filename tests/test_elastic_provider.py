@@ -0,0 +1,167 @@
+"""
+Test the Elasticsearch provider pagination and aggregations
+"""
+import pytest
+
+from keep.providers.base.columnar_results import ColumnarResults
+from keep.providers.base.results_stream import ResultsStream
+from keep.providers.elastic_provider import elastic_provider
+from keep.providers.elastic_provider.elastic_provider import ElasticProvider
+from keep.providers.models.provider_config import ProviderConfig
+
+DOCS = [{"_id": str(i), "sort": [i]} for i in range(5)]
+SQL_ROWS = [[f"host-{i}", i] for i in range(5)]
+
+
+class MockSqlClient:
+    def __init__(self):
+        self.cleared_cursors = []
+
+    def query(self, query=None, fetch_size=None, cursor=None):
+        offset = 0 if query else int(cursor)
+        fetch_size = fetch_size or 2
+        response = {"rows": SQL_ROWS[offset : offset + fetch_size]}
+        if query:
+            response["columns"] = [{"name": "host"}, {"name": "count"}]
+        if offset + fetch_size < len(SQL_ROWS):
+            response["cursor"] = str(offset + fetch_size)
+        return response
+
+    def clear_cursor(self, cursor):
+        self.cleared_cursors.append(cursor)
+
+
+class MockElasticsearch:
+    def __init__(self):
+        self.sql = MockSqlClient()
+        self.searches = []
+        self.closed_pits = []
+
+    def open_point_in_time(self, index, keep_alive):
+        return {"id": f"pit-{index}"}
+
+    def close_point_in_time(self, id):
+        self.closed_pits.append(id)
+
+    def search(self, **kwargs):
+        self.searches.append(kwargs)
+        if "aggs" in kwargs:
+            return {
+                "hits": {"total": {"value": 5}, "hits": []},
+                "aggregations": {"errors": {"doc_count": 5}},
+            }
+        search_after = kwargs.get("search_after")
+        offset = search_after[0] + 1 if search_after else 0
+        return {
+            "pit_id": f"pit-{len(self.searches)}",
+            "hits": {
+                "total": {"value": len(DOCS)},
+                "hits": DOCS[offset : offset + kwargs["size"]],
+            },
+        }
+
+
+@pytest.fixture
+def client() -> MockElasticsearch:
+    return MockElasticsearch()
+
+
+@pytest.fixture
+def provider(client) -> ElasticProvider:
+    provider = ElasticProvider(
+        "elastic-prod",
+        ProviderConfig(authentication={"api_key": "key", "host": "localhost"}),
+    )
+    provider._client = client
+    return provider
+
+
+def test_elastic_search_pages(provider, client):
+    # more hits than a single page
+    assert (
+        provider._query('{"match_all": {}}', index="logs", chunk_size=2, max_rows=10)
+        == DOCS
+    )
+    assert [search["search_after"] for search in client.searches] == [
+        None,
+        [1],
+        [3],
+    ]
+    # the point in time id returned by every page is used for the next one
+    assert [search["pit"]["id"] for search in client.searches] == [
+        "pit-logs",
+        "pit-1",
+        "pit-2",
+    ]
+    assert client.closed_pits == ["pit-3"]
+
+
+def test_elastic_first_page(provider, client, monkeypatch, caplog):
+    monkeypatch.setattr(elastic_provider, "DEFAULT_SEARCH_SIZE", 2)
+    monkeypatch.setattr(elastic_provider, "DEFAULT_SQL_FETCH_SIZE", 2)
+    # without stream or max_rows only the first page is fetched
+    assert provider._query('{"match_all": {}}', index="logs") == DOCS[:2]
+    assert len(client.searches) == 1
+    assert "pit" not in client.searches[0]
+    results = provider._query("SELECT host, count FROM logs")
+    assert list(results) == [tuple(row) for row in SQL_ROWS[:2]]
+    assert client.sql.cleared_cursors == ["2"]
+    # the truncated results are warned about
+    assert [
+        record.getMessage()
+        for record in caplog.records
+        if record.levelname == "WARNING"
+    ] == [
+        "Only the first 2 of 5 hits were fetched, set stream or max_rows to fetch them all",
+        "Only the first 2 rows were fetched, set stream or max_rows to fetch them all",
+    ]
+
+
+def test_elastic_first_page_complete(provider, client, caplog):
+    assert provider._query('{"match_all": {}}', index="logs") == DOCS
+    assert len(provider._query("SELECT host, count FROM logs")) == len(SQL_ROWS)
+    assert not [record for record in caplog.records if record.levelname == "WARNING"]
+
+
+def test_elastic_search_stream(provider, client):
+    results = provider._query(
+        {"match_all": {}}, index="logs", stream=True, chunk_size=2
+    )
+    assert isinstance(results, ResultsStream)
+    assert next(results) == DOCS[0]
+    results.close()
+    assert len(client.searches) == 1
+    assert client.closed_pits == ["pit-1"]
+
+
+def test_elastic_aggregations(provider, client):
+    assert provider._query(
+        '{"match": {"level": "error"}}',
+        index="logs",
+        aggs='{"errors": {"value_count": {"field": "level"}}}',
+    ) == {"errors": {"doc_count": 5}}
+    # only the aggregations are fetched
+    assert client.searches[0]["size"] == 0
+
+
+def test_elastic_sql_stream(provider, client):
+    results = provider._query("SELECT host, count FROM logs", stream=True, chunk_size=2)
+    assert results.columns == ["host", "count"]
+    assert list(results) == SQL_ROWS
+    # the cursor was exhausted, nothing to clear
+    assert client.sql.cleared_cursors == []
+
+
+def test_elastic_sql_stream_closed_early(provider, client):
+    results = provider._query("SELECT host, count FROM logs", stream=True, chunk_size=2)
+    next(results)
+    results.close()
+    assert client.sql.cleared_cursors == ["2"]
+
+
+def test_elastic_sql_columnar_results(provider, client):
+    results = provider._query("SELECT host, count FROM logs", chunk_size=2, max_rows=10)
+    assert isinstance(results, ColumnarResults)
+    assert results.columns == ["host", "count"]
+    assert list(results) == [tuple(row) for row in SQL_ROWS]
+    assert results[4][1] == 4
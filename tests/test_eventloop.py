@@ -0,0 +1,84 @@
+"""
+Test the event loop steps and actions run on
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from keep.eventloop.eventloop import EventLoop
+from keep.providers.base.base_provider import BaseProvider
+from keep.providers.models.provider_config import ProviderConfig
+
+
+class MockSyncProvider(BaseProvider):
+    def validate_config(self):
+        pass
+
+    def dispose(self):
+        pass
+
+    def _query(self, **kwargs):
+        time.sleep(0.2)
+        return threading.current_thread().name
+
+    def notify(self, **kwargs):
+        return threading.current_thread().name
+
+
+class MockAsyncProvider(MockSyncProvider):
+    async def _query(self, **kwargs):
+        await asyncio.sleep(0.2)
+        return threading.current_thread().name
+
+    async def notify(self, **kwargs):
+        return threading.current_thread().name
+
+
+@pytest.fixture
+def event_loop() -> EventLoop:
+    event_loop = EventLoop(sync_workers=10)
+    yield event_loop
+    event_loop.close()
+
+
+def get_provider(provider_class) -> BaseProvider:
+    return provider_class("mock", ProviderConfig(authentication={}))
+
+
+def test_event_loop_runs_async_and_sync_providers(event_loop):
+    async_provider = get_provider(MockAsyncProvider)
+    sync_provider = get_provider(MockSyncProvider)
+    # async providers run on the loop, sync providers in its thread pool
+    assert event_loop.run(async_provider.query_async()) == "keep-event-loop"
+    assert event_loop.run(sync_provider.query_async()).startswith("keep-sync")
+    assert event_loop.run(async_provider.notify_async()) == "keep-event-loop"
+    assert event_loop.run(sync_provider.notify_async()).startswith("keep-sync")
+
+
+def test_event_loop_multiplexes_queries(event_loop):
+    providers = [get_provider(MockAsyncProvider) for _ in range(50)] + [
+        get_provider(MockSyncProvider) for _ in range(10)
+    ]
+
+    async def query_all():
+        return await asyncio.gather(*(provider.query_async() for provider in providers))
+
+    start = time.monotonic()
+    assert len(event_loop.run(query_all())) == 60
+    # all the queries ran at the same time
+    assert time.monotonic() - start < 1
+
+
+def test_event_loop_sync_query_of_async_provider():
+    # the sync API runs async providers on the shared loop
+    assert get_provider(MockAsyncProvider).query() == "keep-event-loop"
+
+
+def test_event_loop_run_from_the_loop(event_loop):
+    async def run_nested():
+        return event_loop.run(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError):
+        event_loop.run(run_nested())
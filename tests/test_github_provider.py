@@ -0,0 +1,107 @@
+"""
+Test the GitHub stars provider incremental stargazers fetch
+"""
+import dataclasses
+import datetime
+
+import pytest
+
+from keep.providers.github_provider import github_provider
+from keep.providers.github_provider.github_provider import GithubStarsProvider
+from keep.providers.models.provider_config import ProviderConfig
+
+
+@dataclasses.dataclass
+class MockUser:
+    login: str
+
+
+@dataclasses.dataclass
+class MockStargazer:
+    user: MockUser
+    starred_at: datetime.datetime
+
+
+class MockStargazers:
+    def __init__(self, repo):
+        self.repo = repo
+
+    def get_page(self, page):
+        self.repo.requests.append(f"stargazers page {page}")
+        start = page * self.repo.per_page
+        return self.repo.stargazers[start : start + self.repo.per_page]
+
+
+class MockRepository:
+    def __init__(self, stars_count, per_page):
+        self.per_page = per_page
+        self.requests = []
+        self.stargazers = []
+        self.set_stars_count(stars_count)
+
+    def set_stars_count(self, stars_count):
+        self.stargazers = [
+            MockStargazer(MockUser(f"user-{i}"), datetime.datetime(2023, 1, 1))
+            for i in range(stars_count)
+        ]
+        self.changed = True
+
+    @property
+    def stargazers_count(self):
+        return len(self.stargazers)
+
+    def update(self):
+        self.requests.append("conditional repository")
+        changed, self.changed = self.changed, False
+        return changed
+
+    def get_stargazers_with_dates(self):
+        return MockStargazers(self)
+
+
+class MockGithub:
+    repositories = {}
+
+    def __init__(self, *args, per_page=30):
+        self.per_page = per_page
+
+    def get_repo(self, repository):
+        repo = MockGithub.repositories[repository]
+        repo.requests.append("repository")
+        repo.changed = False
+        return repo
+
+
+@pytest.fixture
+def repo(monkeypatch) -> MockRepository:
+    monkeypatch.setattr(github_provider, "Github", MockGithub)
+    repo = MockRepository(stars_count=250, per_page=github_provider.PER_PAGE)
+    monkeypatch.setitem(MockGithub.repositories, "keephq/keep", repo)
+    return repo
+
+
+def test_github_stars(repo):
+    provider = GithubStarsProvider(
+        "github", ProviderConfig(authentication={"access_token": "stars-token"})
+    )
+    results = provider.query(repository="keephq/keep", previous_stars_count=250)
+    assert results["new_stargazers_count"] == 0
+    assert repo.requests == ["repository"]
+    # only the pages after the previous stargazers are fetched
+    repo.set_stars_count(320)
+    results = provider.query(repository="keephq/keep", previous_stars_count=250)
+    assert [s["username"] for s in results["new_stargazers"]] == [
+        f"user-{i}" for i in range(250, 320)
+    ]
+    assert repo.requests[1:] == [
+        "conditional repository",
+        "stargazers page 2",
+        "stargazers page 3",
+    ]
+    # the client (and the repository) is reused by the next runs' providers
+    provider = GithubStarsProvider(
+        "github", ProviderConfig(authentication={"access_token": "stars-token"})
+    )
+    results = provider.query(repository="keephq/keep", previous_stars_count=320)
+    assert results == {"stars": 320, "new_stargazers": [], "new_stargazers_count": 0}
+    assert repo.requests[4:] == ["conditional repository"]
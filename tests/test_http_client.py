@@ -0,0 +1,105 @@
+"""
+Test the providers shared HTTP client
+"""
+import http.server
+import threading
+
+import pytest
+
+from keep.providers.base.http_client import HttpClient, HttpClientConfig
+
+
+class MockHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # path -> list of (status, headers) responses, the last one is repeated
+    responses = {}
+    requests = []
+    # the Cookie header of every request
+    cookies = []
+
+    def do_GET(self):
+        self.__respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.__respond()
+
+    def __respond(self):
+        MockHandler.requests.append((self.command, self.path))
+        MockHandler.cookies.append(self.headers.get("Cookie"))
+        responses = MockHandler.responses.get(self.path, [(200, {})])
+        status, headers = responses.pop(0) if len(responses) > 1 else responses[0]
+        body = b'{"ok": true}'
+        self.send_response(status)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url() -> str:
+    MockHandler.responses = {}
+    MockHandler.requests = []
+    MockHandler.cookies = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client() -> HttpClient:
+    client = HttpClient(HttpClientConfig(backoff_factor=0.01))
+    yield client
+    client.close()
+
+
+def test_http_client_reuses_connections(client, server_url):
+    for _ in range(5):
+        assert client.get(f"{server_url}/alerts").json() == {"ok": True}
+    client.post(f"{server_url}/alerts", json={"alert": "x"})
+    stats = client.get_stats()[server_url]
+    assert stats["requests"] == 6
+    assert stats["connections"] == 1
+    assert stats["errors"] == stats["retries"] == 0
+    assert stats["max_latency"] >= stats["avg_latency"] > 0
+
+
+def test_http_client_retries_with_retry_after(client, server_url):
+    MockHandler.responses["/alerts"] = [(429, {"Retry-After": "0"}), (200, {})]
+    response = client.post(f"{server_url}/alerts", json={"alert": "x"})
+    assert response.status_code == 200
+    assert len(MockHandler.requests) == 2
+    assert client.get_stats()[server_url]["retries"] == 1
+
+
+def test_http_client_doesnt_wait_for_long_retry_after(client, server_url):
+    MockHandler.responses["/alerts"] = [(503, {"Retry-After": "3600"}), (200, {})]
+    assert client.get(f"{server_url}/alerts").status_code == 503
+    assert len(MockHandler.requests) == 1
+
+
+def test_http_client_retries_idempotent_requests_only(client, server_url):
+    MockHandler.responses["/alerts"] = [(500, {})]
+    # a POST may have been processed
+    assert client.post(f"{server_url}/alerts", json={}).status_code == 500
+    assert len(MockHandler.requests) == 1
+    # the last response is returned once the retries are exhausted
+    assert client.get(f"{server_url}/alerts").status_code == 500
+    assert len(MockHandler.requests) == 1 + client.config.retries + 1
+    assert client.get_stats()[server_url]["retries"] == client.config.retries
+
+
+def test_http_client_doesnt_keep_cookies(client, server_url):
+    MockHandler.responses["/login"] = [(200, {"Set-Cookie": "session=secret; Path=/"})]
+    client.get(f"{server_url}/login")
+    # e.g. another provider (with other credentials) calling the same host
+    client.get(f"{server_url}/alerts")
+    assert MockHandler.cookies == [None, None]
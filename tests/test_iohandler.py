@@ -0,0 +1,87 @@
+"""
+Test the io handler
+"""
+import pytest
+
+from keep.contextmanager.contextmanager import ContextManager
+from keep.iohandler.iohandler import IOHandler, compile_template
+
+
+@pytest.fixture
+def context_manager(mocked_context) -> ContextManager:
+    context_manager = ContextManager.get_instance()
+    context_manager.set_step_context("db-no-space", results="91%")
+    context_manager.set_step_context(
+        "get-max-datetime", results=[["2023-04-05 20:51:38", 2]]
+    )
+    yield context_manager
+    ContextManager.delete_instance()
+
+
+@pytest.fixture
+def io_handler(context_manager) -> IOHandler:
+    return IOHandler()
+
+
+def test_render_variable(io_handler: IOHandler):
+    assert (
+        io_handler.render("Disk space left: {{ steps.db-no-space.results }}")
+        == "Disk space left: 91%"
+    )
+
+
+def test_render_index_access(io_handler: IOHandler):
+    assert io_handler.render("{{ steps.get-max-datetime.results[0][1] }}") == 2
+    assert (
+        io_handler.render("{{ steps.get-max-datetime.results.0.0 }}")
+        == "2023-04-05 20:51:38"
+    )
+
+
+def test_render_single_variable_native_value(io_handler: IOHandler):
+    assert io_handler.render("{{ steps.get-max-datetime.results }}") == [
+        ["2023-04-05 20:51:38", 2]
+    ]
+    assert io_handler.render(" {{ steps.get-max-datetime.results[0] }} ") == [
+        "2023-04-05 20:51:38",
+        2,
+    ]
+    # missing variables are rendered as empty strings (like chevron does)
+    assert io_handler.render("{{ steps.missing.results }}") == ""
+    assert io_handler.render("{{ steps.get-max-datetime.results[5] }}") == ""
+
+
+def test_render_context_single_variable(io_handler: IOHandler):
+    rendered_context = io_handler.render_context(
+        {"message": "{{ steps.get-max-datetime.results[0][1] }}"}
+    )
+    assert rendered_context == {"message": "2"}
+
+
+def test_render_function(io_handler: IOHandler):
+    assert (
+        io_handler.render("len: keep.len({{ steps.get-max-datetime.results[0] }})")
+        == "len: 2"
+    )
+
+
+def test_render_literal(io_handler: IOHandler):
+    assert io_handler.render("no templates here") == "no templates here"
+    assert io_handler.render(200) == 200
+
+
+def test_render_invalid_template(io_handler: IOHandler):
+    with pytest.raises(Exception, match="number of } and { does not match"):
+        io_handler.render("{{ steps.db-no-space.results }")
+    with pytest.raises(Exception, match="number of \\( and \\) does not match"):
+        io_handler.render("keep.len({{ steps.db-no-space.results }}")
+
+
+def test_render_uses_compiled_template(io_handler: IOHandler, context_manager):
+    template = "Disk space left: {{ steps.db-no-space.results }}"
+    io_handler.render(template)
+    misses = compile_template.cache_info().misses
+    # rendering again shouldn't compile the template again, but should use the updated context
+    context_manager.set_step_context("db-no-space", results="95%")
+    assert io_handler.render(template) == "Disk space left: 95%"
+    assert compile_template.cache_info().misses == misses
@@ -0,0 +1,45 @@
+"""
+Test the log template miner
+"""
+import json
+
+import pytest
+
+from keep.providers.logfile_provider.log_template_miner import LogTemplateMiner
+
+LINES = [
+    "2023-01-01 00:00:00 ERROR disk full on sda",
+    "2023-01-01 00:00:05 ERROR disk full on sdb",
+    "2023-01-01 00:00:07 INFO request 17 served in 3ms",
+    "2023-01-01 00:00:08 INFO request 18 served in 12ms",
+    "2023-01-01 00:00:09 INFO user alice logged in",
+]
+
+
+def test_template_miner():
+    miner = LogTemplateMiner()
+    templates = [miner.add_line(line) for line in LINES]
+    assert [template.id for template in templates] == [1, 1, 2, 2, 3]
+    assert miner.templates[1].template == "2023-01-01 <*> ERROR disk full on <*>"
+    assert (
+        miner.templates[2].template == "2023-01-01 <*> INFO request <*> served in <*>"
+    )
+    assert miner.templates[2].count == 2
+
+
+def test_template_miner_state():
+    miner = LogTemplateMiner()
+    for line in LINES[:3]:
+        miner.add_line(line)
+    state = json.loads(json.dumps(miner.get_state()))
+    miner = LogTemplateMiner(state=state)
+    assert miner.add_line(LINES[3]).id == 2
+    assert miner.add_line(LINES[4]).id == 3
+    assert miner.templates[1].count == 2
+
+
+def test_template_miner_similarity_threshold():
+    miner = LogTemplateMiner(similarity_threshold=0.9)
+    assert miner.add_line(LINES[0]).id != miner.add_line(LINES[1]).id
+    with pytest.raises(ValueError):
+        LogTemplateMiner(depth=2)
@@ -0,0 +1,182 @@
+"""
+Test the log file provider incremental reads and time windows
+"""
+import datetime
+import os
+
+import pytest
+
+from keep.contextmanager.contextmanager import ContextManager
+from keep.exceptions.provider_config_exception import ProviderConfigException
+from keep.providers.logfile_provider.logfile_provider import LogfileProvider
+from keep.providers.models.provider_config import ProviderConfig
+
+DISK_ERRORS = (
+    "2023-01-01 00:00:00 ERROR disk full on sda\n"
+    "2023-01-01 00:00:00 ERROR disk full on sdb\n"
+)
+SLOW_QUERIES = (
+    "2023-01-01 00:01:00 WARN slow query on orders\n"
+    "2023-01-01 00:01:00 WARN slow query on users\n"
+)
+
+
+@pytest.fixture
+def context_manager(monkeypatch, tmp_path) -> ContextManager:
+    monkeypatch.setenv("KEEP_STATE_FILE", str(tmp_path / "keepstate.db"))
+    context_manager = ContextManager.get_instance()
+    context_manager.set_alert_context({"alert_id": "log-errors"})
+    yield context_manager
+    ContextManager.delete_instance()
+
+
+@pytest.fixture
+def provider() -> LogfileProvider:
+    return LogfileProvider("logfile", ProviderConfig(authentication={}))
+
+
+def write(filename: str, text: str, mode: str = "a"):
+    with open(filename, mode) as f:
+        f.write(text)
+
+
+def query_new_lines(context_manager, provider, filename, succeeded=True) -> list:
+    results = provider.query(filename=filename, incremental=True)
+    # the alert run finished
+    if succeeded:
+        context_manager.commit_run_state()
+    else:
+        context_manager.discard_run_state()
+    return results
+
+
+def test_incremental_reads(context_manager, provider, tmp_path):
+    filename = str(tmp_path / "app.log")
+    write(filename, DISK_ERRORS)
+    assert query_new_lines(context_manager, provider, filename) == [
+        "2 2023-01-01 00:00:00 ERROR disk full on sda"
+    ]
+    # nothing was appended
+    assert query_new_lines(context_manager, provider, filename) == []
+    # a partial line is read when it's complete
+    write(filename, SLOW_QUERIES + "2023-01-01 00:01:00 WARN slow")
+    assert query_new_lines(context_manager, provider, filename) == [
+        "2 2023-01-01 00:01:00 WARN slow query on orders"
+    ]
+    write(filename, " query on items\n" + SLOW_QUERIES)
+    assert query_new_lines(context_manager, provider, filename) == [
+        "3 2023-01-01 00:01:00 WARN slow query on items"
+    ]
+
+
+def test_incremental_reads_retry_failed_runs(context_manager, provider, tmp_path):
+    filename = str(tmp_path / "app.log")
+    write(filename, DISK_ERRORS)
+    query_new_lines(context_manager, provider, filename, succeeded=False)
+    assert query_new_lines(context_manager, provider, filename) == [
+        "2 2023-01-01 00:00:00 ERROR disk full on sda"
+    ]
+
+
+def test_incremental_reads_rotation_and_truncation(context_manager, provider, tmp_path):
+    filename = str(tmp_path / "app.log")
+    write(filename, DISK_ERRORS + DISK_ERRORS)
+    query_new_lines(context_manager, provider, filename)
+    # truncated, the file is smaller than the offset
+    write(filename, SLOW_QUERIES, mode="w")
+    assert query_new_lines(context_manager, provider, filename) == [
+        "2 2023-01-01 00:01:00 WARN slow query on orders"
+    ]
+    # rotated, a new file (inode) at the same path
+    os.rename(filename, f"{filename}.1")
+    write(filename, DISK_ERRORS)
+    assert query_new_lines(context_manager, provider, filename) == [
+        "2 2023-01-01 00:00:00 ERROR disk full on sda"
+    ]
+
+
+@pytest.mark.parametrize("timestamp_format", ["%Y-%m-%d %H:%M:%S", None])
+def test_time_window(provider, tmp_path, timestamp_format):
+    filename = str(tmp_path / "app.log")
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    write(
+        filename,
+        DISK_ERRORS
+        + f"{now} WARN slow query on orders\n"
+        + "Traceback (most recent call last):\n"
+        + f"{now} WARN slow query on users\n",
+    )
+    assert provider.query(
+        filename=filename, time="1h", timestamp_format=timestamp_format
+    ) == [f"2 {now} WARN slow query on orders"]
+
+
+def test_time_window_binary_search(provider, tmp_path):
+    filename = str(tmp_path / "app.log")
+    start = datetime.datetime.now() - datetime.timedelta(hours=10)
+    with open(filename, "w") as f:
+        for second in range(0, 10 * 3600, 3):
+            timestamp = start + datetime.timedelta(seconds=second)
+            f.write(f"{timestamp:%Y-%m-%d %H:%M:%S} INFO request {second} served\n")
+            if second % 300 == 0:
+                f.write("Traceback (most recent call last):\n")
+    parse_timestamp = provider._get_timestamp_parser("%Y-%m-%d %H:%M:%S")
+    parsed_lines = []
+
+    def count_parsed_lines(line):
+        parsed_lines.append(line)
+        return parse_timestamp(line)
+
+    since = datetime.datetime.now().astimezone() - datetime.timedelta(minutes=5)
+    lines = provider._read_window_lines(filename, since, count_parsed_lines)
+    # only the probed lines of the 12,000 lines were parsed
+    assert len(parsed_lines) < 50
+    timestamps = [t for t in map(parse_timestamp, lines) if t is not None]
+    # the lines of the last 5 minutes, a request every 3 seconds
+    assert len(timestamps) in (99, 100)
+    assert since.replace(tzinfo=None) < timestamps[0]
+    assert timestamps[0] < since.replace(tzinfo=None) + datetime.timedelta(seconds=4)
+
+
+def test_templates(context_manager, provider, tmp_path):
+    filename = str(tmp_path / "app.log")
+    write(filename, DISK_ERRORS)
+
+    def query_templates():
+        results = provider.query(
+            filename=filename, incremental=True, clustering="templates"
+        )
+        context_manager.commit_run_state()
+        return results
+
+    assert query_templates() == [
+        {
+            "template": "2023-01-01 00:00:00 ERROR disk full on <*>",
+            "count": 2,
+            "new_lines": 2,
+            "new": True,
+        }
+    ]
+    write(filename, SLOW_QUERIES + "2023-01-01 00:02:00 ERROR disk full on sdc\n")
+    assert query_templates() == [
+        {
+            "template": "2023-01-01 00:01:00 WARN slow query on <*>",
+            "count": 2,
+            "new_lines": 2,
+            "new": True,
+        },
+        {
+            "template": "2023-01-01 <*> ERROR disk full on <*>",
+            "count": 3,
+            "new_lines": 1,
+            "new": False,
+        },
+    ]
+
+
+def test_templates_require_incremental(context_manager, provider, tmp_path):
+    filename = str(tmp_path / "app.log")
+    write(filename, DISK_ERRORS)
+    # the lines would be added to the persisted counts again by every run
+    with pytest.raises(ProviderConfigException):
+        provider.query(filename=filename, clustering="templates")
@@ -0,0 +1,135 @@
+"""
+Test the MySQL provider pooling and streaming
+"""
+import pytest
+
+from keep.providers.base.results_stream import MaxRowsExceeded, ResultsStream
+from keep.providers.models.provider_config import ProviderConfig
+from keep.providers.mysql_provider import mysql_provider
+from keep.providers.mysql_provider.mysql_provider import MysqlProvider
+
+ROWS = [(i,) for i in range(10)]
+
+
+class MockCursor:
+    def __init__(self, connection, buffered):
+        self.connection = connection
+        self.buffered = buffered
+        self.rows = []
+        self.fetched_sizes = []
+
+    def execute(self, query):
+        self.connection.queries.append(query)
+        self.rows = list(ROWS)
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        self.fetched_sizes.append(size)
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class MockConnection:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.queries = []
+        self.cursors = []
+        self.closed = False
+
+    def cursor(self, buffered=None):
+        cursor = MockCursor(self, buffered)
+        self.cursors.append(cursor)
+        return cursor
+
+    def ping(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connections(monkeypatch) -> list:
+    connections = []
+
+    def connect(**kwargs):
+        connection = MockConnection(**kwargs)
+        connections.append(connection)
+        return connection
+
+    monkeypatch.setattr(mysql_provider.mysql.connector, "connect", connect)
+    return connections
+
+
+@pytest.fixture
+def provider(connections) -> MysqlProvider:
+    provider = MysqlProvider(
+        "mysql-prod",
+        ProviderConfig(
+            authentication={
+                "username": "keep",
+                "password": "keep",
+                "host": "localhost",
+                "database": "keep",
+            }
+        ),
+    )
+    yield provider
+    provider.dispose()
+
+
+def test_mysql_provider_pools_connections(provider, connections):
+    assert provider._query(query="SELECT {column} FROM t", column="id") == ROWS
+    assert provider._query(query="SELECT id FROM t", single_row=True) == ROWS[0]
+    assert len(connections) == 1
+    assert connections[0].kwargs["autocommit"]
+    assert connections[0].queries == ["SELECT id FROM t", "SELECT id FROM t"]
+    assert provider.get_connection_stats()["reused"] == 1
+
+
+def test_mysql_provider_max_rows(provider, connections):
+    assert provider._query(query="SELECT id FROM t", max_rows=10) == ROWS
+    with pytest.raises(MaxRowsExceeded):
+        provider._query(query="SELECT id FROM t", max_rows=5)
+    # only max_rows + 1 rows were fetched, and the connection with the unread rows was discarded
+    assert connections[0].cursors[-1].fetched_sizes == [6]
+    assert connections[0].closed
+    assert provider.get_connection_stats()["open"] == 0
+
+
+def test_mysql_provider_stream(provider, connections):
+    results = provider._query(query="SELECT id FROM t", stream=True, chunk_size=4)
+    assert isinstance(results, ResultsStream)
+    # the connection is held until the stream is exhausted
+    assert provider.get_connection_stats()["in_use"] == 1
+    assert list(results) == ROWS
+    cursor = connections[0].cursors[0]
+    assert cursor.buffered is False
+    assert cursor.fetched_sizes == [4, 4, 4, 4]
+    assert provider.get_connection_stats()["idle"] == 1
+    assert not connections[0].closed
+
+
+def test_mysql_provider_stream_abandoned(provider, connections):
+    results = provider._query(query="SELECT id FROM t", stream=True, chunk_size=4)
+    assert next(results) == ROWS[0]
+    results.close()
+    # the connection still had unread rows, so it's not reused
+    assert connections[0].closed
+    assert provider.get_connection_stats()["open"] == 0
+
+
+def test_mysql_provider_stream_max_rows(provider, connections):
+    results = provider._query(
+        query="SELECT id FROM t", stream=True, chunk_size=4, max_rows=6
+    )
+    with pytest.raises(MaxRowsExceeded):
+        list(results)
+    assert results.rows_count == 8
+    assert connections[0].closed
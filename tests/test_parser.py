@@ -50,3 +50,61 @@ def test_parse_with_alert_source_with_no_providers_file():
     parser = Parser()
     with pytest.raises(TypeError):
         parser.parse(str(alert_path))
+
+
+def test_parse_step_dependencies(tmp_path):
+    alert_file = tmp_path / 'alert.yml'
+    alert_file.write_text('''
+alert:
+  id: steps-dependencies
+  steps_concurrency: 4
+  steps:
+    - name: datadog
+      provider:
+        type: mock
+        with:
+          command_output: 1
+    - name: elastic
+      provider:
+        type: mock
+        with:
+          command_output: 2
+    - name: postgres
+      provider:
+        type: mock
+        with:
+          command_output: "{{ steps.datadog.results }} {{ steps.elastic.results }}"
+''')
+    parser = Parser()
+    alert = parser.parse(str(alert_file))[0]
+    assert [step.dependencies for step in alert.alert_steps] == [[], [], ['datadog', 'elastic']]
+    assert alert.alert_steps_concurrency == 4
+    # steps.this is whatever step ran last, so the steps run sequentially
+    alert_file.write_text(alert_file.read_text().replace('steps.elastic', 'steps.this'))
+    alert = parser.parse(str(alert_file))[0]
+    assert [step.dependencies for step in alert.alert_steps] == [[], [], ['datadog', 'elastic']]
+    assert alert.alert_steps_concurrency == 1
+
+
+def test_parse_doesnt_connect_providers(tmp_path):
+    alert_file = tmp_path / 'alert.yml'
+    alert_file.write_text('''
+alert:
+  id: lazy-providers
+  steps:
+    - name: disk-usage
+      provider:
+        type: ssh
+        config:
+          authentication:
+            host: unreachable.invalid
+            user: keep
+            password: keep
+        with:
+          command: df -h
+''')
+    parser = Parser()
+    alert = parser.parse(str(alert_file))[0]
+    # the ssh connection is opened on the first query
+    assert alert.alert_steps[0].provider._client is None
+    parser.providers_registry.release(alert.alert_steps[0].provider)
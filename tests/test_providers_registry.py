@@ -0,0 +1,52 @@
+"""
+Test the providers registry
+"""
+import pytest
+
+from keep.providers.mock_provider.mock_provider import MockProvider
+from keep.providers.providers_registry import ProvidersRegistry
+
+MOCK_CONFIG = {"authentication": {}, "description": "mock"}
+
+
+@pytest.fixture
+def disposed_providers(monkeypatch) -> list:
+    disposed_providers = []
+    monkeypatch.setattr(
+        MockProvider, "dispose", lambda self: disposed_providers.append(self)
+    )
+    return disposed_providers
+
+
+def test_providers_registry_shares_providers(disposed_providers):
+    providers_registry = ProvidersRegistry()
+    provider = providers_registry.acquire("mock-prod", "mock", MOCK_CONFIG)
+    assert (
+        providers_registry.acquire("mock-prod", "mock", dict(MOCK_CONFIG)) is provider
+    )
+    # a different config is a different provider
+    other_provider = providers_registry.acquire(
+        "mock-prod", "mock", {**MOCK_CONFIG, "description": "changed"}
+    )
+    assert other_provider is not provider
+    assert providers_registry.get_stats() == {
+        "open_providers": 2,
+        "open_providers_by_type": {"mock": 2},
+        "provider_references": 3,
+        "connections": {},
+    }
+    # the provider is disposed only when it's no longer referenced
+    providers_registry.release(provider)
+    assert disposed_providers == []
+    providers_registry.release(provider)
+    assert disposed_providers == [provider]
+    assert providers_registry.acquire("mock-prod", "mock", MOCK_CONFIG) is not provider
+
+
+def test_providers_registry_dispose(disposed_providers):
+    providers_registry = ProvidersRegistry()
+    provider = providers_registry.acquire("mock-prod", "mock", MOCK_CONFIG)
+    providers_registry.acquire("mock-prod", "mock", MOCK_CONFIG)
+    providers_registry.dispose()
+    assert disposed_providers == [provider]
+    assert providers_registry.get_stats()["open_providers"] == 0
@@ -0,0 +1,143 @@
+"""
+Test the coalescing of identical queries in a tick
+"""
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from keep.alertmanager.alertmanager import AlertManager
+from keep.contextmanager.contextmanager import ContextManager
+from keep.providers.base.query_coalescer import QueryCoalescer, query_coalescer_var
+from keep.providers.mock_provider.mock_provider import MockProvider
+from keep.providers.models.provider_config import ProviderConfig
+
+providers_path = str(Path(__file__).parent / "alerts" / "providers_for_testing.yaml")
+
+
+@pytest.fixture
+def queries(monkeypatch) -> list:
+    queries = []
+
+    def query(self, **kwargs):
+        queries.append(kwargs)
+        time.sleep(0.1)
+        if kwargs.get("fail"):
+            raise Exception("Query failed")
+        return kwargs.get("command_output")
+
+    monkeypatch.setattr(MockProvider, "_query", query)
+    return queries
+
+
+def get_provider(provider_id: str = "mock") -> MockProvider:
+    return MockProvider(provider_id, ProviderConfig(authentication={}))
+
+
+async def run_tick(*queries) -> tuple:
+    query_coalescer_var.set(QueryCoalescer())
+    results = await asyncio.gather(
+        *(provider.query_async(**kwargs) for provider, kwargs in queries),
+        return_exceptions=True,
+    )
+    return results, query_coalescer_var.get().stats
+
+
+def test_query_coalescer(queries):
+    provider, other_provider = get_provider(), get_provider("other")
+    results, stats = asyncio.run(
+        run_tick(
+            (provider, {"command_output": "disk_stats"}),
+            (provider, {"command_output": "disk_stats"}),
+            (provider, {"command_output": "cpu_stats"}),
+            (other_provider, {"command_output": "disk_stats"}),
+        )
+    )
+    assert results == ["disk_stats", "disk_stats", "cpu_stats", "disk_stats"]
+    # the identical query of the same provider ran once
+    assert len(queries) == 3
+    assert stats == {"queries": 4, "saved_calls": 1}
+
+
+def test_query_coalescer_shares_errors(queries):
+    provider = get_provider()
+    results, _ = asyncio.run(
+        run_tick((provider, {"fail": True}), (provider, {"fail": True}))
+    )
+    assert len(queries) == 1
+    assert all(str(result) == "Query failed" for result in results)
+
+
+def test_query_coalescer_skips_streams(queries):
+    provider = get_provider()
+    _, stats = asyncio.run(
+        run_tick((provider, {"stream": True}), (provider, {"stream": True}))
+    )
+    assert len(queries) == 2
+    assert stats["saved_calls"] == 0
+
+
+def test_exposed_parameters_per_query(monkeypatch):
+    def query(self, **kwargs):
+        self.set_exposed_parameters({"window": kwargs["window"]})
+        time.sleep(0.1)
+        return kwargs["window"]
+
+    monkeypatch.setattr(MockProvider, "_query", query)
+    # the provider instance is shared by the concurrent steps
+    provider = get_provider()
+
+    async def run_step(window: str) -> tuple:
+        results = await provider.query_async(window=window)
+        return results, provider.expose()
+
+    async def run_steps():
+        query_coalescer_var.set(QueryCoalescer())
+        return await asyncio.gather(
+            run_step("1h"), run_step("5m"), run_step("1h"), run_step("5m")
+        )
+
+    # every step exposes the parameters of its (coalesced) query
+    assert asyncio.run(run_steps()) == [
+        ("1h", {"window": "1h"}),
+        ("5m", {"window": "5m"}),
+        ("1h", {"window": "1h"}),
+        ("5m", {"window": "5m"}),
+    ]
+
+
+def test_alerts_coalesce_queries(queries, monkeypatch, capsys):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.setenv("KEEP_STATE_FILE", os.path.join(tmp_dir, "keepstate.db"))
+        for alert_id in ("disk-space", "disk-inodes"):
+            with open(os.path.join(tmp_dir, f"{alert_id}.yml"), "w") as f:
+                f.write(
+                    f"""
+alert:
+  id: {alert_id}
+  steps:
+    - name: disk-stats
+      provider:
+        type: mock
+        with:
+          command_output: SELECT * FROM disk_stats
+  actions:
+    - name: print-stats
+      provider:
+        type: console
+        with:
+          alert_message: "{alert_id}: {{{{ steps.disk-stats.results }}}}"
+"""
+                )
+        alert_manager = AlertManager()
+        alert_manager.run(tmp_dir, providers_path, workers=2)
+        assert sorted(capsys.readouterr().out.splitlines()) == [
+            "disk-inodes: SELECT * FROM disk_stats",
+            "disk-space: SELECT * FROM disk_stats",
+        ]
+        assert len(queries) == 1
+        assert alert_manager.query_coalescing_stats == {"queries": 2, "saved_calls": 1}
+        ContextManager.delete_instance()
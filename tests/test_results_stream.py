@@ -0,0 +1,109 @@
+"""
+Test the streamed (chunked) query results
+"""
+import pytest
+
+from keep.exceptions.provider_exception import ProviderException
+from keep.providers.base.connection_pool import ConnectionPool
+from keep.providers.base.results_stream import MaxRowsExceeded, ResultsStream
+from keep.providers.base.server_side_cursor import stream_server_side_cursor
+
+
+def get_results_stream(rows: list, chunk_size: int, **kwargs) -> ResultsStream:
+    chunks = iter([rows[i : i + chunk_size] for i in range(0, len(rows), chunk_size)])
+    return ResultsStream(fetch_chunk=lambda: next(chunks, []), name="mock", **kwargs)
+
+
+def test_results_stream_rows():
+    closed = []
+    first_rows = []
+    results_stream = get_results_stream(
+        list(range(5)), chunk_size=2, on_close=closed.append
+    )
+    results_stream.on_first_row = first_rows.append
+    assert list(results_stream) == [0, 1, 2, 3, 4]
+    assert closed == [True]
+    assert first_rows == [0]
+    assert repr(results_stream) == "<ResultsStream mock: 5 rows read>"
+    # the rows were consumed
+    with pytest.raises(ProviderException):
+        list(results_stream)
+
+
+def test_results_stream_chunks():
+    results_stream = get_results_stream(list(range(5)), chunk_size=2)
+    assert next(results_stream) == 0
+    assert list(results_stream.chunks()) == [[1], [2, 3], [4]]
+
+
+def test_results_stream_closed_early():
+    closed = []
+    with get_results_stream(
+        list(range(5)), chunk_size=2, on_close=closed.append
+    ) as results_stream:
+        next(results_stream)
+    assert closed == [False]
+    # closing again does nothing
+    results_stream.close()
+    assert closed == [False]
+
+
+def test_results_stream_max_rows():
+    closed = []
+    results_stream = get_results_stream(
+        list(range(5)), chunk_size=2, max_rows=3, on_close=closed.append
+    )
+    with pytest.raises(MaxRowsExceeded):
+        list(results_stream)
+    assert closed == [False]
+
+
+class MockCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.closed = False
+
+    def execute(self, query):
+        pass
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+class MockConnection:
+    def __init__(self, rows):
+        self.autocommit = True
+        self.cursors = []
+        self.rolled_back = False
+        self.rows = rows
+
+    def cursor(self, name=None):
+        self.cursors.append(name)
+        return MockCursor(self.rows)
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def test_server_side_cursor_stream():
+    connection = MockConnection(list(range(5)))
+    pool = ConnectionPool(
+        "mock",
+        connect=lambda: connection,
+        close=lambda connection: None,
+        is_healthy=lambda connection: True,
+    )
+    results_stream = stream_server_side_cursor(
+        pool, "SELECT 1", chunk_size=2, max_rows=None, name="mock"
+    )
+    # the connection is checked out in a transaction, with a named cursor
+    assert connection.autocommit is False
+    assert connection.cursors[0].startswith("keep_")
+    assert list(results_stream) == list(range(5))
+    # the transaction was rolled back and the connection returned to the pool
+    assert connection.rolled_back and connection.autocommit
+    assert pool.get_stats()["idle"] == 1
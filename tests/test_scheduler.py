@@ -0,0 +1,110 @@
+"""
+Test the alerts schedules and scheduler
+"""
+import dataclasses
+import datetime
+
+import pytest
+
+from keep.scheduler.scheduler import AlertSchedule, AlertScheduler, CronExpression
+
+
+@dataclasses.dataclass
+class MockAlert:
+    alert_id: str
+    alert_schedule: AlertSchedule = None
+    alert_source: str = "alerts.yaml"
+
+
+def test_cron_expression():
+    cron = CronExpression("*/15 9-17 * * 1-5")
+    saturday = datetime.datetime(2023, 4, 1, 12, 7).timestamp()
+    assert datetime.datetime.fromtimestamp(cron.next_run(saturday)) == (
+        datetime.datetime(2023, 4, 3, 9, 0)
+    )
+    monday = datetime.datetime(2023, 4, 3, 9, 0).timestamp()
+    assert datetime.datetime.fromtimestamp(cron.next_run(monday)) == (
+        datetime.datetime(2023, 4, 3, 9, 15)
+    )
+    # day of month or day of week, sunday is 0 or 7
+    cron = CronExpression("0 0 1 * 7")
+    assert datetime.datetime.fromtimestamp(cron.next_run(saturday)) == (
+        datetime.datetime(2023, 4, 2, 0, 0)
+    )
+
+
+@pytest.mark.parametrize(
+    "expression", ["* * * *", "60 * * * *", "*/0 * * * *", "a * * * *", "5-1 * * * *"]
+)
+def test_cron_expression_invalid(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_alert_schedule_from_config():
+    assert AlertSchedule.from_config({"interval": "5m", "jitter": 10}) == (
+        AlertSchedule(interval=300, jitter=10)
+    )
+    with pytest.raises(ValueError):
+        AlertSchedule.from_config({"interval": 60, "cron": "* * * * *"})
+    with pytest.raises(ValueError):
+        # february 30th
+        AlertSchedule.from_config({"cron": "0 0 30 2 *"})
+
+
+def test_scheduler_doesnt_drift():
+    scheduler = AlertScheduler()
+    alert = MockAlert("every-10s", AlertSchedule(interval=10))
+    scheduler.update([alert], now=1000)
+    (scheduled_alert,) = scheduler.pop_due(1000)
+    assert scheduled_alert.alert is alert
+    # the alert started a second after it was due
+    assert scheduler.started(scheduled_alert, 1001) == 1
+    scheduler.finished(scheduled_alert)
+    # the next run is 10 seconds after the scheduled run, not after the run finished
+    assert scheduler.get_next_run_at() == 1010
+    assert scheduler.pop_due(1009) == []
+    # a late tick runs the alert once and keeps the schedule
+    assert len(scheduler.pop_due(1034)) == 1
+    assert scheduler.get_next_run_at() == 1040
+    assert scheduler.get_stats()["every-10s"]["max_lag"] == 1
+
+
+def test_scheduler_skips_running_alerts():
+    scheduler = AlertScheduler()
+    slow_alert = MockAlert("slow", AlertSchedule(interval=10))
+    fast_alert = MockAlert("fast", AlertSchedule(interval=5))
+    scheduler.update([slow_alert, fast_alert], now=0)
+    assert len(scheduler.pop_due(0)) == 2
+    # only the slow alert is still running
+    scheduler.finished(scheduler._scheduled_alerts[("alerts.yaml", "fast")])
+    assert [a.alert for a in scheduler.pop_due(10)] == [fast_alert]
+    stats = scheduler.get_stats()
+    assert stats["slow"]["skipped_runs"] == 1
+    assert stats["fast"]["skipped_runs"] == 0
+
+
+def test_scheduler_jitter_and_default_schedule():
+    scheduler = AlertScheduler(default_schedule=AlertSchedule(interval=60, jitter=5))
+    alerts = [MockAlert(f"alert-{i}") for i in range(20)]
+    scheduler.update(alerts, now=0)
+    run_times = [a.next_run_at for a in scheduler._scheduled_alerts.values()]
+    assert all(0 <= run_at <= 5 for run_at in run_times)
+    assert len(set(run_times)) > 1
+    assert len(scheduler.pop_due(5)) == 20
+
+
+def test_scheduler_update():
+    scheduler = AlertScheduler()
+    once = MockAlert("once")
+    removed = MockAlert("removed", AlertSchedule(interval=10))
+    scheduler.update([once, removed], now=0)
+    for scheduled_alert in scheduler.pop_due(0):
+        scheduler.finished(scheduled_alert)
+    # alerts without a schedule (and no default schedule) run once
+    scheduler.update([once], now=5)
+    assert scheduler.get_next_run_at() is None
+    assert scheduler.pop_due(100) == []
+    # a changed schedule is applied
+    scheduler.update([MockAlert("once", AlertSchedule(interval=30))], now=100)
+    assert scheduler.get_next_run_at() == 130
@@ -0,0 +1,170 @@
+"""
+Test the state stores
+"""
+import json
+import os
+import tempfile
+
+import pytest
+
+from keep.statestore.jsonstatestore import JsonStateStore
+from keep.statestore.sqlitestatestore import SqliteStateStore
+from keep.statestore.statestore import StateRetention
+from keep.statestore.statestorefactory import StateStoreFactory, StateStoreTypes
+
+
+@pytest.fixture
+def sqlite_state_store() -> SqliteStateStore:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_store = SqliteStateStore(os.path.join(tmp_dir, "keepstate.db"))
+        yield state_store
+        state_store.close()
+
+
+def test_state_store_factory(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_state_file = os.path.join(tmp_dir, "keepstate.json")
+        sqlite_state_file = os.path.join(tmp_dir, "keepstate.db")
+        assert isinstance(
+            StateStoreFactory.get_state_store(json_state_file), JsonStateStore
+        )
+        assert isinstance(
+            StateStoreFactory.get_state_store(sqlite_state_file), SqliteStateStore
+        )
+        assert isinstance(
+            StateStoreFactory.get_state_store(
+                json_state_file, state_store_type=StateStoreTypes.SQLITE
+            ),
+            SqliteStateStore,
+        )
+        monkeypatch.setenv("KEEP_STATE_STORE_TYPE", "sqlite")
+        assert isinstance(
+            StateStoreFactory.get_state_store(json_state_file), SqliteStateStore
+        )
+        monkeypatch.setenv("KEEP_STATE_STORE_TYPE", "redis")
+        with pytest.raises(ValueError, match="KEEP_STATE_STORE_TYPE"):
+            StateStoreFactory.get_state_store(json_state_file)
+
+
+def test_json_state_store_set_last_alert_run():
+    with tempfile.NamedTemporaryFile() as fp:
+        state_store = JsonStateStore(fp.name)
+        state_store.set_last_alert_run("mock_alert", {"alert_status": "firing"})
+        with open(fp.name, "r") as f:
+            state = json.load(f)
+        assert state["mock_alert"][-1]["alert_status"] == "firing"
+        assert state_store.get_last_alert_run("mock_alert")["alert_status"] == "firing"
+
+
+def test_sqlite_state_store_get_last_alert_run(sqlite_state_store: SqliteStateStore):
+    assert sqlite_state_store.get_last_alert_run("mock_alert") == {}
+    assert "mock_alert" not in sqlite_state_store
+    sqlite_state_store.set_last_alert_run(
+        "mock_alert", {"alert_status": "firing", "alert_context": {"mock": 1}}
+    )
+    sqlite_state_store.set_last_alert_run(
+        "mock_alert", {"alert_status": "resolved", "alert_context": {"mock": 2}}
+    )
+    last_run = sqlite_state_store.get_last_alert_run("mock_alert")
+    assert last_run["alert_status"] == "resolved"
+    assert last_run["alert_context"] == {"mock": 2}
+    assert "mock_alert" in sqlite_state_store
+    assert list(sqlite_state_store) == ["mock_alert"]
+
+
+def test_sqlite_state_store_alert_runs(sqlite_state_store: SqliteStateStore):
+    for i in range(3):
+        sqlite_state_store.set_last_alert_run(
+            "mock_alert", {"alert_status": "firing", "alert_context": {"run": i}}
+        )
+    alert_runs = sqlite_state_store["mock_alert"]
+    assert len(alert_runs) == 3
+    assert alert_runs[0]["alert_context"]["run"] == 0
+    assert alert_runs[-1]["alert_context"]["run"] == 2
+    assert [run["alert_context"]["run"] for run in alert_runs[1:]] == [1, 2]
+    with pytest.raises(IndexError):
+        alert_runs[3]
+    with pytest.raises(KeyError):
+        sqlite_state_store["unknown_alert"]
+
+
+def test_sqlite_state_store_persistency(sqlite_state_store: SqliteStateStore):
+    sqlite_state_store.set_last_alert_run(
+        "mock_alert", {"alert_status": "firing", "alert_context": {}}
+    )
+    state_store = SqliteStateStore(sqlite_state_store.state_file)
+    assert state_store.get_last_alert_run("mock_alert")["alert_status"] == "firing"
+    state_store.close()
+
+
+def test_state_retention_from_config():
+    retention = StateRetention.from_config(
+        {"max_runs": "10", "max_age": "7d", "max_context_runs": 2}
+    )
+    assert retention == StateRetention(
+        max_runs=10, max_age=7 * 86400, max_context_runs=2
+    )
+    assert StateRetention.from_config({}).is_empty()
+    assert StateRetention(max_runs=10, max_age=60).merge(
+        StateRetention(max_runs=5)
+    ) == StateRetention(max_runs=5, max_age=60)
+
+
+@pytest.mark.parametrize("state_store_type", list(StateStoreTypes))
+def test_state_store_retention(state_store_type):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_store = StateStoreFactory.get_state_store(
+            os.path.join(tmp_dir, "keepstate"), state_store_type=state_store_type
+        )
+        retention = StateRetention(max_runs=3, max_context_runs=1)
+        for i in range(5):
+            state_store.set_last_alert_run(
+                "mock_alert",
+                {
+                    "alert_status": "firing",
+                    "alert_context": {
+                        "alert_id": "mock_alert",
+                        "alert_steps_context": {"run": i},
+                    },
+                },
+                retention=retention,
+            )
+        alert_runs = list(state_store["mock_alert"])
+        assert len(alert_runs) == 3
+        # only the last run keeps its steps context
+        assert [
+            "alert_steps_context" in alert_run["alert_context"]
+            for alert_run in alert_runs
+        ] == [False, False, True]
+        assert all(
+            alert_run["alert_context"]["alert_id"] == "mock_alert"
+            and alert_run["alert_status"] == "firing"
+            for alert_run in alert_runs
+        )
+        assert state_store.get_last_alert_run("mock_alert")["alert_context"][
+            "alert_steps_context"
+        ] == {"run": 4}
+        # runs are older than max_age
+        assert state_store.compact_all(StateRetention(max_age=-1)) == 3
+        assert "mock_alert" not in state_store
+        state_store.close()
+
+
+@pytest.mark.parametrize("state_file_name", ["keepstate.json", "keepstate.db"])
+def test_state_store_values(state_file_name):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_file = os.path.join(tmp_dir, state_file_name)
+        state_store = StateStoreFactory.get_state_store(state_file)
+        assert state_store.get_value("mock_alert", "watermark:step", 0) == 0
+        state_store.set_value("mock_alert", "watermark:step", {"offset": 10})
+        state_store.set_value("other_alert", "watermark:step", "2023-04-01")
+        # the values are kept between runs (the store is reloaded)
+        state_store.close()
+        state_store = StateStoreFactory.get_state_store(state_file)
+        assert state_store.get_value("mock_alert", "watermark:step") == {"offset": 10}
+        assert state_store.get_value("other_alert", "watermark:step") == "2023-04-01"
+        # values aren't alert runs
+        assert list(state_store) == []
+        state_store.set_value("mock_alert", "watermark:step", None)
+        assert state_store.get_value("mock_alert", "watermark:step") is None
+        state_store.close()